@@ -0,0 +1,107 @@
+# benchmarks/bench_elo_replay.py
+"""Compare the array-backed Elo replay with the original iterrows loop.
+
+Run from the repository root:  python -m benchmarks.bench_elo_replay
+"""
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import config
+from models.player import PlayerElo
+from services.elo_engine import EloEngine
+from services.elo_service import EloService
+from services.match_store import MatchStore
+from utils.name_normalization import NameNormalizer
+from utils.surface_detection import SurfaceDetector
+
+def legacy_replay(df_all: pd.DataFrame) -> Dict[str, PlayerElo]:
+    """The per-row loop EloService.process_historical_data used to run"""
+    service = EloService()
+    players = {}
+    match_counts = {}
+    
+    for idx, match in df_all.iterrows():
+        winner = NameNormalizer.normalize_excel_format(match['Winner'])
+        loser = NameNormalizer.normalize_excel_format(match['Loser'])
+        
+        tournament = match.get('Tournament', '')
+        surface = SurfaceDetector.detect_surface(tournament, match['Date'].month)
+        
+        for name in (winner, loser):
+            if name not in players:
+                players[name] = PlayerElo(
+                    player_name=name,
+                    elo_hard=config.elo.base_elo,
+                    elo_clay=config.elo.base_elo,
+                    elo_grass=config.elo.base_elo,
+                    elo_overall=config.elo.base_elo,
+                    matches_played=0
+                )
+                match_counts[name] = 0
+        
+        winner_player = players[winner]
+        loser_player = players[loser]
+        
+        winner_elo = winner_player.get_surface_elo(surface)
+        loser_elo = loser_player.get_surface_elo(surface)
+        
+        winner_k = service.get_adaptive_k_factor(match_counts[winner], winner_elo)
+        new_winner_elo, new_loser_elo = service.update_elo(winner_elo, loser_elo, winner_k)
+        
+        if surface == "Hard":
+            winner_player.elo_hard = new_winner_elo
+            loser_player.elo_hard = new_loser_elo
+        elif surface == "Clay":
+            winner_player.elo_clay = new_winner_elo
+            loser_player.elo_clay = new_loser_elo
+        elif surface == "Grass":
+            winner_player.elo_grass = new_winner_elo
+            loser_player.elo_grass = new_loser_elo
+        
+        for player in (winner_player, loser_player):
+            player.elo_overall = (
+                player.elo_hard * 0.5 +
+                player.elo_clay * 0.3 +
+                player.elo_grass * 0.2
+            )
+        
+        match_counts[winner] += 1
+        match_counts[loser] += 1
+        winner_player.matches_played = match_counts[winner]
+        loser_player.matches_played = match_counts[loser]
+    
+    return players
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<28} {time.perf_counter() - start:8.3f} s")
+    return result
+
+def main():
+    df_all = MatchStore().load()
+    df_all = df_all.dropna(subset=['Winner', 'Loser', 'Date']).sort_values('Date', kind='stable')
+    print(f"{len(df_all)} matches")
+    
+    legacy = timed("legacy iterrows loop", legacy_replay, df_all)
+    
+    engine = EloEngine()
+    encoded = timed("engine encode", engine.encode, df_all)
+    state = timed("engine replay", engine.replay, encoded)
+    players = timed("PlayerElo export", state.to_players)
+    recorded, _ = timed("engine replay + history", engine.replay_with_history, encoded)
+    assert (recorded.ratings == state.ratings).all(), "recording history changed the ratings"
+    
+    assert list(players) == list(legacy), "player order differs"
+    fields = ["elo_hard", "elo_clay", "elo_grass", "elo_overall", "matches_played"]
+    expected = np.array([[getattr(legacy[name], f) for f in fields] for name in legacy])
+    actual = np.array([[getattr(players[name], f) for f in fields] for name in players])
+    mismatches = int((expected != actual).sum())
+    print(f"{len(players)} players, {mismatches} mismatching values")
+    assert mismatches == 0, "ratings differ from the legacy loop"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Time an incremental Elo update against a full rebuild on the stored matches.
+
+The current-year workbook is replayed without its last matches, which are
+then added back as the update's delta. Workbooks are stood in by stub files
+whose "parsing" returns the match store's arrays, so no Excel file is read.
+
+Run from the repository root:  python -m benchmarks.bench_incremental_update [--new 200]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+from config.settings import config
+from services import match_store
+from services.elo_service import EloService
+from services.match_store import MatchStore
+from services.rating_cache import SharedRatings
+
+# Arrays with one value per workbook row; the rest are category tables
+ROW_ARRAYS = ("row", "Date", "ATP")
+
+def head(arrays: Dict[str, np.ndarray], rows: int) -> Dict[str, np.ndarray]:
+    """The first `rows` rows of a workbook's arrays"""
+    return {key: values[:rows] if key in ROW_ARRAYS or key.endswith("__codes") else values
+            for key, values in arrays.items()}
+
+def timed(label: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<28} {time.perf_counter() - start:8.3f} s")
+    return result
+
+def max_difference(names, ratings, other_index: Dict[str, int], other_ratings: np.ndarray) -> float:
+    """Largest rating difference of the same players, whatever their order in each state"""
+    order = [other_index[name] for name in names]
+    return float(np.abs(ratings - other_ratings[..., order, :]).max())
+
+def main(new_matches: int):
+    source = MatchStore()
+    workbooks = {name: source._read_entry(entry) for name, entry in sorted(source.entries().items())}
+    current = max(workbooks)
+    total = len(workbooks[current]["row"])
+    
+    tmp = tempfile.mkdtemp(prefix="bench_incremental_")
+    config.data_dir = os.path.join(tmp, "data")
+    config.match_store_dir = os.path.join(tmp, "match_store")
+    config.elo_checkpoint_file = os.path.join(tmp, "elo_checkpoint.npz")
+    config.elo_file = os.path.join(tmp, "elo_probs.csv")
+    config.player_registry_file = os.path.join(tmp, "player_registry.json")
+    config.ingest_workers = 1
+    os.makedirs(config.data_dir)
+    
+    # A stub workbook holds the number of rows its parse returns
+    def write_stub(name: str, rows: int):
+        with open(os.path.join(config.data_dir, name), 'w') as f:
+            f.write(str(rows))
+    
+    def ingest_stub(file_path: str) -> Dict[str, np.ndarray]:
+        with open(file_path) as f:
+            return head(workbooks[os.path.basename(file_path)], int(f.read()))
+    
+    def service(cache_dir: str) -> EloService:
+        elo_service = EloService()
+        elo_service.shared = SharedRatings(os.path.join(tmp, cache_dir))
+        return elo_service
+    
+    match_store.ingest_workbook = ingest_stub
+    try:
+        for name, arrays in workbooks.items():
+            write_stub(name, len(arrays["row"]))
+        write_stub(current, total - new_matches)
+        
+        incremental = service("rating_cache")
+        timed("rebuild without the delta", incremental.process_historical_data, force_rebuild=True)
+        write_stub(current, total)
+        timed(f"incremental (+{new_matches})", incremental.update_incremental)
+        timed("incremental (no new rows)", incremental.update_incremental)
+        
+        rebuilt = service("rating_cache_full")
+        timed("full rebuild", rebuilt.process_historical_data, force_rebuild=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    
+    a, b = incremental.snapshot, rebuilt.snapshot
+    print(f"max Elo difference       {max_difference(b.state.names, b.state.ratings, a.state.index, a.state.ratings):.3g}")
+    print(f"max ensemble difference  "
+          f"{max_difference(b.ensemble.names, b.ensemble.ratings, a.ensemble.index, a.ensemble.ratings):.3g}")
+    print(f"max Glicko-2 difference  "
+          f"{max_difference(b.glicko.names, b.glicko.ratings, a.glicko.index, a.glicko.ratings):.3g}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental Elo update against a full rebuild")
+    parser.add_argument("--new", type=int, default=200,
+                        help="Matches of the current-year workbook the update adds (default: 200)")
+    args = parser.parse_args()
+    main(args.new)
@@ -0,0 +1,50 @@
+# benchmarks/bench_match_probabilities.py
+"""Compare per-pair get_match_probability calls with the batch API.
+
+Run from the repository root:  python -m benchmarks.bench_match_probabilities
+"""
+import time
+
+import numpy as np
+
+from services.elo_engine import SURFACES
+from services.elo_service import EloService
+
+def scalar_probability(service: EloService, player1: str, player2: str, surface: str) -> float:
+    """Two name lookups and a scalar expected score, as get_match_probability used to run"""
+    elo1 = service.get_player_elo(player1, surface)
+    elo2 = service.get_player_elo(player2, surface)
+    if elo1 is None or elo2 is None:
+        return float("nan")
+    return service.calculate_expected_score(elo1, elo2)
+
+def main():
+    service = EloService()
+    service.process_historical_data()
+    names = service.state.names
+    
+    rng = np.random.default_rng(0)
+    pairs = [(names[i], names[j]) for i, j in rng.integers(0, len(names), size=(5000, 2))]
+    # "Carpet" has no rating column and falls back to the overall blend
+    surfaces = [(SURFACES + ["Carpet"])[code] for code in rng.integers(0, len(SURFACES) + 1, size=len(pairs))]
+    pairs[::50] = [(name, "Unknown P.") for name, _ in pairs[::50]]
+    print(f"{len(pairs)} pairs over {len(names)} players")
+    
+    start = time.perf_counter()
+    scalar = [scalar_probability(service, p1, p2, surface) for (p1, p2), surface in zip(pairs, surfaces)]
+    print(f"{'per-pair lookups':<24} {time.perf_counter() - start:8.3f} s")
+    start = time.perf_counter()
+    batch = service.get_match_probabilities(pairs, surfaces)
+    print(f"{'get_match_probabilities':<24} {time.perf_counter() - start:8.3f} s")
+    assert np.allclose(np.array(scalar), batch, rtol=0, atol=1e-12, equal_nan=True), "batch and scalar differ"
+    
+    field = names[:128]
+    start = time.perf_counter()
+    matrix = service.get_field_probabilities(field, "Clay")
+    print(f"{f'{len(field)}x{len(field)} field matrix':<24} {time.perf_counter() - start:8.3f} s")
+    off_diagonal = ~np.eye(len(field), dtype=bool)
+    assert np.allclose((matrix.values + matrix.values.T)[off_diagonal], 1.0), "matrix is not complementary"
+    print("identical results")
+
+if __name__ == "__main__":
+    main()
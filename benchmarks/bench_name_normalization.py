@@ -0,0 +1,59 @@
+# benchmarks/bench_name_normalization.py
+"""Compare NameNormalizer with its original per-character replace loop.
+
+Run from the repository root:  python -m benchmarks.bench_name_normalization
+"""
+import time
+
+import pandas as pd
+
+from services.match_store import MatchStore
+from utils.name_normalization import NameNormalizer
+
+def legacy_remove_accents(text: str) -> str:
+    """The ~50 chained str.replace calls remove_accents used to run"""
+    for accented, plain in NameNormalizer.ACCENT_MAP.items():
+        text = text.replace(accented, plain)
+    return text
+
+def legacy_normalize_excel_format(full_name: str) -> str:
+    """The original conversion, which also reorders names already in "Last F." form"""
+    if not full_name or not full_name.strip():
+        return ""
+    name = legacy_remove_accents(full_name.strip())
+    parts = name.split()
+    if len(parts) < 2:
+        return name
+    normalized = f"{' '.join(parts[1:])} {parts[0][0]}."
+    return NameNormalizer.NAME_CORRECTIONS.get(normalized, normalized)
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<36} {time.perf_counter() - start:8.3f} s")
+    return result
+
+def main():
+    df_all = MatchStore().load()
+    names = pd.concat([df_all['Winner'], df_all['Loser']], ignore_index=True).astype(object).dropna()
+    print(f"{len(names)} names, {names.nunique()} distinct")
+    
+    legacy = timed("legacy per-name loop", lambda: [legacy_normalize_excel_format(n) for n in names])
+    NameNormalizer._memo.clear()
+    timed("normalize_excel_format (cold memo)", lambda: [NameNormalizer.normalize_excel_format(n) for n in names])
+    scalar = timed("normalize_excel_format (warm memo)",
+                   lambda: [NameNormalizer.normalize_excel_format(n) for n in names])
+    vectorised = timed("normalize_series", NameNormalizer.normalize_series, names, True)
+    
+    assert scalar == vectorised['name'].tolist(), "scalar and vectorised paths differ"
+    print("\nDetected input formats:")
+    print(vectorised['format'].value_counts().to_string())
+    
+    changed = pd.Series(legacy) != vectorised['name'].to_numpy()
+    print(f"\n{int(changed.sum())} names normalised differently from the legacy loop, e.g.")
+    examples = pd.DataFrame({'input': names.to_numpy(), 'legacy': legacy, 'now': vectorised['name'].to_numpy()})
+    print(examples[changed.to_numpy()].drop_duplicates('input').head(5).to_string(index=False))
+    print(f"Distinct players: legacy {len(set(legacy))}, now {vectorised['name'].nunique()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_pinnacle_client.py
+"""Compare bare requests.get calls with the pooled PinnacleClient on a local stand-in API.
+
+Run from the repository root:  python -m benchmarks.bench_pinnacle_client
+"""
+import http.server
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+import requests
+
+from services.pinnacle_client import ENDPOINTS, PinnacleClient
+from services.rate_limiter import TokenBucket
+
+# Simulated server latency per request
+LATENCY = 0.05
+SPORT_IDS = (2, 33)
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every GET with an empty event board after LATENCY seconds"""
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    
+    def do_GET(self):
+        StandInHandler.connections.add(self.client_address)
+        time.sleep(LATENCY)
+        body = json.dumps({"path": self.path, "events": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+class StandInServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+def main():
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    board = [(endpoint, sport_id) for endpoint in ENDPOINTS for sport_id in SPORT_IDS]
+    print(f"{len(board)} endpoint/sport requests, {LATENCY * 1000:.0f} ms server latency")
+    
+    StandInHandler.connections.clear()
+    start = time.perf_counter()
+    for endpoint, sport_id in board:
+        requests.get(f"{base_url}{ENDPOINTS[endpoint]}", params={"sport_id": sport_id}, timeout=5).json()
+    print(f"{'serial requests.get':<24} {time.perf_counter() - start:8.3f} s"
+          f"  {len(StandInHandler.connections)} connections")
+    
+    # A bucket of its own, so the benchmark neither waits on nor spends the real quota
+    limiter = TokenBucket(os.path.join(tempfile.mkdtemp(), "rate_limit.json"), per_hour=1e9, capacity=1000)
+    client = PinnacleClient(base_url=base_url, api_key="stand-in", limiter=limiter)
+    StandInHandler.connections.clear()
+    start = time.perf_counter()
+    bodies = client.fetch_board(ENDPOINTS, SPORT_IDS)
+    for _ in range(3):
+        bodies = client.fetch_board(ENDPOINTS, SPORT_IDS)
+    elapsed = (time.perf_counter() - start) / 4
+    print(f"{'PinnacleClient board':<24} {elapsed:8.3f} s"
+          f"  {len(StandInHandler.connections)} connections over 4 boards")
+    
+    assert all(body is not None for body in bodies.values()), "a stand-in request failed"
+    client.close()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_player_lookup.py
+"""Compare PlayerIndex with the linear fuzzy scan get_player_elo used to run.
+
+Run from the repository root:  python -m benchmarks.bench_player_lookup
+"""
+import time
+from typing import List, Optional
+
+from services.elo_service import EloService
+from services.player_index import PlayerIndex
+from utils.name_normalization import NameNormalizer
+
+def legacy_lookup(names: List[str], normalized_name: str) -> Optional[int]:
+    """Score every stored name and keep the first best one at or above 0.8"""
+    best_match = None
+    best_score = 0.0
+    for player_id, stored_name in enumerate(names):
+        score = NameNormalizer.fuzzy_match_score(normalized_name, stored_name)
+        if score > best_score and score >= 0.8:
+            best_score = score
+            best_match = player_id
+    return best_match
+
+def queries(names: List[str]) -> List[str]:
+    """Names that miss the exact lookup: altered case, dots, truncations, unknowns"""
+    altered = []
+    for name in names[::7]:
+        altered.append(name.upper())
+        altered.append(name.replace(".", ""))
+        altered.append(name.split()[0])
+        altered.append(name[:-3])
+    altered += ["Unknown P.", "Zz", "de", "Carlos Alcaraz", "Mpetshi Perricard G."]
+    return [NameNormalizer.normalize_excel_format(name) for name in altered if name.strip()]
+
+def main():
+    service = EloService()
+    service.process_historical_data()
+    names = service.state.names
+
+    start = time.perf_counter()
+    index = PlayerIndex(names)
+    print(f"index of {len(index)} players built in {time.perf_counter() - start:.3f} s")
+
+    batch = queries(names)
+    print(f"{len(batch)} lookups")
+    start = time.perf_counter()
+    legacy = [legacy_lookup(names, name) for name in batch]
+    print(f"{'linear fuzzy scan':<24} {time.perf_counter() - start:8.3f} s")
+    start = time.perf_counter()
+    indexed = [index.lookup(name) for name in batch]
+    print(f"{'PlayerIndex.lookup':<24} {time.perf_counter() - start:8.3f} s")
+
+    assert legacy == indexed, "indexed and linear lookups differ"
+    print(f"identical results, {sum(player_id is not None for player_id in indexed)} matched")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # config/settings.py
 import os
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import logging
 
 @dataclass
@@ -10,14 +10,36 @@ class APIConfig:
     pinnacle_api_key: str
     pinnacle_host: str
     cache_duration_minutes: int = 5
+    # Oldest cached odds still served while a refresh runs; older odds are never shown
+    max_stale_minutes: int = 30
     request_timeout: int = 30
     max_retries: int = 3
+    # Scheme and host requests go to; https://<pinnacle_host> unless overridden (e.g. a local stand-in)
+    base_url: Optional[str] = None
+    # Keep-alive connections kept open to the API
+    pool_size: int = 8
+    # Age after which a `since` cursor is no longer trusted and the board is fully resynced
+    cursor_max_age_minutes: int = 30
+    # RapidAPI quota shared by every process: requests per hour, and how many may go out back to back
+    requests_per_hour: float = 100.0
+    request_burst: int = 5
+    # Consecutive failed calls that open the circuit breaker, and how long it then holds calls back
+    breaker_failures: int = 3
+    breaker_reset_seconds: int = 120
 
 @dataclass
 class EloConfig:
     """Elo rating system configuration"""
     base_elo: int = 1500
     k_factor: int = 32
+    # K multipliers for new (<30 matches), developing (<100), elite (>2000) and strong (>1800) players
+    k_multipliers: Tuple[float, float, float, float] = (1.5, 1.2, 0.8, 0.9)
+    # Weights of the hard/clay/grass ratings in the overall rating
+    overall_weights: Tuple[float, float, float] = (0.5, 0.3, 0.2)
+    # Surface of a match: "detected" from tournament and month, or the workbook "column"
+    surface_source: str = "detected"
+    adaptive_k: bool = True
+    normalize_names: bool = True
     surface_adjustment: Dict[str, float] = None
     
     def __post_init__(self):
@@ -28,6 +50,18 @@ class EloConfig:
                 "Grass": 0.9
             }
 
+@dataclass
+class GlickoConfig:
+    """Glicko-2 rating system configuration"""
+    initial_rating: float = 1500.0
+    initial_rd: float = 350.0
+    initial_volatility: float = 0.06
+    # System constant: how much volatility may change between periods
+    tau: float = 0.5
+    # Length of a rating period; all matches of a period are rated together
+    period_days: int = 7
+    convergence_tolerance: float = 1e-6
+
 @dataclass
 class BettingConfig:
     """Betting strategy configuration"""
@@ -35,18 +69,35 @@ class BettingConfig:
     kelly_fraction: float = 0.25
     max_bet_percentage: float = 0.05
     bankroll: float = 1000.0
+    # Combined Glicko-2 deviation of two players at which stakes start shrinking
+    reference_rd: float = 150.0
 
 @dataclass
 class AppConfig:
     """Main application configuration"""
     data_dir: str = "Données"
+    match_store_dir: str = "match_store"
+    ingest_workers: int = None
+    replay_workers: int = None
     elo_file: str = "elo_probs.csv"
-    cache_file: str = "api_cache.json"
+    elo_checkpoint_file: str = "elo_checkpoint.npz"
+    rating_cache_dir: str = "rating_cache"
+    # Bootstrap replicas of the rating ensemble behind bet confidence
+    rating_ensemble_replicas: int = 100
+    tournament_registry_file: str = "tournament_registry.json"
+    player_registry_file: str = "player_registry.json"
+    # Odds cache of APIService; get_pinnacle_matches.py keeps its own api_cache.json
+    cache_file: str = "odds_cache.json"
+    rate_limit_file: str = "api_rate_limit.json"
+    # Every polled money-line price, one compressed partition per day
+    odds_history_dir: str = "odds_history"
+    odds_history_retention_days: int = 90
     log_level: str = "INFO"
     
     # Component configs
     api: APIConfig = None
     elo: EloConfig = None
+    glicko: GlickoConfig = None
     betting: BettingConfig = None
     
     def __post_init__(self):
@@ -55,11 +106,31 @@ class AppConfig:
                 pinnacle_api_key=os.getenv("PINNACLE_API_KEY", ""),
                 pinnacle_host=os.getenv("PINNACLE_HOST", "pinnacle-odds.p.rapidapi.com"),
                 cache_duration_minutes=int(os.getenv("CACHE_DURATION", "5")),
-                request_timeout=int(os.getenv("REQUEST_TIMEOUT", "30"))
+                max_stale_minutes=int(os.getenv("MAX_STALE_MINUTES", "30")),
+                request_timeout=int(os.getenv("REQUEST_TIMEOUT", "30")),
+                base_url=os.getenv("PINNACLE_BASE_URL") or None,
+                requests_per_hour=float(os.getenv("API_REQUESTS_PER_HOUR", "100")),
+                request_burst=int(os.getenv("API_REQUEST_BURST", "5"))
             )
         
+        if self.ingest_workers is None:
+            self.ingest_workers = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+        
+        if self.replay_workers is None:
+            self.replay_workers = int(os.getenv("REPLAY_WORKERS", "1"))
+        
         if self.elo is None:
-            self.elo = EloConfig()
+            self.elo = EloConfig(
+                k_factor=int(os.getenv("ELO_K_FACTOR", "32")),
+                k_multipliers=tuple(float(m) for m in os.getenv("ELO_K_MULTIPLIERS", "1.5,1.2,0.8,0.9").split(",")),
+                overall_weights=tuple(float(w) for w in os.getenv("ELO_OVERALL_WEIGHTS", "0.5,0.3,0.2").split(","))
+            )
+        
+        if self.glicko is None:
+            self.glicko = GlickoConfig(
+                tau=float(os.getenv("GLICKO_TAU", "0.5")),
+                period_days=int(os.getenv("GLICKO_PERIOD_DAYS", "7"))
+            )
             
         if self.betting is None:
             self.betting = BettingConfig(
@@ -1,32 +1,27 @@
 # get_pinnacle_matches.py
 
-import requests
 import pandas as pd
 import os
 import json
 from datetime import datetime, timedelta
 
-# 🔧 Clés API Pinnacle - SECURED
-import os
-PINNACLE_HEADERS = {
-    "X-RapidAPI-Key": os.getenv("PINNACLE_API_KEY", "YOUR_API_KEY_HERE"),
-    "X-RapidAPI-Host": "pinnacle-odds.p.rapidapi.com"
-}
+from services.circuit_breaker import CircuitOpen
+from services.odds_history import get_odds_history
+from services.pinnacle_client import TENNIS_SPORT_ID, get_pinnacle_client
+from services.player_registry import get_player_registry
+from services.rate_limiter import RateLimitExceeded
+from services.tournament_registry import get_tournament_registry, start_month
 
+# Cache de ce script uniquement : APIService garde le sien dans config.cache_file
 CACHE_FILE = "api_cache.json"
 CACHE_DURATION = 1  # minutes
 
-# ✅ Convertit un nom complet ("Carlos Alcaraz") en "Alcaraz C."
+# ✅ Convertit un nom complet ("Carlos Alcaraz") en "Alcaraz C." via le registre des joueurs
 def normalize_name_excel_format(full_name: str) -> str:
-    parts = full_name.strip().split()
-    if len(parts) < 2:
-        return full_name
-    first = parts[0]
-    last = " ".join(parts[1:])
-    return f"{last} {first[0]}."
-
-def load_cache():
-    """Charge le cache s'il existe et est récent"""
+    return get_player_registry().canonical_name(full_name)
+
+def load_cache(max_age=CACHE_DURATION):
+    """Charge le cache s'il existe et a moins de max_age minutes (None : quel que soit son âge)"""
     if not os.path.exists(CACHE_FILE):
         return None
     
@@ -35,8 +30,9 @@ def load_cache():
             cache = json.load(f)
         
         cache_time = datetime.fromisoformat(cache['timestamp'])
-        if datetime.now() - cache_time < timedelta(minutes=CACHE_DURATION):
-            print(f"📦 Utilisation cache ({CACHE_DURATION}min)")
+        if max_age is None or datetime.now() - cache_time < timedelta(minutes=max_age):
+            if max_age is not None:
+                print(f"📦 Utilisation cache ({max_age}min)")
             return cache['data']
     except:
         pass
@@ -49,8 +45,19 @@ def save_cache(data):
         'timestamp': datetime.now().isoformat(),
         'data': data
     }
-    with open(CACHE_FILE, 'w') as f:
+    # Écriture atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    tmp_file = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as f:
         json.dump(cache, f)
+    os.replace(tmp_file, CACHE_FILE)
+
+def load_stale_matches():
+    """Matchs du dernier cache quel que soit son âge, sans ceux déjà commencés"""
+    df = pd.DataFrame(load_cache(max_age=None) or [])
+    if "starts" in df:
+        started = pd.to_datetime(df["starts"], errors='coerce', utc=True) <= pd.Timestamp.now(tz="UTC")
+        df = df[~started].reset_index(drop=True)
+    return df
 
 # 📥 Récupère les matchs ATP à venir depuis l'API Pinnacle
 def fetch_tennis_matches():
@@ -59,40 +66,44 @@ def fetch_tennis_matches():
     if cached_data is not None:
         return pd.DataFrame(cached_data)
     
-    # Sinon appel API
-    url = "https://pinnacle-odds.p.rapidapi.com/kit/v1/markets"
-    params = {"sport_id": 2}  # Tennis uniquement
-    
+    # Sinon appel API (clé PINNACLE_API_KEY), sur le pool de connexions partagé.
+    # wait=0 : si le quota ou le disjoncteur bloque l'appel, on n'attend pas
+    print("📡 Appel API Pinnacle...")
     try:
-        print("📡 Appel API Pinnacle...")
-        response = requests.get(url, headers=PINNACLE_HEADERS, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erreur API : {e}")
-        return pd.DataFrame()
+        data = get_pinnacle_client().request("markets", {"sport_id": TENNIS_SPORT_ID}, wait=0)  # Tennis uniquement
+    except (RateLimitExceeded, CircuitOpen) as e:
+        print(f"⚠️ API indisponible ({e}), utilisation du dernier cache")
+        return load_stale_matches()
+    if data is None:
+        print("❌ Erreur API : toutes les tentatives ont échoué")
+        return load_stale_matches()
 
     matches = []
 
     # ✅ Structure correcte : events (pas data)
     events = data.get("events", [])
     print(f"🔍 {len(events)} événements trouvés")
+    
+    # Historique des cotes : seules les cotes qui ont bougé sont ajoutées
+    try:
+        get_odds_history().append(events)
+    except Exception as e:
+        print(f"⚠️ Historique des cotes non enregistré : {e}")
 
+    registry = get_tournament_registry()
     for event in events:
-        league = event.get("league_name", "").lower()
-        
-        # Filtrage ATP SEULEMENT (exclut WTA)
-        if not ("atp" in league):
-            continue
-        # Exclut Challenger, ITF et doubles
-        if any(x in league for x in ["challenger", "125", "double", "itf"]):
+        tournament = event.get("league_name", "")
+        start_time = event.get("starts", None)
+
+        # Tournoi résolu comme dans APIService : ATP simple seulement (exclut WTA,
+        # Challenger, ITF et doubles), surface du tournoi, sinon du mois du match
+        info = registry.lookup(tournament, start_month(start_time))
+        if not info.is_atp:
             continue
+        surface = info.surface
 
         player1 = event.get("home", "")
         player2 = event.get("away", "")
-        tournament = event.get("league_name", "")
-        surface = "Hard"  # par défaut
-        start_time = event.get("starts", None)
 
         # ✅ STRUCTURE PINNACLE SPÉCIFIQUE
         periods = event.get("periods", {})
@@ -123,6 +134,7 @@ def fetch_tennis_matches():
         })
 
     print(f"🎾 {len(matches)} matchs ATP récupérés")
+    get_player_registry().save()
     
     # Sauvegarder en cache
     if matches:
@@ -1,18 +1,56 @@
 # model.py
 
+import os
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
 import pandas as pd
 
+from config.settings import config
+from services.elo_engine import SURFACE_CODES, RatingState
+from services.rating_cache import get_shared_ratings
+
+# Mapping surface vers colonne du CSV
+SURFACE_COLUMNS = {
+    "Hard": "elo_hard",
+    "Clay": "elo_clay",
+    "Grass": "elo_grass"
+}
+
 class EloModel:
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, state: Optional[RatingState] = None):
         try:
-            self.df = pd.read_csv(filepath)
-            self.df['player'] = self.df['player'].apply(self.normalize_name)
-            print(f"✅ {len(self.df)} joueurs chargés depuis {filepath}")
+            self.state, self.overall = self._load(filepath, state)
+            self._build_index()
+            print(f"✅ {len(self.state)} joueurs chargés depuis {filepath}")
         except FileNotFoundError:
             raise FileNotFoundError(f"❌ Fichier {filepath} introuvable")
         except Exception as e:
             raise Exception(f"❌ Erreur lecture CSV : {e}")
 
+    @staticmethod
+    def _load(filepath: str, state: Optional[RatingState]) -> Tuple[RatingState, np.ndarray]:
+        """Ratings and overall Elo, viewed in the published segment when given, read from the CSV otherwise"""
+        if state is not None:
+            return state, state.overall
+        df = pd.read_csv(filepath)
+        if "elo" not in df.columns and not set(SURFACE_COLUMNS.values()) <= set(df.columns):
+            raise ValueError(f"❌ Colonnes Elo manquantes dans le CSV")
+        # Une colonne de surface absente prend l'Elo global, comme avant
+        overall = df["elo"] if "elo" in df.columns else None
+        ratings = np.column_stack([
+            df[col] if col in df.columns else overall for col in SURFACE_COLUMNS.values()
+        ]).astype(np.float64)
+        matches = df["matches_played"] if "matches_played" in df.columns else np.zeros(len(df))
+        state = RatingState(names=df["player"].tolist(), ratings=ratings, matches=np.asarray(matches, dtype=np.int64))
+        return state, (overall.to_numpy(dtype=np.float64) if overall is not None else state.overall)
+
+    def _build_index(self):
+        """Row of each normalised name (first one wins, like the old mask)"""
+        self.index: Dict[str, int] = {}
+        for row, name in enumerate(self.state.names):
+            self.index.setdefault(self.normalize_name(name), row)
+
     def normalize_name(self, name: str) -> str:
         if pd.isna(name):
             return ""
@@ -21,29 +59,35 @@ class EloModel:
             return name
         return f"{parts[0][0]}. {' '.join(parts[1:])}"
 
+    def _column(self, surface: str) -> np.ndarray:
+        code = SURFACE_CODES.get(surface)
+        # Vue sur la colonne du segment partagé, sans copie
+        return self.state.ratings[:, code] if code is not None else self.overall
+
     def get_elo(self, player: str, surface: str) -> float:
         player_norm = self.normalize_name(player)
-        row = self.df[self.df['player'] == player_norm]
+        row = self.index.get(player_norm)
 
-        if row.empty:
+        if row is None:
             print(f"❌ Joueur non trouvé : '{player_norm}'")
             return None
 
-        # Mapping surface vers colonne
-        surface_map = {
-            "Hard": "elo_hard",
-            "Clay": "elo_clay", 
-            "Grass": "elo_grass"
-        }
-        
-        col = surface_map.get(surface, "elo")
-        
-        if col in self.df.columns:
-            return float(row[col].values[0])
-        elif "elo" in self.df.columns:
-            return float(row["elo"].values[0])
-        else:
-            raise ValueError(f"❌ Colonnes Elo manquantes dans le CSV")
+        return float(self._column(surface)[row])
+
+    def get_elos(self, players: Sequence[str], surfaces: Union[str, Sequence[str]]) -> np.ndarray:
+        """Elo de plusieurs joueurs en une fois, NaN pour les joueurs inconnus
+
+        `surfaces` : une surface pour tous les joueurs ou une par joueur.
+        """
+        rows = np.array([self.index.get(self.normalize_name(player), -1) for player in players], dtype=np.int64)
+        if isinstance(surfaces, str):
+            surfaces = [surfaces] * len(rows)
+        surfaces = np.asarray(surfaces, dtype=object)
+        elos = np.full(len(rows), np.nan)
+        for surface in set(surfaces.tolist()):
+            selected = (surfaces == surface) & (rows >= 0)
+            elos[selected] = self._column(surface)[rows[selected]]
+        return elos
 
     def get_probability(self, player1: str, player2: str, surface: str) -> float:
         elo1 = self.get_elo(player1, surface)
@@ -56,11 +100,45 @@ class EloModel:
         prob = 1 / (1 + 10 ** (-diff / 400))
         return prob
 
+    def get_probabilities(self, pairs: Sequence[Tuple[str, str]],
+                          surfaces: Union[str, Sequence[str]]) -> np.ndarray:
+        """Probabilité de victoire du premier joueur de chaque paire, NaN si un Elo manque"""
+        if not isinstance(surfaces, str):
+            surfaces = [surface for surface in surfaces for _ in range(2)]
+        elos = self.get_elos([player for pair in pairs for player in pair], surfaces)
+        return 1 / (1 + 10 ** ((elos[1::2] - elos[0::2]) / 400))
+
+# Modèles chargés, par fichier, avec la génération ou l'état du fichier au chargement
+_models: Dict[str, Tuple[Tuple, EloModel]] = {}
+
+def get_elo_model(filepath: str) -> EloModel:
+    """EloModel partagé par tout le processus
+
+    Pour elo_probs.csv, c'est une vue sur les notes de la génération publiée
+    du cache partagé, recréée seulement quand une nouvelle génération est
+    publiée. Sans cache publié, le CSV est lu et relu seulement s'il a changé.
+    """
+    cache = get_shared_ratings().get() if filepath == config.elo_file else None
+    if cache is not None and cache.csv_state is not None:
+        stamp = ("generation", cache.generation, cache.fingerprint)
+    else:
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"❌ Fichier {filepath} introuvable")
+        stamp = ("file", stat.st_mtime_ns, stat.st_size)
+    cached = _models.get(filepath)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    model = EloModel(filepath, cache.csv_state if stamp[0] == "generation" else None)
+    _models[filepath] = (stamp, model)
+    return model
+
 # Test
 if __name__ == "__main__":
     try:
         model = EloModel("elo_probs.csv")
-        print(model.df.columns.tolist())
-        print(model.df.head())
+        print(model.state.names[:5])
+        print(model.state.ratings[:5])
     except Exception as e:
         print(f"Erreur : {e}")
@@ -3,6 +3,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import shutil
 import logging
 from pathlib import Path
 import time
@@ -11,7 +12,12 @@ import time
 from services.betting_service import BettingService
 from services.analytics_service import AnalyticsService
 from services.elo_service import EloService
+from services.rating_cache import get_shared_ratings
+from services.tournament_registry import get_tournament_registry
 from services.api_service import APIService
+from get_pinnacle_matches import CACHE_FILE as LEGACY_CACHE_FILE
+from services.event_store import get_event_store
+from services.rate_limiter import get_rate_limiter
 from ui.components import UIComponents
 from config.settings import config, logger
 
@@ -140,6 +146,25 @@ def show_security_status():
     else:
         st.sidebar.warning("⚠️ Check Environment")
 
+def show_rating_snapshot(elo_service: EloService):
+    """Display the version and age of the ratings being served in sidebar"""
+    status = elo_service.snapshot_status()
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("📈 Elo Ratings")
+    
+    if status["version"] == 0:
+        st.sidebar.info("No ratings loaded yet")
+        return
+    
+    age = status["age"]
+    age_text = f"{age.days}d {age.seconds // 3600}h" if age.days else f"{age.seconds // 3600}h {age.seconds // 60 % 60}m"
+    st.sidebar.write(f"Snapshot v{status['version']} (cache generation {status['generation']}), "
+                     f"{status['players']} players, computed {age_text} ago")
+    if status["rebuilding"]:
+        st.sidebar.warning("🔄 Update running, serving the previous ratings")
+    elif status["stale"]:
+        st.sidebar.warning("⚠️ Ratings are stale")
+
 def main():
     """Main application function"""
     load_custom_css()
@@ -162,6 +187,7 @@ def main():
     
     # Show security status
     show_security_status()
+    show_rating_snapshot(betting_service.elo_service)
     
     # Update config with user settings
     config.betting.bankroll = controls["bankroll"]
@@ -360,6 +386,51 @@ def main():
         
         # Performance charts would go here
         st.info("Historical performance tracking will be enhanced with actual betting results.")
+        
+        # Leaderboard from the snapshot's ranked index
+        st.subheader("🏆 Surface Leaderboard")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            leaderboard_surface = st.selectbox("Surface", ["Overall", "Hard", "Clay", "Grass"],
+                                               key="leaderboard_surface")
+        with col2:
+            active_months = st.number_input("Played within (months, 0 = all)", min_value=0,
+                                            max_value=120, value=12, key="leaderboard_active")
+        with col3:
+            leaderboard_size = st.slider("Players", 10, 100, 25, key="leaderboard_size")
+        top_players = betting_service.elo_service.get_top_players(
+            leaderboard_surface, leaderboard_size, active_months or None
+        )
+        if top_players:
+            st.dataframe(pd.DataFrame([
+                {"Rank": rank, "Player": player.player_name,
+                 "Elo": round(player.get_surface_elo(leaderboard_surface)),
+                 "Matches": player.matches_played}
+                for rank, player in enumerate(top_players, 1)
+            ]), hide_index=True, use_container_width=True)
+            with st.expander("Head-to-head win probabilities (top 10)"):
+                field = [player.player_name for player in top_players[:10]]
+                matrix = betting_service.elo_service.get_field_probabilities(field, leaderboard_surface)
+                st.dataframe(matrix.style.format("{:.0%}", na_rep="–"), use_container_width=True)
+        else:
+            st.info("No ratings available yet.")
+        
+        # Point-in-time Elo history
+        st.subheader("🎾 Player Elo Trajectory")
+        player_name = st.text_input("Player name (e.g. Sinner J.)", key="trajectory_player")
+        if player_name:
+            standing = betting_service.elo_service.get_player_rank(
+                player_name, leaderboard_surface, active_months or None
+            )
+            if standing is not None:
+                st.write(f"{leaderboard_surface} rank: #{standing['rank']} of {standing['field_size']} "
+                         f"(top {100 - standing['percentile']:.1f}%)")
+            trajectory = betting_service.elo_service.get_player_trajectory(player_name)
+            if trajectory.empty:
+                st.warning(f"No rating history found for {player_name}")
+            else:
+                fig = UIComponents.create_rating_trajectory_chart(trajectory, player_name)
+                st.plotly_chart(fig, use_container_width=True)
     
     with tab4:
         st.header("🔧 System Status")
@@ -384,6 +455,18 @@ def main():
             # Check data directory
             data_files = len([f for f in os.listdir(config.data_dir) if f.endswith(('.xls', '.xlsx'))])
             st.write(f"Historical data files: {data_files}")
+            
+            shared = get_shared_ratings().get()
+            if shared is not None:
+                st.write(f"Shared ratings: generation {shared.generation}, "
+                         f"{len(shared.state)} players, published {shared.timestamp:%Y-%m-%d %H:%M}")
+            else:
+                st.write("Shared ratings: ❌ not published yet")
+            
+            registry_stats = get_tournament_registry().stats()
+            st.write(f"Tournament registry: {registry_stats['names']} names, "
+                     f"{registry_stats['cache_hits']} cache hits / {registry_stats['cache_misses']} misses, "
+                     f"{registry_stats['fallbacks']} resolved by keyword rules")
         
         with col2:
             st.subheader("🌐 API Status")
@@ -399,6 +482,14 @@ def main():
                     for surface, count in surface_counts.items():
                         st.write(f"  {surface}: {count} matches")
                 
+                limiter = get_rate_limiter()
+                st.write(f"API requests available: {limiter.available():.1f} / {limiter.capacity:.0f}")
+                
+                cache_stats = api_service.cache_stats()
+                st.write(f"Odds cache: {cache_stats['hits']} hits, {cache_stats['stale']} stale, "
+                         f"{cache_stats['misses']} misses, {cache_stats['refresh_failures']} failed refreshes; "
+                         f"circuit breaker {cache_stats['breaker']}")
+                
             except Exception as e:
                 st.write(f"API Connection: ❌ ({str(e)})")
         
@@ -409,13 +500,11 @@ def main():
         
         with col1:
             if st.button("🔄 Rebuild Elo Ratings"):
-                with st.spinner("Rebuilding Elo ratings..."):
-                    elo_service = EloService()
-                    success = elo_service.process_historical_data(force_rebuild=True)
-                    if success:
-                        st.success("Elo ratings rebuilt successfully!")
-                    else:
-                        st.error("Failed to rebuild Elo ratings.")
+                # Current ratings keep being served until the rebuilt snapshot is swapped in
+                if betting_service.elo_service.refresh_in_background(force_rebuild=True):
+                    st.success("Elo rebuild started in the background")
+                else:
+                    st.info("An Elo update is already running")
         
         with col2:
             if st.button("🗑️ Clear Cache"):
@@ -424,10 +513,11 @@ def main():
                 st.cache_resource.clear()
                 
                 # Clear application caches
-                cache_files = ["api_cache.json", "elo_cache.pkl"]
-                for cache_file in cache_files:
+                for cache_file in (config.cache_file, LEGACY_CACHE_FILE):
                     if os.path.exists(cache_file):
                         os.remove(cache_file)
+                get_event_store().clear()
+                shutil.rmtree(config.rating_cache_dir, ignore_errors=True)
                 
                 st.success("All caches cleared!")
         
@@ -527,7 +617,7 @@ def main():
                 "Risk": ["High", "Medium", "Low"]
             }
             st.dataframe(pd.DataFrame(percentage_data))
-
+    
     # Auto-refresh functionality
     if controls.get("auto_refresh", False):
         time.sleep(300)  # 5 minutes
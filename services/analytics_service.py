@@ -9,6 +9,7 @@ from pathlib import Path
 
 from models.player import ValueBet, Match
 from config.settings import config
+from services.player_registry import get_player_registry
 
 logger = logging.getLogger(__name__)
 
@@ -73,28 +74,36 @@ class AnalyticsService:
             # Find corresponding result
             for result in results:
                 if self._is_same_match(bet, result):
+                    predicted_winner = bet["match"].split(" vs ")[0]
+                    won = self._player_key(predicted_winner) == self._player_key(result["winner"])
                     matched_bet = {
                         "match": bet["match"],
                         "surface": bet.get("surface", "Hard"),
                         "value": bet["value"],
                         "odds": bet["odds"],
                         "stake": bet["recommended_stake"],
-                        "predicted_winner": bet["match"].split(" vs ")[0],
+                        "predicted_winner": predicted_winner,
                         "actual_winner": result["winner"],
-                        "won": bet["match"].split(" vs ")[0] == result["winner"],
-                        "return": bet["recommended_stake"] * bet["odds"] if bet["match"].split(" vs ")[0] == result["winner"] else 0
+                        "won": won,
+                        "return": bet["recommended_stake"] * bet["odds"] if won else 0
                     }
                     matched.append(matched_bet)
                     break
         
         return matched
     
+    @staticmethod
+    def _player_key(name: str):
+        """Registry id of a player, or the raw name when it cannot be resolved"""
+        player_id = get_player_registry().lookup(name) if name else None
+        return name if player_id is None else player_id
+    
     def _is_same_match(self, bet: Dict, result: Dict) -> bool:
         """Check if bet and result refer to the same match"""
-        bet_players = set(bet["match"].split(" vs "))
-        result_players = {result.get("player1", ""), result.get("player2", "")}
+        bet_players = {self._player_key(name) for name in bet["match"].split(" vs ")}
+        result_players = {self._player_key(result.get("player1", "")), self._player_key(result.get("player2", ""))}
         
-        # Simple name matching (could be enhanced)
+        # Names written differently by the API and the results resolve to the same id
         return len(bet_players.intersection(result_players)) >= 1
     
     def _group_by_value_ranges(self, bets: List[Dict]) -> Dict:
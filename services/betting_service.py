@@ -8,17 +8,33 @@ import json
 from pathlib import Path
 
 from models.player import Match, ValueBet
+from services.elo_engine import expected_scores
 from services.elo_service import EloService
+from services.glicko_service import GlickoService
 from services.api_service import APIService
+from services.player_registry import get_player_registry
+from services.tournament_registry import get_tournament_registry, start_month
 from config.settings import config
 
 logger = logging.getLogger(__name__)
 
+# Confidence bonus by tournament tier
+TIER_CONFIDENCE = {
+    "Grand Slam": 0.2,
+    "Masters 1000": 0.15,
+    "ATP 500": 0.1
+}
+
+# Confidence bonus by percentile of the backed player among active players on the surface
+RANK_CONFIDENCE = [(90.0, 0.1), (75.0, 0.05)]
+RANK_ACTIVE_MONTHS = 12
+
 class BettingService:
     """Advanced betting service with Kelly criterion and risk management"""
     
     def __init__(self):
         self.elo_service = EloService()
+        self.glicko_service = GlickoService(self.elo_service)
         self.api_service = APIService()
         self.bet_history_file = Path("bet_history.json")
         self.performance_file = Path("performance_metrics.json")
@@ -45,38 +61,64 @@ class BettingService:
         
         return bankroll * kelly_percentage
     
+    def deviation_stake_factor(self, deviation: Optional[float]) -> float:
+        """Share of the stake kept for a matchup whose ratings are this uncertain"""
+        if deviation is None:
+            return 1.0
+        return min(1.0, config.betting.reference_rd / deviation)
+    
     def calculate_value(self, elo_prob: float, market_prob: float) -> float:
         """Calculate betting value (edge over market)"""
         return elo_prob - market_prob
     
-    def calculate_confidence_score(self, match: Match, elo1: float, elo2: float) -> float:
-        """Calculate confidence score for a bet based on various factors"""
-        base_score = 0.5
+    def calculate_confidence_score(self, match: Match, elo1: float, elo2: float,
+                                   snapshot=None, deviation: Optional[float] = None,
+                                   edge_probability: Optional[float] = None) -> float:
+        """Calculate confidence score for a bet based on various factors
         
-        # Factor 1: Elo difference (higher difference = more confidence)
-        elo_diff = abs(elo1 - elo2)
-        if elo_diff > 200:
-            base_score += 0.3
-        elif elo_diff > 100:
-            base_score += 0.2
-        elif elo_diff > 50:
-            base_score += 0.1
+        With `edge_probability`, the share of bootstrap rating replicas in
+        which the bet still has value, the score starts from that measured
+        uncertainty instead of the Elo-gap and tournament heuristics.
+        """
+        if edge_probability is not None:
+            base_score = edge_probability
+        else:
+            base_score = 0.5
+            
+            # Factor 1: Elo difference (higher difference = more confidence)
+            elo_diff = abs(elo1 - elo2)
+            if elo_diff > 200:
+                base_score += 0.3
+            elif elo_diff > 100:
+                base_score += 0.2
+            elif elo_diff > 50:
+                base_score += 0.1
+            
+            # Factor 2: Surface specialization
+            surface_bonus = 0.1 if match.surface in ["Clay", "Grass"] else 0.05
+            base_score += surface_bonus
+            
+            # Factor 3: Tournament level (major tournaments = higher confidence)
+            tier = get_tournament_registry().lookup(match.tournament, start_month(match.start_time)).tier
+            base_score += TIER_CONFIDENCE.get(tier, 0.0)
         
-        # Factor 2: Surface specialization
-        surface_bonus = 0.1 if match.surface in ["Clay", "Grass"] else 0.05
-        base_score += surface_bonus
+        # Factor 4: Standing of the backed player among active players on the surface
+        standing = self.elo_service.get_player_rank(
+            match.player1, match.surface, RANK_ACTIVE_MONTHS, snapshot=snapshot
+        )
+        if standing is not None:
+            base_score += next((bonus for percentile, bonus in RANK_CONFIDENCE
+                                if standing["percentile"] >= percentile), 0.0)
         
-        # Factor 3: Tournament level (major tournaments = higher confidence)
-        tournament_lower = match.tournament.lower()
-        if any(major in tournament_lower for major in 
-               ["wimbledon", "us open", "australian open", "french open", "roland garros"]):
-            base_score += 0.2
-        elif "masters" in tournament_lower or "1000" in tournament_lower:
-            base_score += 0.15
-        elif "500" in tournament_lower:
-            base_score += 0.1
+        # Factor 5: Rating uncertainty (combined Glicko-2 deviation of both players)
+        if deviation is not None:
+            reference_rd = config.betting.reference_rd
+            if deviation > 2 * reference_rd:
+                base_score -= 0.15
+            elif deviation > reference_rd:
+                base_score -= 0.05
         
-        return min(1.0, base_score)
+        return max(0.0, min(1.0, base_score))
     
     def remove_bookmaker_margin(self, odds1: float, odds2: float) -> Tuple[float, float]:
         """Remove bookmaker margin and get true probabilities"""
@@ -94,8 +136,8 @@ class BettingService:
         """Analyze current matches for value betting opportunities"""
         logger.info("Starting match analysis for value bets...")
         
-        # Ensure Elo ratings are calculated
-        if not self.elo_service.process_historical_data():
+        # Ensure Elo ratings are available; a stale snapshot is served while an update runs
+        if not self.elo_service.ensure_ratings():
             logger.error("Failed to process Elo data")
             return []
         
@@ -105,26 +147,39 @@ class BettingService:
             logger.warning("No matches found from API")
             return []
         
+        # Resolve every player name in one pass before scoring the matches
+        self.elo_service.resolve_players([name for match in matches for name in (match.player1, match.player2)])
+        
+        # Every match is scored on the same snapshot, even if an update swaps one in
+        snapshot = self.elo_service.snapshot
+        # Glicko-2 deviations only adjust confidence and stakes, so bets are still found without them
+        has_deviations = self.glicko_service.ensure_ratings(snapshot)
+        pairs = [(match.player1, match.player2) for match in matches]
+        surfaces = [match.surface for match in matches]
+        elos1, elos2 = self.elo_service.get_match_elos(pairs, surfaces, snapshot)
+        probabilities = expected_scores(elos1, elos2)
+        
+        # Probabilities of every match in every bootstrap replica of the same snapshot, for
+        # confidence; None until the background refresh built them, leaving the heuristic factors
+        replica_probabilities = self.elo_service.get_ensemble_probabilities(pairs, surfaces, snapshot)
+        if replica_probabilities is None:
+            logger.info("Rating ensemble not built yet, using heuristic confidence")
         value_bets = []
         analyzed_count = 0
         matched_count = 0
         
-        for match in matches:
+        for i, (match, elo1, elo2, elo_prob) in enumerate(zip(matches, elos1.tolist(), elos2.tolist(),
+                                                              probabilities.tolist())):
             try:
                 analyzed_count += 1
                 
-                # Get Elo ratings
-                elo1 = self.elo_service.get_player_elo(match.player1, match.surface)
-                elo2 = self.elo_service.get_player_elo(match.player2, match.surface)
-                
-                if elo1 is None or elo2 is None:
+                if np.isnan(elo_prob):
                     logger.debug(f"Missing Elo for: {match.player1} vs {match.player2}")
                     continue
                 
                 matched_count += 1
                 
                 # Calculate probabilities
-                elo_prob = self.elo_service.calculate_expected_score(elo1, elo2)
                 market_prob, _ = self.remove_bookmaker_margin(match.odds1, match.odds2)
                 
                 # Calculate value
@@ -136,14 +191,21 @@ class BettingService:
                         elo_prob, match.odds1, config.betting.bankroll
                     )
                     
-                    # Calculate recommended stake (conservative approach)
+                    # Calculate recommended stake (conservative approach), smaller on uncertain ratings
+                    deviation = (self.glicko_service.get_match_deviation(match.player1, match.player2,
+                                                                         match.surface, snapshot)
+                                 if has_deviations else None)
                     recommended_stake = min(
                         kelly_size,
                         config.betting.bankroll * config.betting.max_bet_percentage
-                    )
+                    ) * self.deviation_stake_factor(deviation)
                     
                     # Calculate confidence score
-                    confidence = self.calculate_confidence_score(match, elo1, elo2)
+                    edge_probability = None
+                    if replica_probabilities is not None and not np.isnan(replica_probabilities[0, i]):
+                        edge_probability = float(np.mean(replica_probabilities[:, i] > market_prob))
+                    confidence = self.calculate_confidence_score(match, elo1, elo2, snapshot, deviation,
+                                                                 edge_probability)
                     
                     value_bet = ValueBet(
                         match=match,
@@ -230,12 +292,14 @@ class BettingService:
     def save_bet_analysis(self, value_bets: List[ValueBet]):
         """Save current bet analysis to history"""
         try:
+            registry = get_player_registry()
             analysis_data = {
                 "timestamp": datetime.now().isoformat(),
                 "bet_count": len(value_bets),
                 "bets": [
                     {
                         "match": f"{bet.match.player1} vs {bet.match.player2}",
+                        "player_ids": [registry.resolve(bet.match.player1), registry.resolve(bet.match.player2)],
                         "tournament": bet.match.tournament,
                         "surface": bet.match.surface,
                         "odds": bet.match.odds1,
@@ -0,0 +1,68 @@
+# services/circuit_breaker.py
+from typing import Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """The API is failing and calls are held back until the breaker's cool-down ends"""
+
+class CircuitBreaker:
+    """Stops calling a failing API for a while instead of retrying it on every request
+    
+    After `failure_threshold` consecutive failed calls the breaker opens
+    and allow() refuses calls for `reset_timeout` seconds. Then a single
+    trial call is let through (half-open): its success closes the breaker,
+    its failure opens it for another cool-down.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the trial call when half-open"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("API recovered, closing the circuit breaker")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"{self.failures} consecutive API failures, "
+                                   f"holding calls back for {self.reset_timeout:.0f} s")
+                self.opened_at = time.monotonic()
+    
+    def release(self):
+        """Give back a claimed trial call that never reached the API"""
+        with self._lock:
+            self._trial = False
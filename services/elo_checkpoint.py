@@ -0,0 +1,146 @@
+# services/elo_checkpoint.py
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.settings import EloConfig
+from services.elo_engine import EncodedMatches, RatingState
+from services.glicko_engine import GlickoState
+from services.rating_ensemble import RatingEnsemble
+from services.rating_history import RatingHistory
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the replay semantics or the checkpoint layout change
+CHECKPOINT_VERSION = 6
+
+KEY_COLUMNS = ['Date', 'ATP', 'Tournament', 'Round', 'Winner', 'Loser']
+
+def params_fingerprint(elo_config: EloConfig, alias_revision: int = 0) -> str:
+    """Fingerprint of the Elo parameters and player-registry revision a state was computed with"""
+    payload = json.dumps({"version": CHECKPOINT_VERSION, "elo": asdict(elo_config),
+                          "aliases": alias_revision}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def history_fingerprint(entries: Dict[str, Dict], current_file: str) -> str:
+    """Fingerprint of every stored workbook except the current-year one"""
+    digest = hashlib.sha256()
+    for file_name in sorted(entries):
+        if file_name != current_file:
+            digest.update(f"{file_name}:{entries[file_name]['sha256']};".encode())
+    return digest.hexdigest()
+
+def state_arrays(state: RatingState, prefix: str = "") -> Dict[str, np.ndarray]:
+    return {
+        f"{prefix}names": np.asarray(state.names, dtype=str),
+        f"{prefix}ratings": state.ratings,
+        f"{prefix}matches": state.matches,
+        f"{prefix}weights": np.asarray(state.weights, dtype=np.float64)
+    }
+
+def state_from_arrays(data, prefix: str = "") -> RatingState:
+    return RatingState(
+        names=data[f"{prefix}names"].tolist(),
+        ratings=data[f"{prefix}ratings"],
+        matches=data[f"{prefix}matches"],
+        weights=tuple(data[f"{prefix}weights"].tolist())
+    )
+
+def match_keys(matches: pd.DataFrame) -> np.ndarray:
+    """Content hash of each match, independent of its row position in the workbook"""
+    return pd.util.hash_pandas_object(matches[KEY_COLUMNS], index=False).to_numpy().view(np.int64)
+
+@dataclass
+class EloCheckpoint:
+    """Rating states and history plus the high-water mark of the matches they include
+    
+    The bootstrap ensemble is kept resumable, so an update replays only the
+    new matches through its replicas. Glicko-2 is kept as the state before
+    the last rating period plus that period's matches, which an update
+    rates again with the new ones. `derived` fingerprints the ensemble and
+    Glicko-2 settings they were built with.
+    """
+    state: RatingState
+    csv_state: RatingState
+    rating_history: RatingHistory
+    params: str
+    history: str
+    current_file: str
+    current_sha256: str
+    current_keys: np.ndarray
+    hwm_date: np.datetime64
+    hwm_key: int
+    ensemble: Optional[RatingEnsemble] = None
+    glicko_base: Optional[GlickoState] = None
+    glicko_open: Optional[EncodedMatches] = None
+    derived: str = ""
+    
+    @property
+    def resumable(self) -> bool:
+        """Whether the ensemble and Glicko-2 state can be continued from here"""
+        return (self.ensemble is not None and self.ensemble.resumable
+                and self.glicko_base is not None and self.glicko_open is not None)
+    
+    def save(self, path: str):
+        """Atomically write the checkpoint"""
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "params": self.params,
+            "history": self.history,
+            "current_file": self.current_file,
+            "current_sha256": self.current_sha256,
+            "hwm_key": int(self.hwm_key),
+            "derived": self.derived
+        }
+        derived = self.ensemble.to_arrays(resumable=True) if self.ensemble is not None else {}
+        if self.glicko_base is not None and self.glicko_open is not None:
+            derived.update(self.glicko_base.to_arrays(), **self.glicko_open.to_arrays(prefix="glicko_open_"))
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.array(json.dumps(meta)),
+            **state_arrays(self.state),
+            **state_arrays(self.csv_state, prefix="csv_"),
+            current_keys=self.current_keys,
+            hwm_date=np.asarray(self.hwm_date, dtype="datetime64[ns]"),
+            **self.rating_history.to_arrays(),
+            **derived
+        )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> Optional["EloCheckpoint"]:
+        """Load a checkpoint, or None if missing, unreadable or from another version"""
+        try:
+            if not os.path.exists(path):
+                return None
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != CHECKPOINT_VERSION:
+                    logger.info("Elo checkpoint version changed, ignoring it")
+                    return None
+                return cls(
+                    state=state_from_arrays(data),
+                    csv_state=state_from_arrays(data, prefix="csv_"),
+                    rating_history=RatingHistory.from_arrays(data),
+                    params=meta["params"],
+                    history=meta["history"],
+                    current_file=meta["current_file"],
+                    current_sha256=meta["current_sha256"],
+                    current_keys=data["current_keys"],
+                    hwm_date=data["hwm_date"][()],
+                    hwm_key=meta["hwm_key"],
+                    ensemble=RatingEnsemble.from_arrays(data),
+                    glicko_base=GlickoState.from_arrays(data),
+                    glicko_open=EncodedMatches.from_arrays(data, prefix="glicko_open_"),
+                    derived=meta.get("derived", "")
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load Elo checkpoint: {e}")
+            return None
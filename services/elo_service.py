@@ -1,57 +1,145 @@
 # services/elo_service.py
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-import os
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from dataclasses import asdict, replace
+from datetime import datetime
+import json
 import logging
-from glob import glob
-import pickle
+import threading
 
 from models.player import PlayerElo
 from config.settings import config
-from utils.name_normalization import NameNormalizer
-from utils.surface_detection import SurfaceDetector
+from services.elo_checkpoint import (EloCheckpoint, history_fingerprint, match_keys,
+                                     params_fingerprint)
+from services.elo_engine import (SURFACE_CODES, EloEngine, EncodedMatches, RatingState, elo_preset,
+                                 expected_scores, parity_report, surface_codes)
+from services.glicko_engine import GlickoEngine, GlickoState
+from services.match_store import MatchStore
+from services.player_registry import PlayerRegistry
+from services.rating_cache import RatingCache, cache_fingerprint, get_shared_ratings
+from services.rating_ensemble import RatingEnsemble
+from services.rating_history import RatingHistory
+from services.rating_snapshot import RatingSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Fixed resampling seed, so the same inputs always give the same ensemble
+ENSEMBLE_SEED = 0
+
 class EloService:
     """Enhanced Elo rating system with caching and advanced features"""
     
-    def __init__(self):
-        self.players: Dict[str, PlayerElo] = {}
+    def __init__(self, replay_workers: Optional[int] = None):
+        # replay_workers > 1 replays each surface in its own process
+        self.engine = EloEngine(workers=replay_workers)
+        self.csv_engine = EloEngine(elo_preset("legacy_csv"), workers=replay_workers)
+        self.glicko_engine = GlickoEngine()
+        # Readers take this reference once; updates swap in a new snapshot
+        self.snapshot: RatingSnapshot = RatingSnapshot.empty()
+        self.parity: Optional[pd.DataFrame] = None
         self.surface_histories: Dict[str, Dict[str, List[float]]] = {}
-        self.cache_file = "elo_cache.pkl"
-        self.last_update = None
+        self.shared = get_shared_ratings()
+        self._update_lock = threading.RLock()
+        self._background: Optional[threading.Thread] = None
         
+    @property
+    def state(self) -> RatingState:
+        return self.snapshot.state
+    
+    @property
+    def history(self) -> RatingHistory:
+        return self.snapshot.history
+    
+    @property
+    def csv_state(self) -> Optional[RatingState]:
+        return self.snapshot.csv_state
+    
+    @property
+    def last_update(self) -> Optional[datetime]:
+        return self.snapshot.timestamp
+    
+    @property
+    def generation(self) -> int:
+        return self.snapshot.generation
+    
+    @property
+    def players(self) -> Dict[str, PlayerElo]:
+        """PlayerElo view of the current snapshot, built on first access"""
+        return self.snapshot.players
+    
+    @property
+    def registry(self) -> PlayerRegistry:
+        """Player registry every name is resolved through"""
+        return self.engine.registry
+    
+    def _set_state(self, state: RatingState, timestamp: datetime,
+                   history: Optional[RatingHistory] = None, csv_state: Optional[RatingState] = None,
+                   generation: int = 0, stale: bool = False, ensemble: Optional[RatingEnsemble] = None,
+                   glicko: Optional[GlickoState] = None):
+        """Swap in a new snapshot; readers holding the previous one are unaffected"""
+        if self.engine.elo_config.normalize_names:
+            # Ratings loaded from a cache or checkpoint seed a registry that never saw them
+            self.registry.register_workbook_names(state.names, state.names)
+        self.snapshot = RatingSnapshot(
+            state=state,
+            history=history if history is not None else RatingHistory.empty(len(state)),
+            csv_state=csv_state,
+            timestamp=timestamp,
+            version=self.snapshot.version + 1,
+            generation=generation,
+            stale=stale,
+            ensemble=ensemble,
+            glicko=glicko
+        )
+    
+    @staticmethod
+    def _derived_fingerprint() -> str:
+        """Settings of the bootstrap ensemble and Glicko-2 state built alongside the ratings"""
+        glicko = json.dumps(asdict(config.glicko), sort_keys=True)
+        return f"ensemble:{config.rating_ensemble_replicas}:{ENSEMBLE_SEED};glicko:{glicko}"
+    
+    def _cache_fingerprint(self, store: Optional[MatchStore] = None) -> str:
+        """Fingerprint of the workbooks, Elo and Glicko-2 parameters, player aliases and ensemble size"""
+        params = params_fingerprint(config.elo, self.registry.revision)
+        return cache_fingerprint((store or MatchStore()).source_hashes(),
+                                 f"{params};{self._derived_fingerprint()}")
+    
     def load_cached_elos(self) -> bool:
-        """Load cached Elo ratings if available and recent"""
+        """Attach to the published ratings if built from the current workbooks and parameters
+        
+        The arrays are memory-mapped and shared with every other process;
+        a new generation published by another process is picked up here.
+        """
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
-                
-                # Check if cache is recent (within 24 hours)
-                if cache_data['timestamp'] > datetime.now() - timedelta(hours=24):
-                    self.players = cache_data['players']
-                    self.last_update = cache_data['timestamp']
-                    logger.info(f"Loaded {len(self.players)} players from cache")
-                    return True
+            cache = self.shared.get()
+            if cache is None or cache.fingerprint != self._cache_fingerprint():
+                return False
         except Exception as e:
             logger.warning(f"Failed to load cache: {e}")
+            return False
         
-        return False
+        if cache.generation != self.generation or self.snapshot.stale:
+            self._set_state(cache.state, cache.timestamp, cache.history, cache.csv_state, cache.generation,
+                            ensemble=cache.ensemble, glicko=cache.glicko)
+            logger.info(f"Loaded {len(self.state)} players from cache generation {cache.generation}")
+        return True
     
-    def save_elos_to_cache(self):
+    def save_elos_to_cache(self, store: Optional[MatchStore] = None):
         """Save current Elo ratings to cache"""
         try:
-            cache_data = {
-                'players': self.players,
-                'timestamp': datetime.now()
-            }
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-            logger.info("Elo ratings cached successfully")
+            cache = RatingCache(
+                state=self.state,
+                csv_state=self.csv_state,
+                history=self.history,
+                timestamp=self.last_update or datetime.now(),
+                ensemble=self.snapshot.ensemble,
+                glicko=self.snapshot.glicko
+            )
+            cache.save(self.shared.cache_dir, self._cache_fingerprint(store))
+            if self.snapshot.state is cache.state:
+                self.snapshot = replace(self.snapshot, generation=cache.generation)
+            logger.info(f"Elo ratings published as cache generation {cache.generation}")
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
     
@@ -75,200 +163,431 @@ class EloService:
     
     def get_adaptive_k_factor(self, matches_played: int, rating: float) -> int:
         """Calculate adaptive K-factor based on player experience and rating"""
-        base_k = config.elo.k_factor
-        
-        # Higher K for new players
-        if matches_played < 30:
-            return int(base_k * 1.5)
-        elif matches_played < 100:
-            return int(base_k * 1.2)
-        
-        # Lower K for established high-rated players
-        if rating > 2000:
-            return int(base_k * 0.8)
-        elif rating > 1800:
-            return int(base_k * 0.9)
-        
-        return base_k
+        # Higher K for new players, lower K for established high-rated players
+        return self.engine.adaptive_k(matches_played, rating)
     
-    def process_historical_data(self, force_rebuild: bool = False) -> bool:
+    def process_historical_data(self, force_rebuild: bool = False,
+                                workers: Optional[int] = None) -> bool:
         """Process all historical tennis data to calculate Elo ratings"""
-        if not force_rebuild and self.load_cached_elos():
+        if not force_rebuild:
+            if self.load_cached_elos():
+                return True
+            return self.update_incremental(workers=workers)
+        
+        with self._update_lock:
+            return self._rebuild(MatchStore(), workers)
+    
+    def ensure_ratings(self) -> bool:
+        """Make ratings available without blocking on a replay when any can be served
+        
+        Current published ratings are attached directly. Otherwise the
+        snapshot in memory, or the last published one even if stale, keeps
+        being served while an update runs in a background thread. Only a
+        first start with nothing published replays in the caller.
+        """
+        if self.load_cached_elos():
             return True
+        if self.snapshot.version == 0:
+            cache = self.shared.get()
+            if cache is None:
+                return self.update_incremental()
+            self._set_state(cache.state, cache.timestamp, cache.history, cache.csv_state,
+                            cache.generation, stale=True, ensemble=cache.ensemble, glicko=cache.glicko)
+            logger.info(f"Serving stale cache generation {cache.generation} during the update")
+        self.refresh_in_background()
+        return True
+    
+    def refresh_in_background(self, force_rebuild: bool = False,
+                              workers: Optional[int] = None) -> bool:
+        """Start an update in a daemon thread; False if one is already running"""
+        if self.rebuilding:
+            return False
+        target = self.process_historical_data if force_rebuild else self.update_incremental
+        kwargs = {"force_rebuild": True, "workers": workers} if force_rebuild else {"workers": workers}
+        
+        def run():
+            try:
+                if target(**kwargs):
+                    logger.info(f"Background update done, serving snapshot v{self.snapshot.version}")
+            except Exception as e:
+                logger.error(f"Background Elo update failed: {e}")
         
+        self._background = threading.Thread(target=run, name="elo-update", daemon=True)
+        self._background.start()
+        return True
+    
+    @property
+    def rebuilding(self) -> bool:
+        return self._background is not None and self._background.is_alive()
+    
+    def snapshot_status(self) -> Dict:
+        """Version, age and freshness of the snapshot being served"""
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version,
+            "generation": snapshot.generation,
+            "players": len(snapshot.state),
+            "computed_at": snapshot.timestamp,
+            "age": snapshot.age,
+            "stale": snapshot.stale,
+            "rebuilding": self.rebuilding
+        }
+    
+    @staticmethod
+    def _prepare_matches(df: pd.DataFrame) -> pd.DataFrame:
+        """Drop incomplete rows and sort by date"""
+        df = df.dropna(subset=['Winner', 'Loser', 'Date'])
+        return df.sort_values('Date', kind='stable')
+    
+    def _rebuild(self, store: MatchStore, workers: Optional[int] = None) -> bool:
+        """Replay the full match history from scratch"""
         logger.info("Processing historical tennis data...")
         
-        # Load all data files
-        data_files = glob(os.path.join(config.data_dir, "*.xls*"))
-        if not data_files:
+        # Load all data files through the columnar match store
+        if not store.source_files():
             logger.error(f"No data files found in {config.data_dir}")
             return False
         
-        logger.info(f"Found {len(data_files)} data files")
+        df_all = store.load(workers=workers)
+        if df_all.empty:
+            logger.error("No valid data files could be loaded")
+            return False
         
-        # Combine all data
-        all_matches = []
-        for file_path in data_files:
-            try:
-                df = pd.read_excel(file_path)
-                df['file_year'] = os.path.basename(file_path)[:4]
-                all_matches.append(df)
-                logger.debug(f"Loaded {len(df)} matches from {os.path.basename(file_path)}")
-            except Exception as e:
-                logger.warning(f"Failed to load {file_path}: {e}")
+        df_all = self._prepare_matches(df_all)
+        
+        logger.info(f"Processing {len(df_all)} total matches")
+        
+        # Replay matches chronologically over the rating arrays
+        encoded = self.engine.encode(df_all)
+        state, history = self.engine.replay_with_history(encoded)
+        
+        # The elo_probs.csv preset replays the same loaded matches
+        csv_state = self.csv_engine.replay(self.csv_engine.encode(df_all))
+        derived = self._build_derived(encoded)
+        self._set_state(state, datetime.now(), history, csv_state,
+                        ensemble=derived["ensemble"], glicko=derived["glicko"])
+        self._log_parity()
+        
+        logger.info(f"Calculated Elo ratings for {len(self.state)} players")
+        
+        entries = store.entries()
+        current_file = max(entries)
+        current = self._prepare_matches(store.load(refresh=False, files=[current_file]))
+        last_match = df_all.iloc[-1:]
+        self._save_checkpoint(entries, current_file, match_keys(current),
+                              last_match['Date'].to_numpy()[0], int(match_keys(last_match)[0]), derived)
+        
+        # Write the CSV, then publish the cache
+        self.export_to_csv()
+        self.save_elos_to_cache(store)
+        
+        return True
+    
+    def _build_derived(self, encoded: EncodedMatches, checkpoint: Optional[EloCheckpoint] = None) -> Dict:
+        """Bootstrap ensemble and Glicko-2 state of the same matches as the snapshot they are published with
+        
+        With a checkpoint, `encoded` holds only the matches after it and
+        both continue from the checkpoint's state. Also returns what the
+        next checkpoint needs to continue the Glicko-2 state.
+        """
+        replicas = config.rating_ensemble_replicas
+        resume = checkpoint is not None
+        ensemble = self.engine.replay_ensemble(encoded, replicas, seed=ENSEMBLE_SEED,
+                                               ensemble=checkpoint.ensemble if resume else None)
+        logger.info(f"Replayed {len(encoded)} matches through {replicas} bootstrap replicas")
+        glicko, glicko_base, glicko_open = self.glicko_engine.rate_resumable(
+            encoded, *((checkpoint.glicko_base, checkpoint.glicko_open) if resume else ()))
+        logger.info(f"Calculated Glicko-2 ratings for {len(glicko)} players")
+        return {"ensemble": ensemble, "glicko": glicko, "glicko_base": glicko_base, "glicko_open": glicko_open}
+    
+    def _save_checkpoint(self, entries: Dict[str, Dict], current_file: str,
+                         current_keys: np.ndarray, hwm_date: np.datetime64, hwm_key: int, derived: Dict):
+        """Persist the rating state, ensemble and Glicko-2 state with the high-water mark of processed matches"""
+        # Aliases learned during the replay are kept with the checkpoint
+        self.registry.save()
+        try:
+            EloCheckpoint(
+                state=self.state,
+                csv_state=self.csv_state,
+                rating_history=self.history,
+                params=params_fingerprint(config.elo, self.registry.revision),
+                history=history_fingerprint(entries, current_file),
+                current_file=current_file,
+                current_sha256=entries[current_file]['sha256'],
+                current_keys=current_keys,
+                hwm_date=hwm_date,
+                hwm_key=hwm_key,
+                ensemble=derived["ensemble"],
+                glicko_base=derived["glicko_base"],
+                glicko_open=derived["glicko_open"],
+                derived=self._derived_fingerprint()
+            ).save(config.elo_checkpoint_file)
+        except Exception as e:
+            logger.error(f"Failed to save Elo checkpoint: {e}")
+    
+    def update_incremental(self, workers: Optional[int] = None) -> bool:
+        """Apply only the matches added to the current-year file since the last checkpoint"""
+        with self._update_lock:
+            return self._update_incremental(workers)
+    
+    def _update_incremental(self, workers: Optional[int] = None) -> bool:
+        store = MatchStore()
+        if not store.source_files():
+            logger.error(f"No data files found in {config.data_dir}")
+            return False
         
-        if not all_matches:
+        entries = store.refresh(workers)
+        if not entries:
             logger.error("No valid data files could be loaded")
             return False
         
-        # Combine and sort by date
-        df_all = pd.concat(all_matches, ignore_index=True)
-        df_all = df_all.dropna(subset=['Winner', 'Loser', 'Date'])
-        df_all['Date'] = pd.to_datetime(df_all['Date'], errors='coerce')
-        df_all = df_all.dropna(subset=['Date']).sort_values('Date')
+        checkpoint = EloCheckpoint.load(config.elo_checkpoint_file)
+        current_file = max(entries)
         
-        logger.info(f"Processing {len(df_all)} total matches")
+        # Historical files or Elo parameters changed: the checkpoint is useless
+        if (checkpoint is None
+                or checkpoint.params != params_fingerprint(config.elo, self.registry.revision)
+                or checkpoint.current_file != current_file
+                or checkpoint.history != history_fingerprint(entries, current_file)
+                or checkpoint.derived != self._derived_fingerprint()
+                or not checkpoint.resumable):
+            logger.info("No usable Elo checkpoint, running a full rebuild")
+            return self._rebuild(store, workers)
         
-        # Initialize player ratings
-        self.players = {}
-        match_counts = {}
-        
-        # Process matches chronologically
-        for idx, match in df_all.iterrows():
-            winner = NameNormalizer.normalize_excel_format(match['Winner'])
-            loser = NameNormalizer.normalize_excel_format(match['Loser'])
-            
-            # Detect surface
-            tournament = match.get('Tournament', '')
-            surface = SurfaceDetector.detect_surface(tournament, match['Date'].month)
-            
-            # Initialize players if not exists
-            if winner not in self.players:
-                self.players[winner] = PlayerElo(
-                    player_name=winner,
-                    elo_hard=config.elo.base_elo,
-                    elo_clay=config.elo.base_elo,
-                    elo_grass=config.elo.base_elo,
-                    elo_overall=config.elo.base_elo,
-                    matches_played=0
-                )
-                match_counts[winner] = 0
-            
-            if loser not in self.players:
-                self.players[loser] = PlayerElo(
-                    player_name=loser,
-                    elo_hard=config.elo.base_elo,
-                    elo_clay=config.elo.base_elo,
-                    elo_grass=config.elo.base_elo,
-                    elo_overall=config.elo.base_elo,
-                    matches_played=0
-                )
-                match_counts[loser] = 0
-            
-            # Get current ratings
-            winner_player = self.players[winner]
-            loser_player = self.players[loser]
-            
-            winner_elo = winner_player.get_surface_elo(surface)
-            loser_elo = loser_player.get_surface_elo(surface)
-            
-            # Calculate adaptive K-factors
-            winner_k = self.get_adaptive_k_factor(match_counts[winner], winner_elo)
-            loser_k = self.get_adaptive_k_factor(match_counts[loser], loser_elo)
-            
-            # Update Elo ratings
-            new_winner_elo, new_loser_elo = self.update_elo(winner_elo, loser_elo, winner_k)
-            
-            # Apply surface-specific updates
-            if surface == "Hard":
-                winner_player.elo_hard = new_winner_elo
-                loser_player.elo_hard = new_loser_elo
-            elif surface == "Clay":
-                winner_player.elo_clay = new_winner_elo
-                loser_player.elo_clay = new_loser_elo
-            elif surface == "Grass":
-                winner_player.elo_grass = new_winner_elo
-                loser_player.elo_grass = new_loser_elo
-            
-            # Update overall Elo (weighted average)
-            winner_player.elo_overall = (
-                winner_player.elo_hard * 0.5 + 
-                winner_player.elo_clay * 0.3 + 
-                winner_player.elo_grass * 0.2
-            )
-            loser_player.elo_overall = (
-                loser_player.elo_hard * 0.5 + 
-                loser_player.elo_clay * 0.3 + 
-                loser_player.elo_grass * 0.2
-            )
-            
-            # Update match counts
-            match_counts[winner] += 1
-            match_counts[loser] += 1
-            winner_player.matches_played = match_counts[winner]
-            loser_player.matches_played = match_counts[loser]
+        if checkpoint.current_sha256 == entries[current_file]['sha256']:
+            logger.info("No new matches since the last Elo checkpoint")
+            derived = self._build_derived(EncodedMatches.empty(), checkpoint)
+            self._set_state(checkpoint.state, datetime.now(), checkpoint.rating_history, checkpoint.csv_state,
+                            ensemble=derived["ensemble"], glicko=derived["glicko"])
+            self._log_parity()
+            self.export_to_csv()
+            self.save_elos_to_cache(store)
+            return True
+        
+        current = self._prepare_matches(store.load(refresh=False, files=[current_file]))
+        keys = match_keys(current)
+        seen = np.isin(keys, checkpoint.current_keys)
         
-        # Update last calculation time
-        for player in self.players.values():
-            player.last_updated = datetime.now().isoformat()
+        # New rows must extend the processed history: nothing edited or removed,
+        # nothing dated before the high-water mark or sorted before a seen row
+        first_new = np.argmin(seen) if not seen.all() else len(seen)
+        if (not np.isin(checkpoint.current_keys, keys).all()
+                or seen[first_new:].any()
+                or (current['Date'].to_numpy()[first_new:] < checkpoint.hwm_date).any()):
+            logger.info("Current-year file was edited before the high-water mark, running a full rebuild")
+            return self._rebuild(store, workers)
         
-        logger.info(f"Calculated Elo ratings for {len(self.players)} players")
+        new_matches = current.iloc[first_new:]
+        encoded = self.engine.encode(new_matches)
+        state, history = self.engine.replay_with_history(encoded, checkpoint.state, checkpoint.rating_history)
+        csv_state = self.csv_engine.replay(self.csv_engine.encode(new_matches), checkpoint.csv_state)
+        derived = self._build_derived(encoded, checkpoint)
+        self._set_state(state, datetime.now(), history, csv_state,
+                        ensemble=derived["ensemble"], glicko=derived["glicko"])
+        self._log_parity()
+        logger.info(f"Applied {len(new_matches)} new matches from {current_file}")
         
-        # Save to cache and CSV
-        self.save_elos_to_cache()
+        hwm_date, hwm_key = checkpoint.hwm_date, checkpoint.hwm_key
+        if len(new_matches):
+            hwm_date, hwm_key = new_matches['Date'].to_numpy()[-1], int(keys[-1])
+        self._save_checkpoint(entries, current_file, keys, hwm_date, hwm_key, derived)
         self.export_to_csv()
+        self.save_elos_to_cache(store)
         
         return True
     
+    def _log_parity(self):
+        """Compare the service ratings with the elo_probs.csv preset"""
+        key = self.registry.canonical_name if self.engine.elo_config.normalize_names else None
+        self.parity = parity_report(self.state, self.csv_state, key=key)
+        logger.info("Parity between the service and elo_probs.csv ratings:\n"
+                    + self.parity.to_string(index=False, float_format="%.3f"))
+    
     def export_to_csv(self):
-        """Export current Elo ratings to CSV file"""
+        """Export the elo_probs.csv preset ratings to CSV file"""
+        if self.csv_state is None:
+            logger.warning("No elo_probs.csv ratings computed, CSV export skipped")
+            return
         try:
-            df_data = [player.to_dict() for player in self.players.values()]
-            df = pd.DataFrame(df_data)
+            last_updated = self.last_update.isoformat() if self.last_update else None
+            df = self.csv_state.to_frame(last_updated)
             df.to_csv(config.elo_file, index=False)
             logger.info(f"Exported Elo ratings to {config.elo_file}")
         except Exception as e:
             logger.error(f"Failed to export to CSV: {e}")
     
-    def get_player_elo(self, player_name: str, surface: str) -> Optional[float]:
-        """Get Elo rating for a specific player and surface"""
-        normalized_name = NameNormalizer.normalize_excel_format(player_name)
-        
-        if normalized_name in self.players:
-            return self.players[normalized_name].get_surface_elo(surface)
-        
-        # Try fuzzy matching
-        best_match = None
-        best_score = 0.0
+    def _resolve_player(self, player_name: str, state: Optional[RatingState] = None) -> Optional[int]:
+        """Id of a player in a rating state, through the player registry aliases"""
+        player_id = self.registry.resolve(player_name)
+        if player_id is None:
+            return None
+        return (state or self.state).index.get(self.registry.canonical(player_id))
+    
+    def resolve_players(self, player_names: List[str]) -> Dict[str, Optional[int]]:
+        """Resolve a batch of API names at once, e.g. every player of today's matches
         
-        for stored_name in self.players.keys():
-            score = NameNormalizer.fuzzy_match_score(normalized_name, stored_name)
-            if score > best_score and score >= 0.8:
-                best_score = score
-                best_match = stored_name
+        Names seen before are alias lookups; only new ones are fuzzy matched,
+        and what they resolve to is saved in the player registry.
+        """
+        resolved = {name: self._resolve_player(name) for name in dict.fromkeys(player_names)}
+        self.registry.save()
+        return resolved
+    
+    def get_player_elo(self, player_name: str, surface: str, as_of: Optional[datetime] = None,
+                       snapshot: Optional[RatingSnapshot] = None) -> Optional[float]:
+        """Get Elo rating for a specific player and surface
         
-        if best_match:
-            logger.debug(f"Fuzzy matched '{player_name}' to '{best_match}' (score: {best_score:.2f})")
-            return self.players[best_match].get_surface_elo(surface)
+        With `as_of`, returns the rating the player had entering that date,
+        i.e. after every match played strictly before it. Pass the same
+        `snapshot` to compare several players on one set of ratings.
+        """
+        snapshot = snapshot or self.snapshot
+        player_id = self._resolve_player(player_name, snapshot.state)
+        if player_id is None:
+            return None
+        if as_of is None:
+            return snapshot.state.surface_elo(player_id, surface)
         
-        logger.warning(f"Player not found: {player_name}")
-        return None
+        day = int(np.datetime64(pd.Timestamp(as_of), 'D').astype(np.int64))
+        base_elo = float(config.elo.base_elo)
+        code = SURFACE_CODES.get(surface)
+        if code is not None:
+            return snapshot.history.rating_as_of(player_id, code, day, base_elo)
+        return sum(weight * snapshot.history.rating_as_of(player_id, surface_code, day, base_elo)
+                   for surface_code, weight in enumerate(config.elo.overall_weights))
+    
+    def get_player_trajectory(self, player_name: str) -> pd.DataFrame:
+        """Rating before and after every match of a player, per surface"""
+        snapshot = self.snapshot
+        player_id = self._resolve_player(player_name, snapshot.state)
+        if player_id is None:
+            return pd.DataFrame(columns=['date', 'surface', 'elo_before', 'elo_after'])
+        return snapshot.history.trajectory(player_id)
     
     def get_match_probability(self, player1: str, player2: str, surface: str) -> Optional[float]:
         """Calculate probability of player1 winning against player2"""
-        elo1 = self.get_player_elo(player1, surface)
-        elo2 = self.get_player_elo(player2, surface)
+        probability = self.get_match_probabilities([(player1, player2)], surface)[0]
+        return None if np.isnan(probability) else float(probability)
+    
+    def _player_ids(self, player_names: Sequence[str], index: Dict[str, int]) -> np.ndarray:
+        """Ids of many names in a name index, -1 for unknown players; each distinct name resolved once"""
+        resolved = {}
+        for name in dict.fromkeys(player_names):
+            player_id = self.registry.resolve(name)
+            resolved[name] = -1 if player_id is None else index.get(self.registry.canonical(player_id), -1)
+        return np.array([resolved[name] for name in player_names], dtype=np.int64)
+    
+    def _ratings_of(self, player_names: Sequence[str], surfaces: Union[str, Sequence[str]],
+                    snapshot: RatingSnapshot) -> np.ndarray:
+        """Ratings of many players at once, NaN for unknown players
+        
+        Each distinct name is resolved once; `surfaces` is one surface for
+        every player or one per player.
+        """
+        player_ids = self._player_ids(player_names, snapshot.state.index)
+        known = player_ids >= 0
+        ratings = np.full(len(player_ids), np.nan)
+        codes = surface_codes(surfaces, len(player_ids))
+        ratings[known] = snapshot.state.surface_ratings(player_ids[known], codes[known])
+        return ratings
+    
+    def get_match_elos(self, pairs: Sequence[Tuple[str, str]], surfaces: Union[str, Sequence[str]],
+                       snapshot: Optional[RatingSnapshot] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Ratings of both players of many matches, NaN where a player is unknown"""
+        snapshot = snapshot or self.snapshot
+        players = [name for pair in pairs for name in pair]
+        if not isinstance(surfaces, str):
+            surfaces = [surface for surface in surfaces for _ in range(2)]
+        ratings = self._ratings_of(players, surfaces, snapshot)
+        return ratings[0::2], ratings[1::2]
+    
+    def get_match_probabilities(self, pairs: Sequence[Tuple[str, str]], surfaces: Union[str, Sequence[str]],
+                                snapshot: Optional[RatingSnapshot] = None) -> np.ndarray:
+        """Probability of the first player of each pair winning, NaN where a player is unknown
+        
+        `surfaces` is one surface for every pair or one per pair. All pairs
+        are scored on the same snapshot.
+        """
+        elo1, elo2 = self.get_match_elos(pairs, surfaces, snapshot)
+        return expected_scores(elo1, elo2)
+    
+    def get_field_probabilities(self, players: Sequence[str], surface: str,
+                                snapshot: Optional[RatingSnapshot] = None) -> pd.DataFrame:
+        """Win probability of every row player against every column player of a field
+        
+        The diagonal and the rows and columns of unknown players are NaN.
+        """
+        ratings = self._ratings_of(list(players), surface, snapshot or self.snapshot)
+        matrix = expected_scores(ratings[:, None], ratings[None, :])
+        np.fill_diagonal(matrix, np.nan)
+        return pd.DataFrame(matrix, index=list(players), columns=list(players))
+    
+    def get_rating_ensemble(self, snapshot: Optional[RatingSnapshot] = None) -> Optional[RatingEnsemble]:
+        """Bootstrap ensemble published with a snapshot, None until the background refresh built it
         
-        if elo1 is None or elo2 is None:
+        The ensemble is replayed from the same matches as the snapshot's
+        ratings, so both always describe the same data.
+        """
+        return (snapshot or self.snapshot).ensemble
+    
+    def get_player_elo_spread(self, player_name: str, surface: str,
+                              snapshot: Optional[RatingSnapshot] = None) -> Optional[Tuple[float, float]]:
+        """Mean and standard deviation of a player's rating over the bootstrap replicas"""
+        ensemble = self.get_rating_ensemble(snapshot)
+        if ensemble is None:
+            return None
+        player_ids = self._player_ids([player_name], ensemble.index)
+        if player_ids[0] < 0:
             return None
+        ratings = ensemble.surface_ratings(player_ids, surface_codes(surface, 1))[:, 0]
+        return float(ratings.mean()), float(ratings.std())
+    
+    def get_ensemble_probabilities(self, pairs: Sequence[Tuple[str, str]], surfaces: Union[str, Sequence[str]],
+                                   snapshot: Optional[RatingSnapshot] = None) -> Optional[np.ndarray]:
+        """(replicas, pairs) probability of the first player winning in every bootstrap replica
         
-        return self.calculate_expected_score(elo1, elo2)
+        Columns of pairs with an unknown player are NaN. Their mean and
+        standard deviation over axis 0 give a probability and its spread.
+        None until the snapshot's ensemble is built.
+        """
+        ensemble = self.get_rating_ensemble(snapshot)
+        if ensemble is None:
+            return None
+        ids = self._player_ids([name for pair in pairs for name in pair], ensemble.index)
+        ids1, ids2 = ids[0::2], ids[1::2]
+        known = (ids1 >= 0) & (ids2 >= 0)
+        probabilities = np.full((ensemble.replicas, len(ids1)), np.nan)
+        codes = surface_codes(surfaces, len(ids1))
+        probabilities[:, known] = ensemble.match_probabilities(ids1[known], ids2[known], codes[known])
+        return probabilities
     
-    def get_top_players(self, surface: str = "Hard", limit: int = 50) -> List[PlayerElo]:
-        """Get top players by Elo rating for a specific surface"""
-        sorted_players = sorted(
-            self.players.values(),
-            key=lambda p: p.get_surface_elo(surface),
-            reverse=True
-        )
-        return sorted_players[:limit]
\ No newline at end of file
+    def get_top_players(self, surface: str = "Hard", limit: int = 50,
+                        active_months: Optional[float] = None) -> List[PlayerElo]:
+        """Get top players by Elo rating for a specific surface
+        
+        With `active_months`, only players who played within that many months
+        of the latest match are listed.
+        """
+        snapshot = self.snapshot
+        order = snapshot.ranked.top(surface, limit, active_months)
+        last_updated = snapshot.timestamp.isoformat() if snapshot.timestamp else None
+        return [snapshot.state.player_view(player_id, last_updated) for player_id in order]
+    
+    def get_player_rank(self, player_name: str, surface: str, active_months: Optional[float] = None,
+                        snapshot: Optional[RatingSnapshot] = None) -> Optional[Dict]:
+        """Rank, field size and percentile of a player on a surface
+        
+        None if the player is unknown, or inactive when `active_months` is given.
+        """
+        snapshot = snapshot or self.snapshot
+        player_id = self._resolve_player(player_name, snapshot.state)
+        if player_id is None:
+            return None
+        rank = snapshot.ranked.rank(player_id, surface, active_months)
+        if rank is None:
+            return None
+        return {
+            "rank": rank,
+            "field_size": snapshot.ranked.field_size(active_months),
+            "percentile": snapshot.ranked.percentile(player_id, surface, active_months)
+        }
\ No newline at end of file
@@ -0,0 +1,189 @@
+# services/elo_sweep.py
+"""Replay the match history once for many Elo configurations at a time.
+
+Run from the repository root:  python -m services.elo_sweep
+"""
+from dataclasses import dataclass, replace
+from itertools import product
+from typing import Iterable, List, Optional, Sequence, Tuple
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config.settings import EloConfig, config
+from services.elo_engine import EloEngine, EncodedMatches
+
+logger = logging.getLogger(__name__)
+
+# Default search space, 7 * 4 * 3 * 3 * 3 = 756 configurations
+DEFAULT_K_FACTORS = (16, 20, 24, 28, 32, 40, 48)
+DEFAULT_NEW_MULTIPLIERS = (1.0, 1.25, 1.5, 2.0)
+DEFAULT_DEVELOPING_MULTIPLIERS = (1.0, 1.2, 1.5)
+DEFAULT_ELITE_MULTIPLIERS = (0.6, 0.8, 1.0)
+DEFAULT_STRONG_MULTIPLIERS = (0.8, 0.9, 1.0)
+DEFAULT_OVERALL_WEIGHTS = (
+    (0.5, 0.3, 0.2), (1 / 3, 1 / 3, 1 / 3), (0.6, 0.25, 0.15),
+    (0.4, 0.4, 0.2), (0.7, 0.2, 0.1), (0.5, 0.4, 0.1)
+)
+
+# Probabilities are clipped before taking logs
+EPSILON = 1e-12
+
+def config_grid(k_factors: Iterable[int] = DEFAULT_K_FACTORS,
+                new: Iterable[float] = DEFAULT_NEW_MULTIPLIERS,
+                developing: Iterable[float] = DEFAULT_DEVELOPING_MULTIPLIERS,
+                elite: Iterable[float] = DEFAULT_ELITE_MULTIPLIERS,
+                strong: Iterable[float] = DEFAULT_STRONG_MULTIPLIERS,
+                base: Optional[EloConfig] = None) -> List[EloConfig]:
+    """Cartesian product of K-factors and K multipliers as EloConfig objects"""
+    base = base or config.elo
+    return [
+        replace(base, k_factor=k, k_multipliers=(m_new, m_developing, m_elite, m_strong))
+        for k, m_new, m_developing, m_elite, m_strong in product(k_factors, new, developing, elite, strong)
+    ]
+
+@dataclass
+class SweepResult:
+    """Holdout scores of every configuration and overall blend"""
+    configs: List[EloConfig]
+    log_loss: np.ndarray          # (configs,) surface-rating predictions
+    brier: np.ndarray             # (configs,)
+    accuracy: np.ndarray          # (configs,)
+    weights: np.ndarray           # (blends, 3) overall blends tried
+    blend_log_loss: np.ndarray    # (configs, blends) overall-rating predictions
+    n_holdout: int
+    holdout_from: pd.Timestamp
+    
+    def to_frame(self) -> pd.DataFrame:
+        """One row per configuration, best log-loss first"""
+        best_blend = self.blend_log_loss.argmin(axis=1)
+        frame = pd.DataFrame({
+            'k_factor': [c.k_factor for c in self.configs],
+            'k_new': [c.k_multipliers[0] for c in self.configs],
+            'k_developing': [c.k_multipliers[1] for c in self.configs],
+            'k_elite': [c.k_multipliers[2] for c in self.configs],
+            'k_strong': [c.k_multipliers[3] for c in self.configs],
+            'log_loss': self.log_loss,
+            'brier': self.brier,
+            'accuracy': self.accuracy,
+            'overall_weights': [tuple(np.round(self.weights[b], 4)) for b in best_blend],
+            'overall_log_loss': self.blend_log_loss[np.arange(len(self.configs)), best_blend]
+        })
+        return frame.sort_values(['log_loss', 'brier'], kind='stable')
+    
+    def best_config(self) -> EloConfig:
+        """Best configuration with the best overall blend for it, ready for config.elo"""
+        best = int(np.argmin(self.log_loss))
+        weights = self.weights[int(np.argmin(self.blend_log_loss[best]))]
+        return replace(self.configs[best], overall_weights=tuple(float(w) for w in weights))
+
+class EloSweep:
+    """Batched replay where every player holds one rating per configuration"""
+    
+    def __init__(self, configs: Sequence[EloConfig],
+                 weights: Sequence[Tuple[float, float, float]] = DEFAULT_OVERALL_WEIGHTS):
+        if not configs:
+            raise ValueError("At least one Elo configuration is required")
+        if len({c.base_elo for c in configs}) != 1:
+            raise ValueError("All configurations must share the same base Elo")
+        self.configs = list(configs)
+        self.weights = np.asarray(weights, dtype=np.float64).reshape(-1, 3)
+        
+        # Same integer tiers as EloEngine.k_tiers, one column per configuration
+        tiers = np.array([EloEngine(c).k_tiers() for c in self.configs], dtype=np.float64)
+        self.k_new, self.k_developing, self.k_elite, self.k_strong, self.k_base = tiers.T.copy()
+    
+    def replay(self, encoded: EncodedMatches,
+               holdout_start: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Replay all matches, returning the final ratings (players, 3, configs)
+        and the winner's surface and blended probabilities of holdout matches"""
+        n_configs = len(self.configs)
+        n_players = len(encoded.names)
+        ratings = np.full((n_players, 3, n_configs), float(self.configs[0].base_elo))
+        counts = [0] * n_players
+        
+        n_holdout = len(encoded) - holdout_start
+        surface_probs = np.empty((n_holdout, n_configs))
+        blend_probs = np.empty((n_holdout, len(self.weights), n_configs))
+        
+        for i, (w, l, s) in enumerate(zip(encoded.winner_ids.tolist(), encoded.loser_ids.tolist(),
+                                          encoded.surfaces.tolist())):
+            w_elo = ratings[w, s].copy()
+            l_elo = ratings[l, s].copy()
+            
+            played = counts[w]
+            if played < 30:
+                k = self.k_new
+            elif played < 100:
+                k = self.k_developing
+            else:
+                k = np.where(w_elo > 2000, self.k_elite, np.where(w_elo > 1800, self.k_strong, self.k_base))
+            
+            expected = 1 / (1 + 10 ** ((l_elo - w_elo) / 400))
+            
+            if i >= holdout_start:
+                row = i - holdout_start
+                surface_probs[row] = expected
+                diff = self.weights @ (ratings[l] - ratings[w])
+                blend_probs[row] = 1 / (1 + 10 ** (diff / 400))
+            
+            ratings[w, s] = w_elo + k * (1 - expected)
+            ratings[l, s] = l_elo + k * (0 - (1 - expected))
+            counts[w] += 1
+            counts[l] += 1
+        
+        return ratings, surface_probs, blend_probs
+    
+    def run(self, matches: pd.DataFrame, holdout_fraction: float = 0.2) -> SweepResult:
+        """Score every configuration on the most recent `holdout_fraction` of matches
+        
+        Ratings keep updating through the holdout, so each prediction only uses
+        matches played before it.
+        """
+        engine = EloEngine(self.configs[0])
+        encoded = engine.encode(matches)
+        holdout_from = pd.Timestamp(matches['Date'].quantile(1 - holdout_fraction))
+        holdout_start = int(np.searchsorted(matches['Date'].to_numpy(), holdout_from.to_datetime64(), side='left'))
+        
+        logger.info(f"Sweeping {len(self.configs)} Elo configurations over {len(encoded)} matches, "
+                    f"holdout from {holdout_from.date()}")
+        _, surface_probs, blend_probs = self.replay(encoded, holdout_start)
+        
+        clipped = np.clip(surface_probs, EPSILON, 1.0)
+        return SweepResult(
+            configs=self.configs,
+            log_loss=-np.log(clipped).mean(axis=0),
+            brier=((1 - surface_probs) ** 2).mean(axis=0),
+            accuracy=(surface_probs > 0.5).mean(axis=0),
+            weights=self.weights,
+            blend_log_loss=-np.log(np.clip(blend_probs, EPSILON, 1.0)).mean(axis=0).T,
+            n_holdout=len(surface_probs),
+            holdout_from=holdout_from
+        )
+
+def main():
+    from services.elo_service import EloService
+    from services.match_store import MatchStore
+    
+    parser = argparse.ArgumentParser(description="Tune the Elo parameters on a time-split holdout")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of the most recent matches scored")
+    parser.add_argument("--top", type=int, default=10, help="Number of configurations shown")
+    args = parser.parse_args()
+    
+    matches = EloService._prepare_matches(MatchStore().load())
+    result = EloSweep(config_grid()).run(matches, holdout_fraction=args.holdout)
+    
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(result.to_frame().head(args.top).to_string(index=False))
+    
+    best = result.best_config()
+    print(f"\n{result.n_holdout} holdout matches since {result.holdout_from.date()}")
+    print(f"Best: {best}")
+    print(f"ELO_K_FACTOR={best.k_factor}")
+    print(f"ELO_K_MULTIPLIERS={','.join(str(m) for m in best.k_multipliers)}")
+    print(f"ELO_OVERALL_WEIGHTS={','.join(f'{w:.4f}' for w in best.overall_weights)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# services/event_store.py
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+import threading
+import time
+
+from models.player import Match
+
+# Fields of a Pinnacle event the matches are built from; the rest is not kept
+EVENT_FIELDS = ("event_id", "league_name", "starts", "home", "away", "is_have_open_markets")
+
+def compact_event(event: Dict) -> Dict:
+    """The kept fields of an event plus its full-match money line"""
+    compact = {key: event[key] for key in EVENT_FIELDS if key in event}
+    money_line = event.get("periods", {}).get("num_0", {}).get("money_line")
+    if money_line:
+        compact["periods"] = {"num_0": {"money_line": money_line}}
+    return compact
+
+def start_epoch(event: Dict) -> Optional[float]:
+    """Start of an event as epoch seconds; the API lists naive UTC times"""
+    try:
+        starts = datetime.fromisoformat(str(event["starts"]).replace("Z", "+00:00"))
+    except (KeyError, ValueError):
+        return None
+    if starts.tzinfo is None:
+        starts = starts.replace(tzinfo=timezone.utc)
+    return starts.timestamp()
+
+class EventStore:
+    """Latest odds of every open tennis event, kept current by incremental polls
+    
+    A full poll replaces the whole board; a poll with the API's `since`
+    cursor only returns the events that changed, which are merged in by
+    event id. Only merged events are parsed again, so the matches of
+    unchanged events are reused. The cursor is only trusted for
+    `max_age` seconds after it was issued, after which the next poll is a
+    full resync. Events whose start time has passed are never served.
+    """
+    
+    def __init__(self):
+        self.events: Dict[int, Dict] = {}
+        self.matches: Dict[int, Optional[Match]] = {}
+        self.starts: Dict[int, float] = {}      # start of each event with a known time
+        self.cursor: Optional[int] = None
+        self.cursor_time = 0.0      # time.time() the cursor was issued
+        self.polled_at = 0.0        # time.time() of the last successful poll
+        # Held while the store changes, never across a network call
+        self.lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def cursor_valid(self, max_age: float) -> bool:
+        return self.cursor is not None and time.time() - self.cursor_time < max_age
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether the store holds a polled board, even an empty one"""
+        return self.polled_at > 0
+    
+    def is_fresh(self, ttl: float) -> bool:
+        return self.loaded and time.time() - self.polled_at < ttl
+    
+    def invalidate_cursor(self):
+        self.cursor = None
+    
+    def clear(self):
+        """Forget every event, so the next poll is a cold start"""
+        with self.lock:
+            self.events, self.matches, self.starts = {}, {}, {}
+            self.cursor = None
+            self.polled_at = 0.0
+    
+    def merge(self, events: Iterable[Dict], cursor: Optional[int], full: bool,
+              parse: Callable[[Dict], Optional[Match]]) -> int:
+        """Merge polled events, parsing only those, and return how many were merged
+        
+        A full poll drops every event it does not list. Events reported
+        without open markets, and events that have started, are removed.
+        """
+        parsed = {}
+        closed = set()
+        for event in events:
+            event_id = event.get("event_id")
+            if event_id is None:
+                continue
+            if event.get("is_have_open_markets") is False:
+                closed.add(event_id)
+                continue
+            event = compact_event(event)
+            parsed[event_id] = (event, parse(event))
+        
+        # Parsed first, so readers never wait on the parsing
+        with self.lock:
+            if full:
+                self.events, self.matches, self.starts = {}, {}, {}
+            for event_id in closed:
+                self._drop(event_id)
+            for event_id, (event, match) in parsed.items():
+                self.events[event_id] = event
+                self.matches[event_id] = match
+                starts = start_epoch(event)
+                if starts is not None:
+                    self.starts[event_id] = starts
+            
+            now = time.time()
+            self.expire(now)
+            if cursor is not None and (full or cursor != self.cursor):
+                self.cursor_time = now
+            self.cursor = cursor
+            self.polled_at = now
+        return len(parsed)
+    
+    def _drop(self, event_id: int):
+        self.events.pop(event_id, None)
+        self.matches.pop(event_id, None)
+        self.starts.pop(event_id, None)
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Remove the events that have started and return how many were removed"""
+        now = time.time() if now is None else now
+        with self.lock:
+            started = [event_id for event_id, starts in self.starts.items() if starts <= now]
+            for event_id in started:
+                self._drop(event_id)
+        return len(started)
+    
+    def current_matches(self) -> List[Match]:
+        """Parsed matches of the events yet to start, in the order the API listed them"""
+        with self.lock:
+            self.expire()
+            return [match for match in self.matches.values() if match is not None]
+    
+    def to_dict(self) -> Dict:
+        with self.lock:
+            return {
+                "cursor": self.cursor,
+                "cursor_time": self.cursor_time,
+                "polled_at": self.polled_at,
+                "events": list(self.events.values())
+            }
+    
+    def restore(self, cache: Dict, parse: Callable[[Dict], Optional[Match]]) -> bool:
+        """Reload the events and cursor persisted by to_dict(); False if the cache has none"""
+        if "events" not in cache:
+            return False
+        events = {event["event_id"]: event for event in cache["events"] if "event_id" in event}
+        matches = {event_id: parse(event) for event_id, event in events.items()}
+        starts = {event_id: start_epoch(event) for event_id, event in events.items()}
+        with self.lock:
+            self.events, self.matches = events, matches
+            self.starts = {event_id: start for event_id, start in starts.items() if start is not None}
+            self.cursor = cache.get("cursor")
+            self.cursor_time = cache.get("cursor_time", 0.0)
+            self.polled_at = cache.get("polled_at", 0.0)
+            self.expire()
+        return True
+
+_store: Optional[EventStore] = None
+_store_lock = threading.Lock()
+
+def get_event_store() -> EventStore:
+    """Process-wide event store, shared by every APIService instance"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EventStore()
+        return _store
@@ -0,0 +1,255 @@
+# services/glicko_engine.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from config.settings import GlickoConfig, config
+from services.elo_engine import SURFACE_CODES, EncodedMatches
+
+logger = logging.getLogger(__name__)
+
+# Glicko-2 works on this scale: mu = (rating - 1500) / SCALE, phi = RD / SCALE
+SCALE = 173.7178
+
+# Cap on the volatility iteration, which converges in a handful of steps
+MAX_ITERATIONS = 100
+
+# Day 4 since the epoch is a Monday, so weekly periods run Monday to Sunday
+PERIOD_ANCHOR_DAY = 4
+
+def g(phi: np.ndarray) -> np.ndarray:
+    """Glicko-2 weight of an opponent's deviation"""
+    return 1 / np.sqrt(1 + 3 * phi ** 2 / np.pi ** 2)
+
+@dataclass
+class GlickoState:
+    """Glicko-2 rating, deviation and volatility of every player on each surface"""
+    names: List[str]
+    ratings: np.ndarray         # (players, 3) in rating points, 1500 for a new player
+    rd: np.ndarray              # (players, 3) deviation after the player's last rated period
+    volatility: np.ndarray      # (players, 3)
+    last_period: np.ndarray     # (players, 3) last period the player was rated in, -1 if never
+    matches: np.ndarray         # (players,)
+    period: int = -1            # latest rating period of the state
+    index: Dict[str, int] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        if self.index is None:
+            self.index = {name: pid for pid, name in enumerate(self.names)}
+    
+    @classmethod
+    def empty(cls, glicko_config: Optional[GlickoConfig] = None) -> "GlickoState":
+        glicko_config = glicko_config or config.glicko
+        return cls(
+            names=[],
+            ratings=np.full((0, 3), glicko_config.initial_rating),
+            rd=np.full((0, 3), glicko_config.initial_rd),
+            volatility=np.full((0, 3), glicko_config.initial_volatility),
+            last_period=np.full((0, 3), -1, dtype=np.int64),
+            matches=np.zeros(0, dtype=np.int64)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def to_arrays(self, prefix: str = "glicko_") -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}names": np.asarray(self.names, dtype=str),
+            f"{prefix}ratings": self.ratings,
+            f"{prefix}rd": self.rd,
+            f"{prefix}volatility": self.volatility,
+            f"{prefix}last_period": self.last_period,
+            f"{prefix}matches": self.matches,
+            f"{prefix}period": np.asarray([self.period], dtype=np.int64)
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "glicko_") -> Optional["GlickoState"]:
+        if f"{prefix}ratings" not in arrays:
+            return None
+        return cls(
+            names=arrays[f"{prefix}names"].tolist(),
+            ratings=arrays[f"{prefix}ratings"],
+            rd=arrays[f"{prefix}rd"],
+            volatility=arrays[f"{prefix}volatility"],
+            last_period=arrays[f"{prefix}last_period"],
+            matches=arrays[f"{prefix}matches"],
+            period=int(arrays[f"{prefix}period"][0])
+        )
+    
+    def current_rd(self, max_rd: float, rows=slice(None)) -> np.ndarray:
+        """Deviations grown by the volatility of every period a player sat out since"""
+        last_period = self.last_period[rows]
+        idle = np.where(last_period >= 0, self.period - last_period, 0)
+        phi = np.sqrt((self.rd[rows] / SCALE) ** 2 + idle * self.volatility[rows] ** 2)
+        return np.minimum(phi * SCALE, max_rd)
+
+class GlickoEngine:
+    """Glicko-2 per surface over rating periods, one vectorised update per period
+    
+    All matches of a period are rated against the ratings the period started
+    with, as Glicko-2 prescribes, so every player of a period is updated by
+    the same array operations. Only the loop over periods runs in Python.
+    """
+    
+    def __init__(self, glicko_config: Optional[GlickoConfig] = None):
+        self.glicko_config = glicko_config or config.glicko
+    
+    def periods(self, days: np.ndarray) -> np.ndarray:
+        """Rating period of each match day"""
+        return (days.astype(np.int64) - PERIOD_ANCHOR_DAY) // self.glicko_config.period_days
+    
+    def rate(self, encoded: EncodedMatches, state: Optional[GlickoState] = None) -> GlickoState:
+        """Rate every encoded match, period by period, starting from `state` if given"""
+        cfg = self.glicko_config
+        if state is None:
+            state = GlickoState.empty(cfg)
+        
+        # Grow the state for players first seen in these matches
+        names = list(state.names)
+        index = dict(state.index)
+        ids = np.empty(len(encoded.names), dtype=np.int64)
+        for local_id, name in enumerate(encoded.names):
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+            ids[local_id] = index[name]
+        n_new = len(names) - len(state)
+        
+        # Flat (player, surface) slots on the Glicko-2 scale
+        mu = np.concatenate([(state.ratings - cfg.initial_rating) / SCALE,
+                             np.zeros((n_new, 3))]).ravel()
+        phi = np.concatenate([state.rd / SCALE, np.full((n_new, 3), cfg.initial_rd / SCALE)]).ravel()
+        sigma = np.concatenate([state.volatility, np.full((n_new, 3), cfg.initial_volatility)]).ravel()
+        last_period = np.concatenate([state.last_period, np.full((n_new, 3), -1, dtype=np.int64)]).ravel()
+        max_phi = cfg.initial_rd / SCALE
+        
+        winner_ids = ids[encoded.winner_ids]
+        loser_ids = ids[encoded.loser_ids]
+        surfaces = encoded.surfaces.astype(np.int64)
+        winner_slots = winner_ids * 3 + surfaces
+        loser_slots = loser_ids * 3 + surfaces
+        
+        # Matches are chronological, so each period is one contiguous block
+        periods = self.periods(encoded.days)
+        bounds = np.flatnonzero(np.diff(periods)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(periods)]])
+        
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if start == end:
+                continue
+            period = int(periods[start])
+            w_slots = winner_slots[start:end]
+            l_slots = loser_slots[start:end]
+            slots, local = np.unique(np.concatenate([w_slots, l_slots]), return_inverse=True)
+            w_local, l_local = local[:end - start], local[end - start:]
+            
+            # Deviation grows by the volatility of every period sat out since the last one
+            idle = np.where(last_period[slots] >= 0, period - last_period[slots] - 1, 0)
+            phi_pre = np.minimum(np.sqrt(phi[slots] ** 2 + idle * sigma[slots] ** 2), max_phi)
+            mu_pre = mu[slots]
+            
+            # Expected scores of both sides against the opponent's pre-period rating
+            g_l = g(phi_pre[l_local])
+            g_w = g(phi_pre[w_local])
+            e_w = 1 / (1 + np.exp(-g_l * (mu_pre[w_local] - mu_pre[l_local])))
+            e_l = 1 / (1 + np.exp(-g_w * (mu_pre[l_local] - mu_pre[w_local])))
+            n_slots = len(slots)
+            v_inv = (np.bincount(w_local, g_l ** 2 * e_w * (1 - e_w), n_slots)
+                     + np.bincount(l_local, g_w ** 2 * e_l * (1 - e_l), n_slots))
+            score = np.bincount(w_local, g_l * (1 - e_w), n_slots) + np.bincount(l_local, -g_w * e_l, n_slots)
+            v = 1 / v_inv
+            
+            sigma_new = self._volatility(sigma[slots], phi_pre, v, v * score)
+            phi_star = np.sqrt(phi_pre ** 2 + sigma_new ** 2)
+            phi_new = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+            mu[slots] = mu_pre + phi_new ** 2 * score
+            phi[slots] = phi_new
+            sigma[slots] = sigma_new
+            last_period[slots] = period
+        
+        played = np.bincount(np.concatenate([winner_ids, loser_ids]), minlength=len(names))
+        return GlickoState(
+            names=names,
+            ratings=mu.reshape(-1, 3) * SCALE + cfg.initial_rating,
+            rd=phi.reshape(-1, 3) * SCALE,
+            volatility=sigma.reshape(-1, 3),
+            last_period=last_period.reshape(-1, 3),
+            matches=np.concatenate([state.matches, np.zeros(n_new, dtype=np.int64)]) + played,
+            period=max(state.period, int(periods[-1])) if len(periods) else state.period,
+            index=index
+        )
+    
+    def rate_resumable(self, encoded: EncodedMatches, base: Optional[GlickoState] = None,
+                       open_matches: Optional[EncodedMatches] = None
+                       ) -> Tuple[GlickoState, GlickoState, EncodedMatches]:
+        """Rate matches so that later ones can be added without rating everything again
+        
+        A period's matches are rated together, so a period that may still
+        gain matches is rated again from the state before it. Returns the
+        state after every match, the state before the last period and the
+        matches of that period; passing the last two back with the next
+        matches gives the same state as rating all of them at once.
+        """
+        if open_matches is not None:
+            encoded = open_matches.concat(encoded)
+        base = base if base is not None else GlickoState.empty(self.glicko_config)
+        if not len(encoded):
+            return self.rate(encoded, base), base, encoded
+        periods = self.periods(encoded.days)
+        last = periods == periods[-1]
+        base = self.rate(encoded.take(~last), base)
+        open_matches = encoded.take(last)
+        return self.rate(open_matches, base), base, open_matches
+    
+    def _volatility(self, sigma: np.ndarray, phi: np.ndarray, v: np.ndarray, delta: np.ndarray) -> np.ndarray:
+        """New volatilities by the Illinois iteration of Glicko-2 step 5, for all players at once"""
+        tau = self.glicko_config.tau
+        tolerance = self.glicko_config.convergence_tolerance
+        a = np.log(sigma ** 2)
+        
+        def f(x):
+            ex = np.exp(x)
+            return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+        
+        # Bracket the root: B = ln(delta^2 - phi^2 - v), or a - k * tau for the first k with f >= 0
+        big_delta = delta ** 2 > phi ** 2 + v
+        A = a.copy()
+        B = np.where(big_delta, np.log(np.where(big_delta, delta ** 2 - phi ** 2 - v, 1.0)), a - tau)
+        pending = ~big_delta & (f(B) < 0)
+        while pending.any():
+            B[pending] -= tau
+            pending &= f(B) < 0
+        
+        f_a, f_b = f(A), f(B)
+        active = np.abs(B - A) > tolerance
+        for _ in range(MAX_ITERATIONS):
+            if not active.any():
+                break
+            C = A + (A - B) * f_a / (f_b - f_a)
+            f_c = f(C)
+            swap = f_c * f_b <= 0
+            A = np.where(active & swap, B, A)
+            f_a = np.where(active & swap, f_b, np.where(active, f_a / 2, f_a))
+            B = np.where(active, C, B)
+            f_b = np.where(active, f_c, f_b)
+            active &= np.abs(B - A) > tolerance
+        return np.exp(A / 2)
+
+def expected_score(rating1, rd1, rating2, rd2):
+    """Glicko-2 probability of player 1 beating player 2, both deviations folded in"""
+    phi = np.sqrt(np.asarray(rd1) ** 2 + np.asarray(rd2) ** 2) / SCALE
+    return 1 / (1 + np.exp(-g(phi) * (np.asarray(rating1) - np.asarray(rating2)) / SCALE))
+
+def surface_rating(state: GlickoState, player_id: int, surface: str,
+                   max_rd: float) -> Tuple[float, float]:
+    """Rating and current deviation of a player on a surface (overall blend for unknown surfaces)"""
+    rd = state.current_rd(max_rd, player_id)
+    code = SURFACE_CODES.get(surface)
+    if code is not None:
+        return float(state.ratings[player_id, code]), float(rd[code])
+    weights = np.asarray(config.elo.overall_weights)
+    return float(state.ratings[player_id] @ weights), float(np.sqrt((rd ** 2) @ weights ** 2))
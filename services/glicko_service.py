@@ -0,0 +1,72 @@
+# services/glicko_service.py
+from typing import Optional, Tuple
+import logging
+
+import numpy as np
+
+from config.settings import config
+from services.elo_service import EloService
+from services.glicko_engine import GlickoState, expected_score, surface_rating
+from services.player_registry import PlayerRegistry
+from services.rating_snapshot import RatingSnapshot
+
+logger = logging.getLogger(__name__)
+
+class GlickoService:
+    """Glicko-2 ratings per surface, built from the same matches as the Elo ratings
+    
+    Where Elo gives a single number, Glicko-2 adds a rating deviation: how
+    uncertain a player's rating is after few or long-ago matches. The state
+    is computed by the Elo service's background refresh and published with
+    its snapshot and rating cache, so reading it never rates matches.
+    """
+    
+    def __init__(self, elo_service: EloService):
+        self.elo_service = elo_service
+    
+    @property
+    def registry(self) -> PlayerRegistry:
+        return self.elo_service.registry
+    
+    def state(self, snapshot: Optional[RatingSnapshot] = None) -> Optional[GlickoState]:
+        """Glicko-2 state of a snapshot, None until the background refresh built it"""
+        return (snapshot or self.elo_service.snapshot).glicko
+    
+    def ensure_ratings(self, snapshot: Optional[RatingSnapshot] = None) -> bool:
+        """Whether deviations can be served now; never waits for them to be computed"""
+        if self.state(snapshot) is None:
+            logger.info("Glicko-2 ratings not built yet, deviations unavailable")
+            return False
+        return True
+    
+    def get_player_rating(self, player_name: str, surface: str,
+                          snapshot: Optional[RatingSnapshot] = None) -> Optional[Tuple[float, float]]:
+        """Rating and current deviation of a player on a surface"""
+        state = self.state(snapshot)
+        if state is None:
+            return None
+        player_id = self.registry.lookup(player_name)
+        if player_id is None:
+            return None
+        state_id = state.index.get(self.registry.canonical(player_id))
+        if state_id is None:
+            return None
+        return surface_rating(state, state_id, surface, config.glicko.initial_rd)
+    
+    def get_match_deviation(self, player1: str, player2: str, surface: str,
+                            snapshot: Optional[RatingSnapshot] = None) -> Optional[float]:
+        """Combined rating deviation of both players, the uncertainty of their matchup"""
+        rating1 = self.get_player_rating(player1, surface, snapshot)
+        rating2 = self.get_player_rating(player2, surface, snapshot)
+        if rating1 is None or rating2 is None:
+            return None
+        return float(np.hypot(rating1[1], rating2[1]))
+    
+    def get_match_probability(self, player1: str, player2: str, surface: str,
+                              snapshot: Optional[RatingSnapshot] = None) -> Optional[float]:
+        """Glicko-2 probability of player1 winning, shrunk toward 0.5 by both deviations"""
+        rating1 = self.get_player_rating(player1, surface, snapshot)
+        rating2 = self.get_player_rating(player2, surface, snapshot)
+        if rating1 is None or rating2 is None:
+            return None
+        return float(expected_score(rating1[0], rating1[1], rating2[0], rating2[1]))
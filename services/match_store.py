@@ -0,0 +1,267 @@
+# services/match_store.py
+import hashlib
+import json
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout or the projected columns change
+STORE_VERSION = 1
+
+CATEGORICAL_COLUMNS = ["Location", "Tournament", "Series", "Court", "Surface", "Round"]
+PLAYER_COLUMNS = ["Winner", "Loser"]
+
+def _as_categorical(values: pd.Series) -> pd.Categorical:
+    """Build a string categorical, keeping missing values as NaN"""
+    values = values.astype(object)
+    values = values.where(values.isna(), values.astype(str))
+    return pd.Categorical(values)
+
+def _string_array(values) -> np.ndarray:
+    """Fixed-width unicode array (no pickling needed in .npz files)"""
+    return np.asarray(list(values), dtype=str)
+
+def ingest_workbook(file_path: str) -> Dict[str, np.ndarray]:
+    """Parse one tennis-data workbook into compact typed column arrays"""
+    df = pd.read_excel(file_path)
+    df = df.rename(columns=lambda c: str(c).strip())
+    n_rows = len(df)
+    missing = pd.Series([None] * n_rows, dtype=object)
+    
+    arrays = {
+        "row": np.arange(n_rows, dtype=np.int32),
+        "Date": pd.to_datetime(df["Date"], errors="coerce").to_numpy(dtype="datetime64[ns]"),
+        "ATP": pd.to_numeric(df.get("ATP", missing), errors="coerce").fillna(-1).to_numpy(dtype=np.int16),
+    }
+    
+    for col in CATEGORICAL_COLUMNS:
+        cat = _as_categorical(df[col] if col in df.columns else missing)
+        arrays[f"{col}__codes"] = cat.codes
+        arrays[f"{col}__categories"] = _string_array(cat.categories)
+    
+    # Winner and Loser share one player table so their codes are comparable
+    players = _as_categorical(pd.concat([df["Winner"], df["Loser"]], ignore_index=True))
+    arrays["Winner__codes"] = players.codes[:n_rows]
+    arrays["Loser__codes"] = players.codes[n_rows:]
+    arrays["players"] = _string_array(players.categories)
+    
+    return arrays
+
+class MatchStore:
+    """Columnar cache of the yearly workbooks, re-parsed only when a file changes"""
+    
+    def __init__(self, data_dir: Optional[str] = None, store_dir: Optional[str] = None):
+        self.data_dir = data_dir or config.data_dir
+        self.store_dir = store_dir or config.match_store_dir
+        self.manifest_path = os.path.join(self.store_dir, "manifest.json")
+    
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 of a source workbook"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _unchanged(entry: Optional[Dict], stat: os.stat_result) -> bool:
+        """Whether a workbook still has the size and mtime recorded with its hash"""
+        return (entry is not None and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns)
+    
+    def source_hashes(self) -> Dict[str, str]:
+        """SHA-256 of every workbook, re-hashing only files whose size or mtime changed"""
+        previous = self._load_manifest()
+        hashes = {}
+        for file_path in self.source_files():
+            file_name = os.path.basename(file_path)
+            entry = previous.get(file_name)
+            if self._unchanged(entry, os.stat(file_path)):
+                hashes[file_name] = entry["sha256"]
+            else:
+                hashes[file_name] = self.file_hash(file_path)
+        return hashes
+    
+    def source_files(self) -> List[str]:
+        """Source workbooks, in file name (year) order"""
+        return sorted(glob(os.path.join(self.data_dir, "*.xls*")))
+    
+    def _entry_path(self, entry: Dict) -> str:
+        return os.path.join(self.store_dir, entry["file"])
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Load the per-file manifest, ignoring it if written by another version"""
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                if manifest.get("version") == STORE_VERSION:
+                    return manifest.get("files", {})
+                logger.info("Match store version changed, re-ingesting all workbooks")
+        except Exception as e:
+            logger.warning(f"Failed to read match store manifest: {e}")
+        return {}
+    
+    def _save_manifest(self, entries: Dict[str, Dict]):
+        """Atomically write the manifest"""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": STORE_VERSION, "files": entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _write_entry(self, file_name: str, digest: str, arrays: Dict[str, np.ndarray]) -> Dict:
+        """Persist the arrays of one workbook and return its manifest entry"""
+        entry = {
+            "sha256": digest,
+            "rows": int(len(arrays["row"])),
+            "file": os.path.splitext(file_name)[0] + ".npz",
+        }
+        tmp_path = self._entry_path(entry) + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self._entry_path(entry))
+        return entry
+    
+    def _ingest(self, pending: Dict[str, Tuple[str, str]],
+                workers: int) -> Iterator[Tuple[str, str, Optional[Dict[str, np.ndarray]]]]:
+        """Parse pending workbooks, fanning out over a process pool when useful"""
+        if workers <= 1 or len(pending) <= 1:
+            for file_name, (file_path, digest) in pending.items():
+                try:
+                    yield file_name, digest, ingest_workbook(file_path)
+                except Exception as e:
+                    logger.warning(f"Failed to load {file_path}: {e}")
+                    yield file_name, digest, None
+            return
+        
+        logger.info(f"Cold ingest of {len(pending)} workbooks on {min(workers, len(pending))} processes")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {
+                pool.submit(ingest_workbook, file_path): (file_name, file_path, digest)
+                for file_name, (file_path, digest) in pending.items()
+            }
+            for future in as_completed(futures):
+                file_name, file_path, digest = futures[future]
+                try:
+                    yield file_name, digest, future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to load {file_path}: {e}")
+                    yield file_name, digest, None
+    
+    def refresh(self, workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Bring the store in line with the workbooks, re-parsing only changed files"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        previous = self._load_manifest()
+        entries = {}
+        pending = {}
+        stats = {}
+        parsed = 0
+        
+        for file_path in self.source_files():
+            file_name = os.path.basename(file_path)
+            stat = os.stat(file_path)
+            entry = previous.get(file_name)
+            digest = entry["sha256"] if self._unchanged(entry, stat) else self.file_hash(file_path)
+            stats[file_name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            
+            if entry and entry["sha256"] == digest and os.path.exists(self._entry_path(entry)):
+                entries[file_name] = dict(entry, **stats[file_name])
+            else:
+                pending[file_name] = (file_path, digest)
+        
+        if workers is None:
+            workers = config.ingest_workers
+        for file_name, digest, arrays in self._ingest(pending, workers):
+            if arrays is None:
+                # A workbook that fails to parse (corrupt, or locked mid-download) keeps
+                # its last stored matches; its changed hash retries the parse next time
+                entry = previous.get(file_name)
+                if entry and os.path.exists(self._entry_path(entry)):
+                    logger.error(f"Could not parse {file_name}, keeping its previously stored matches")
+                    entries[file_name] = entry
+                else:
+                    logger.error(f"Could not parse {file_name}, its matches are missing from the store")
+                continue
+            entries[file_name] = dict(self._write_entry(file_name, digest, arrays), **stats[file_name])
+            parsed += 1
+            logger.debug(f"Ingested {entries[file_name]['rows']} matches from {file_name}")
+        
+        # Drop arrays of workbooks that no longer exist
+        for file_name, entry in previous.items():
+            if file_name not in entries and os.path.exists(self._entry_path(entry)):
+                os.remove(self._entry_path(entry))
+        
+        if parsed or entries != previous:
+            self._save_manifest(entries)
+        
+        logger.info(f"Match store ready: {len(entries)} files, {parsed} re-parsed")
+        return entries
+    
+    def entries(self) -> Dict[str, Dict]:
+        """Manifest entries of the stored workbooks, without refreshing"""
+        return self._load_manifest()
+    
+    def _read_entry(self, entry: Dict) -> Dict[str, np.ndarray]:
+        with np.load(self._entry_path(entry)) as data:
+            return {key: data[key] for key in data.files}
+    
+    def load(self, refresh: bool = True, workers: Optional[int] = None,
+             files: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load stored matches, in date order, as one frame with categorical text columns"""
+        entries = self.refresh(workers) if refresh else self._load_manifest()
+        if files is not None:
+            entries = {file_name: entry for file_name, entry in entries.items() if file_name in files}
+        if not entries:
+            return pd.DataFrame()
+        
+        parts = [(file_name, self._read_entry(entry)) for file_name, entry in sorted(entries.items())]
+        
+        # Global player table: remap each file's codes onto the sorted union
+        players = np.unique(np.concatenate([arrays["players"] for _, arrays in parts]))
+        player_columns = {col: [] for col in PLAYER_COLUMNS}
+        for _, arrays in parts:
+            remap = np.searchsorted(players, arrays["players"]).astype(np.int32)
+            for col in PLAYER_COLUMNS:
+                codes = arrays[f"{col}__codes"]
+                player_columns[col].append(np.where(codes >= 0, remap[codes], -1))
+        
+        data = {
+            "Date": np.concatenate([arrays["Date"] for _, arrays in parts]),
+            "ATP": np.concatenate([arrays["ATP"] for _, arrays in parts]),
+        }
+        for col in CATEGORICAL_COLUMNS:
+            data[col] = union_categoricals([
+                pd.Categorical.from_codes(arrays[f"{col}__codes"], arrays[f"{col}__categories"])
+                for _, arrays in parts
+            ])
+        for col in PLAYER_COLUMNS:
+            data[col] = pd.Categorical.from_codes(np.concatenate(player_columns[col]), players)
+        
+        data["file_year"] = pd.Categorical(np.concatenate([
+            np.full(len(arrays["row"]), file_name[:4]) for file_name, arrays in parts
+        ]))
+        data["row"] = np.concatenate([arrays["row"] for _, arrays in parts])
+        
+        # Stable sort keeps file/row order for matches played on the same day
+        return pd.DataFrame(data).sort_values("Date", kind="stable", ignore_index=True)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Refresh the columnar match store")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used to parse changed workbooks (default: all cores)")
+    args = parser.parse_args()
+    
+    entries = MatchStore().refresh(workers=args.workers)
+    print(f"{len(entries)} workbooks, {sum(e['rows'] for e in entries.values())} matches in store")
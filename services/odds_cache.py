@@ -0,0 +1,144 @@
+# services/odds_cache.py
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import json
+import logging
+import os
+import threading
+
+from config.settings import config
+from models.player import Match
+from services.event_store import EventStore, get_event_store
+
+logger = logging.getLogger(__name__)
+
+# Polls the API into the store; False when no fresh odds came back
+Poller = Callable[[EventStore], bool]
+Parser = Callable[[Dict], Optional[Match]]
+
+class OddsCache:
+    """Parsed odds served from memory, backed by a compact copy on disk
+    
+    The memory tier is the event store with its parsed Match objects; the
+    disk tier lets a restarted process resume from the last board and
+    polling cursor. Fresh odds are served as they are. Expired odds are
+    still served at once while a background thread refreshes them, but
+    only up to `max_stale_minutes` old: past that, or on a cold start,
+    the caller waits for the API and gets no matches if it fails. One
+    refresh runs at a time.
+    """
+    
+    def __init__(self, path: Optional[str] = None, store: Optional[EventStore] = None):
+        self.path = path or config.cache_file
+        self.store = store or get_event_store()
+        self.hits = 0           # served fresh from memory
+        self.stale = 0          # served expired while refreshing in the background
+        self.misses = 0         # nothing usable cached, the caller waited for the API
+        self.refresh_failures = 0
+        self._refresh_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+    
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def load(self, parse: Parser) -> bool:
+        """Fill an empty store from the disk tier"""
+        try:
+            with open(self.path, 'r') as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load cache: {e}")
+            return False
+        if not self.store.restore(cache, parse):
+            return False
+        logger.info(f"Restored {len(self.store)} cached events")
+        return True
+    
+    def save(self):
+        """Write the store to the disk tier, atomically"""
+        cache = {'timestamp': datetime.now().isoformat(), **self.store.to_dict()}
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(cache, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            logger.info("API data cached successfully")
+        except OSError as e:
+            logger.error(f"Failed to save cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def get(self, poll: Poller, parse: Parser) -> List[Match]:
+        """Current matches, refreshed behind the caller once they expire"""
+        store = self.store
+        if not store.loaded:
+            self.load(parse)
+        
+        if store.is_fresh(config.api.cache_duration_minutes * 60):
+            self._count("hits")
+            return store.current_matches()
+        
+        max_stale = config.api.max_stale_minutes * 60
+        if store.is_fresh(max_stale):
+            self._count("stale")
+            self.refresh_in_background(poll)
+            return store.current_matches()
+        
+        # Cold start or too stale: wait for a poll, or for the one already running
+        self._count("misses")
+        with self._refresh_lock:
+            if not store.is_fresh(max_stale):
+                self._refresh(poll)
+        if not store.is_fresh(max_stale):
+            logger.warning(f"No odds newer than {config.api.max_stale_minutes} minutes, serving none")
+            return []
+        return store.current_matches()
+    
+    def refresh_in_background(self, poll: Poller) -> bool:
+        """Start a refresh on a daemon thread unless one is already running"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        
+        def run():
+            try:
+                self._refresh(poll)
+            finally:
+                self._refresh_lock.release()
+        
+        threading.Thread(target=run, name="odds-refresh", daemon=True).start()
+        return True
+    
+    def _refresh(self, poll: Poller):
+        try:
+            polled = poll(self.store)
+        except Exception as e:
+            logger.error(f"Odds refresh failed: {e}")
+            polled = False
+        if polled:
+            self.save()
+        else:
+            self._count("refresh_failures")
+    
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "hits": self.hits,
+                "stale": self.stale,
+                "misses": self.misses,
+                "refresh_failures": self.refresh_failures,
+                "events": len(self.store)
+            }
+
+_cache: Optional[OddsCache] = None
+_cache_lock = threading.Lock()
+
+def get_odds_cache() -> OddsCache:
+    """Process-wide odds cache, shared by every APIService instance"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OddsCache()
+        return _cache
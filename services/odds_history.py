@@ -0,0 +1,367 @@
+# services/odds_history.py
+from datetime import datetime, timezone
+from glob import glob
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialised
+    fcntl = None
+
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Money-line sides of an event, stored as their index
+SIDES = ("home", "away")
+
+# Columns of every price row; event metadata is kept in a separate table per file
+PRICE_COLUMNS = ("event_id", "side", "timestamp", "price")
+EVENT_COLUMNS = ("id", "home", "away", "league", "starts")
+# Fixed-width strings, so the files load without pickling
+EVENT_DTYPES = {"id": np.int64, "home": str, "away": str, "league": str, "starts": np.float64}
+EVENT_KEYS = tuple(f"events__{c}" for c in EVENT_COLUMNS)
+
+# A day partition is compacted into one file once it has this many segments
+COMPACT_SEGMENTS = 32
+# Events that started less than this long ago may still be polled, so their last prices are seeded
+SEED_AFTER_START = 86400
+
+LOCK = ".lock"
+COMPACTED = "compacted.npz"
+INDEX = "index.npz"
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+def _starts(value) -> float:
+    """Epoch seconds of an event start time, NaN if unknown"""
+    starts = pd.to_datetime(value, errors='coerce', utc=True) if value else pd.NaT
+    return np.nan if pd.isna(starts) else starts.timestamp()
+
+def _dedupe(prices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Sort rows by event, side and time, and drop those repeating the previous price of their key"""
+    order = np.lexsort((prices["timestamp"], prices["side"], prices["event_id"]))
+    prices = {key: values[order] for key, values in prices.items()}
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = ((prices["event_id"][1:] != prices["event_id"][:-1])
+                | (prices["side"][1:] != prices["side"][:-1])
+                | (prices["price"][1:] != prices["price"][:-1]))
+    return {key: values[keep] for key, values in prices.items()}
+
+class OddsHistory:
+    """Append-only log of every polled money-line price, for line-movement queries
+    
+    Each append writes the prices that changed since the last one as a
+    compressed .npz segment of columns (event id, side, timestamp, price)
+    under a directory per UTC day, plus a small table of the events'
+    names and start times. Each day also keeps an index of the events
+    logged in it, so a query for one event only decompresses the days
+    that hold it. Reads load only the columns and days they need.
+    Finished days are compacted into a single file, and days older than
+    the retention period are deleted.
+    """
+    
+    def __init__(self, root: Optional[str] = None, retention_days: Optional[int] = None):
+        self.root = root or config.odds_history_dir
+        self.retention_days = retention_days or config.odds_history_retention_days
+        # Last logged price of every (event id, side), seeded from disk on first append
+        self._last: Optional[Dict[Tuple[int, int], float]] = None
+        self._maintained_day: Optional[str] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Event table of each day's index, with the index file's (mtime, size) it was read at
+        self._indexes: Dict[str, Tuple[Tuple[int, int], Dict[str, np.ndarray]]] = {}
+    
+    def _file_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        lock = open(os.path.join(self.root, LOCK), 'w')
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+    
+    def append(self, events: Iterable[Dict], timestamp: Optional[float] = None) -> int:
+        """Log the money-line prices of polled events that moved; returns the rows written"""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        rows: List[Tuple[int, int, float]] = []
+        metadata: Dict[int, Tuple[str, str, str, float]] = {}
+        with self._lock:
+            if self._last is None:
+                self._last = self._seed()
+            for event in events:
+                event_id = event.get("event_id")
+                money_line = event.get("periods", {}).get("num_0", {}).get("money_line") or {}
+                if event_id is None:
+                    continue
+                for side, name in enumerate(SIDES):
+                    price = money_line.get(name)
+                    if price is None or self._last.get((event_id, side)) == float(price):
+                        continue
+                    self._last[(event_id, side)] = float(price)
+                    rows.append((event_id, side, float(price)))
+                    metadata[event_id] = (event.get("home", ""), event.get("away", ""),
+                                          event.get("league_name", ""), _starts(event.get("starts")))
+            if not rows:
+                return 0
+            self._seq += 1
+            segment = f"{timestamp}-{os.getpid()}-{self._seq}.npz"
+        
+        event_ids, sides, prices = zip(*rows)
+        ids = list(metadata)
+        arrays = {
+            "event_id": np.asarray(event_ids, dtype=np.int64),
+            "side": np.asarray(sides, dtype=np.int8),
+            "timestamp": np.full(len(rows), timestamp, dtype=np.int64),
+            "price": np.asarray(prices, dtype=np.float64),
+            "events__id": np.asarray(ids, dtype=np.int64),
+            **{f"events__{c}": np.asarray([metadata[i][k] for i in ids], dtype=EVENT_DTYPES[c])
+               for k, c in enumerate(EVENT_COLUMNS[1:])}
+        }
+        day = _day(timestamp)
+        with self._file_lock():
+            day_dir = os.path.join(self.root, day)
+            os.makedirs(day_dir, exist_ok=True)
+            # Index first, so a reader never finds prices of an event its day does not list
+            self._write_index(day_dir, {key: arrays[key] for key in EVENT_KEYS})
+            self._write(os.path.join(day_dir, segment), arrays)
+            self._maintain(day)
+        return len(rows)
+    
+    @staticmethod
+    def _write(path: str, arrays: Dict[str, np.ndarray]):
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    
+    def _seed(self) -> Dict[Tuple[int, int], float]:
+        """Latest logged price of every event still polled, so a restarted process does not log them again
+        
+        Only the days holding events that have not started, or started
+        less than SEED_AFTER_START ago, are read.
+        """
+        table = self._event_table()
+        polled = table["events__id"][~(table["events__starts"] < time.time() - SEED_AFTER_START)]
+        if not len(polled):
+            return {}
+        prices = self._load_days(self._partitions_with(polled), PRICE_COLUMNS)
+        mask = np.isin(prices["event_id"], polled)
+        prices = {key: values[mask] for key, values in prices.items()}
+        if not len(prices["event_id"]):
+            return {}
+        order = np.lexsort((prices["timestamp"], prices["side"], prices["event_id"]))
+        last = {}
+        for event_id, side, price in zip(prices["event_id"][order].tolist(), prices["side"][order].tolist(),
+                                         prices["price"][order].tolist()):
+            last[(event_id, side)] = price
+        return last
+    
+    def _maintain(self, today: str):
+        """Compact finished days and crowded partitions, and drop expired days (file lock held)"""
+        if self._maintained_day != today:
+            self._maintained_day = today
+            self.prune(locked=True)
+            for day_dir in self._partitions():
+                if not os.path.exists(os.path.join(day_dir, INDEX)):
+                    self._write_index(day_dir)
+                if os.path.basename(day_dir) < today and len(self._segments(day_dir)) > 1:
+                    self._compact_day(day_dir)
+        today_dir = os.path.join(self.root, today)
+        if len(self._segments(today_dir)) >= COMPACT_SEGMENTS:
+            self._compact_day(today_dir)
+    
+    def compact(self):
+        """Merge every day's segments into one file per day"""
+        with self._file_lock():
+            for day_dir in self._partitions():
+                if len(self._segments(day_dir)) > 1:
+                    self._compact_day(day_dir)
+    
+    def _compact_day(self, day_dir: str):
+        segments = self._segments(day_dir)
+        arrays = self._read_files(segments, PRICE_COLUMNS + EVENT_KEYS)
+        prices = _dedupe({key: arrays[key] for key in PRICE_COLUMNS})
+        events = pd.DataFrame({c: arrays[f"events__{c}"] for c in EVENT_COLUMNS}).drop_duplicates("id", keep="last")
+        compacted = dict(prices, **{f"events__{c}": np.asarray(events[c].tolist(), dtype=EVENT_DTYPES[c])
+                                    for c in EVENT_COLUMNS})
+        self._write(os.path.join(day_dir, COMPACTED), compacted)
+        for segment in segments:
+            if os.path.basename(segment) != COMPACTED:
+                os.remove(segment)
+        logger.info(f"Compacted {len(segments)} odds segments of {os.path.basename(day_dir)} "
+                    f"into {len(prices['event_id'])} rows")
+    
+    def _write_index(self, day_dir: str, events: Optional[Dict[str, np.ndarray]] = None):
+        """Add events to a day's index, building it from the day's segments if it has none (file lock held)"""
+        index = self._read_index(day_dir)
+        if index is None:
+            index = self._read_files(self._segments(day_dir), EVENT_KEYS)
+        tables = [index] if events is None else [index, events]
+        arrays = {key: np.concatenate([table[key] for table in tables]) for key in EVENT_KEYS}
+        # Keep the latest metadata of each event
+        _, last = np.unique(arrays["events__id"][::-1], return_index=True)
+        keep = np.sort(len(arrays["events__id"]) - 1 - last)
+        self._write(os.path.join(day_dir, INDEX), {key: values[keep] for key, values in arrays.items()})
+    
+    def _read_index(self, day_dir: str) -> Optional[Dict[str, np.ndarray]]:
+        """Event table of a day's index, None for a day written before indexes were kept"""
+        path = os.path.join(day_dir, INDEX)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._indexes.get(day_dir)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with np.load(path) as npz:
+                index = {key: npz[key] for key in EVENT_KEYS}
+        except FileNotFoundError:
+            return None
+        self._indexes[day_dir] = (version, index)
+        return index
+    
+    def _partitions_with(self, event_ids: Iterable[int]) -> List[str]:
+        """Day directories that can hold prices of the events; unindexed days always can"""
+        event_ids = np.asarray(list(event_ids), dtype=np.int64)
+        day_dirs = []
+        for day_dir in self._partitions():
+            index = self._read_index(day_dir)
+            if index is None or np.isin(index["events__id"], event_ids).any():
+                day_dirs.append(day_dir)
+        return day_dirs
+    
+    def _event_table(self) -> Dict[str, np.ndarray]:
+        """Event metadata of every day, oldest first, read from the indexes where they exist"""
+        tables = []
+        for day_dir in self._partitions():
+            index = self._read_index(day_dir)
+            tables.append(index if index is not None else self._read_files(self._segments(day_dir), EVENT_KEYS))
+        if not tables:
+            return self._read_files([], EVENT_KEYS)
+        return {key: np.concatenate([table[key] for table in tables]) for key in EVENT_KEYS}
+    
+    def prune(self, now: Optional[float] = None, locked: bool = False) -> int:
+        """Delete the days older than the retention period; returns how many were deleted"""
+        cutoff = _day((now if now is not None else time.time()) - self.retention_days * 86400)
+        lock = None if locked else self._file_lock()
+        try:
+            expired = [d for d in self._partitions() if os.path.basename(d) < cutoff]
+            for day_dir in expired:
+                shutil.rmtree(day_dir, ignore_errors=True)
+                self._indexes.pop(day_dir, None)
+        finally:
+            if lock is not None:
+                lock.close()
+        if expired:
+            logger.info(f"Dropped {len(expired)} days of odds history older than {cutoff}")
+        return len(expired)
+    
+    def _partitions(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Day directories, oldest first, optionally only those overlapping [start, end]"""
+        day_dirs = sorted(d for d in glob(os.path.join(self.root, "????-??-??")) if os.path.isdir(d))
+        if start is not None:
+            day_dirs = [d for d in day_dirs if os.path.basename(d) >= _day(start)]
+        if end is not None:
+            day_dirs = [d for d in day_dirs if os.path.basename(d) <= _day(end)]
+        return day_dirs
+    
+    @staticmethod
+    def _segments(day_dir: str) -> List[str]:
+        return sorted(p for p in glob(os.path.join(day_dir, "*.npz"))
+                      if not p.endswith(".tmp.npz") and os.path.basename(p) != INDEX)
+    
+    @staticmethod
+    def _read_files(paths: List[str], columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Concatenated columns of several files; files removed by a concurrent compaction are skipped"""
+        columns = tuple(columns)
+        parts = {column: [] for column in columns}
+        for path in paths:
+            try:
+                with np.load(path) as npz:
+                    for column in columns:
+                        parts[column].append(npz[column])
+            except FileNotFoundError:
+                continue
+        empty = {"side": np.int8, "event_id": np.int64, "timestamp": np.int64, "events__id": np.int64}
+        return {column: np.concatenate(values) if values else np.empty(0, dtype=empty.get(column, np.float64))
+                for column, values in parts.items()}
+    
+    def _load(self, columns: Iterable[str] = PRICE_COLUMNS, start: Optional[float] = None,
+              end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        return self._load_days(self._partitions(start, end), columns)
+    
+    def _load_days(self, day_dirs: List[str], columns: Iterable[str] = PRICE_COLUMNS) -> Dict[str, np.ndarray]:
+        return self._read_files([p for d in day_dirs for p in self._segments(d)], columns)
+    
+    @staticmethod
+    def _frame(prices: Dict[str, np.ndarray]) -> pd.DataFrame:
+        # A segment read twice during a compaction shows up as repeated rows
+        df = pd.DataFrame({
+            "event_id": prices["event_id"],
+            "side": pd.Categorical.from_codes(prices["side"], SIDES),
+            "timestamp": pd.to_datetime(prices["timestamp"], unit="s", utc=True),
+            "price": prices["price"]
+        }).drop_duplicates(["event_id", "side", "timestamp"])
+        return df.sort_values(["event_id", "side", "timestamp"], kind="stable").reset_index(drop=True)
+    
+    def price_path(self, event_id: int) -> pd.DataFrame:
+        """Every logged price of an event, per side in time order"""
+        prices = self._load_days(self._partitions_with([event_id]))
+        mask = prices["event_id"] == event_id
+        return self._frame({key: values[mask] for key, values in prices.items()})
+    
+    def window(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Every price logged in [start, end), across events"""
+        start_ts, end_ts = pd.Timestamp(start).timestamp(), pd.Timestamp(end).timestamp()
+        prices = self._load(start=start_ts, end=end_ts)
+        mask = (prices["timestamp"] >= start_ts) & (prices["timestamp"] < end_ts)
+        return self._frame({key: values[mask] for key, values in prices.items()})
+    
+    def events(self, event_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Names, league and start time of logged events, indexed by event id"""
+        arrays = self._event_table()
+        df = pd.DataFrame({c: arrays[f"events__{c}"] for c in EVENT_COLUMNS})
+        df = df.drop_duplicates("id", keep="last").set_index("id")
+        df["starts"] = pd.to_datetime(df["starts"], unit="s", utc=True)
+        return df if event_ids is None else df.reindex(list(event_ids))
+    
+    def opening_closing(self, event_id: int) -> pd.DataFrame:
+        """Opening and closing price of each side of an event
+        
+        The closing price is the last one logged before the event started,
+        or the last one logged at all when the start time is unknown.
+        """
+        path = self.price_path(event_id)
+        starts = self.events([event_id])["starts"].iloc[0]
+        rows = {}
+        for side, prices in path.groupby("side", observed=True):
+            before = prices if pd.isna(starts) else prices[prices["timestamp"] <= starts]
+            closing = before.iloc[-1] if len(before) else prices.iloc[-1]
+            rows[side] = {
+                "opening": prices["price"].iloc[0],
+                "opening_time": prices["timestamp"].iloc[0],
+                "closing": closing["price"],
+                "closing_time": closing["timestamp"],
+                "moves": len(prices) - 1
+            }
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+_history: Optional[OddsHistory] = None
+_history_lock = threading.Lock()
+
+def get_odds_history() -> OddsHistory:
+    """Process-wide odds history, so the last logged prices are shared"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = OddsHistory()
+        return _history
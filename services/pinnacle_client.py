@@ -0,0 +1,163 @@
+# services/pinnacle_client.py
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import config
+from services.circuit_breaker import CircuitBreaker, CircuitOpen
+from services.rate_limiter import RateLimitExceeded, TokenBucket, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Pinnacle odds API endpoints
+ENDPOINTS = {
+    "markets": "/kit/v1/markets",
+    "special_markets": "/kit/v1/special-markets",
+    "settled": "/kit/v1/archive"
+}
+
+TENNIS_SPORT_ID = 2
+
+def _run(coro):
+    """Run a coroutine to completion from synchronous code
+    
+    Streamlit scripts have no running loop and get a fresh one; a caller
+    already inside a loop (e.g. a notebook) gets one on a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+class PinnacleClient:
+    """Pinnacle odds API client sharing one keep-alive connection pool
+    
+    Every request goes through a single requests.Session, so consecutive
+    and concurrent calls reuse open TLS connections instead of handshaking
+    each time. The async methods run requests on a pool of worker threads, so several
+    endpoints or sport ids are fetched at once, and back off between
+    retries with asyncio.sleep. Every attempt draws on the rate limiter
+    shared by all processes. request() and fetch_all() are the synchronous
+    facade for existing callers.
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 host: Optional[str] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, pool_size: Optional[int] = None,
+                 limiter: Optional[TokenBucket] = None):
+        host = host or config.api.pinnacle_host
+        self.base_url = (base_url or config.api.base_url or f"https://{host}").rstrip("/")
+        self.timeout = timeout or config.api.request_timeout
+        self.max_retries = max_retries or config.api.max_retries
+        self.pool_size = pool_size or config.api.pool_size
+        self.limiter = limiter or get_rate_limiter()
+        self.breaker = CircuitBreaker(config.api.breaker_failures, config.api.breaker_reset_seconds)
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "X-RapidAPI-Key": api_key if api_key is not None else config.api.pinnacle_api_key,
+            "X-RapidAPI-Host": host
+        })
+        # Sized like the connection pool: asyncio's default executor has only
+        # cpu_count + 4 threads, which would queue requests on small hosts
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="pinnacle")
+        self.requests_sent = 0
+        self._count_lock = threading.Lock()
+    
+    def url(self, path: str) -> str:
+        """Absolute URL of an endpoint name, an API path or an absolute URL"""
+        path = ENDPOINTS.get(path, path)
+        return path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+    
+    def _get(self, url: str, params: Optional[Dict], wait: Optional[float]) -> Dict:
+        if not self.limiter.acquire(timeout=wait):
+            raise RateLimitExceeded(f"No request token within {wait} s for {url}")
+        with self._count_lock:
+            self.requests_sent += 1
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get(self, path: str, params: Optional[Dict] = None,
+                  wait: Optional[float] = None) -> Optional[Dict]:
+        """JSON body of one GET, retried with exponential backoff; None once every attempt failed
+        
+        Every attempt takes a token from the shared rate limiter, waiting
+        up to `wait` seconds for one (forever if None). RateLimitExceeded is
+        raised when none came, and CircuitOpen while the breaker holds calls
+        back after repeated failures, so callers can fall back to cached odds.
+        """
+        url = self.url(path)
+        if not self.breaker.allow():
+            raise CircuitOpen(f"API calls held back after {self.breaker.failures} failures: {url}")
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries):
+            try:
+                logger.debug(f"API request attempt {attempt + 1}: {url}")
+                body = await loop.run_in_executor(self._executor, self._get, url, params, wait)
+                self.breaker.record_success()
+                return body
+            except RateLimitExceeded:
+                self.breaker.release()
+                raise
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning(f"API request failed (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        logger.error(f"All API retry attempts failed for {url}")
+        self.breaker.record_failure()
+        return None
+    
+    async def get_many(self, requests_by_key: Dict[str, Tuple[str, Optional[Dict]]],
+                       wait: Optional[float] = None) -> Dict[str, Optional[Dict]]:
+        """Run several (path, params) requests concurrently, keyed like the input"""
+        keys = list(requests_by_key)
+        bodies = await asyncio.gather(*(
+            self.get(path, params, wait) for path, params in requests_by_key.values()
+        ))
+        return dict(zip(keys, bodies))
+    
+    def request(self, path: str, params: Optional[Dict] = None,
+                wait: Optional[float] = None) -> Optional[Dict]:
+        """Synchronous get()"""
+        return _run(self.get(path, params, wait))
+    
+    def fetch_all(self, requests_by_key: Dict[str, Tuple[str, Optional[Dict]]],
+                  wait: Optional[float] = None) -> Dict[str, Optional[Dict]]:
+        """Synchronous get_many()"""
+        return _run(self.get_many(requests_by_key, wait))
+    
+    def fetch_board(self, endpoints: Iterable[str] = ("markets",),
+                    sport_ids: Iterable[int] = (TENNIS_SPORT_ID,),
+                    wait: Optional[float] = None) -> Dict[Tuple[str, int], Optional[Dict]]:
+        """Every endpoint for every sport id at once, keyed by (endpoint, sport_id)"""
+        pairs = [(endpoint, sport_id) for endpoint in endpoints for sport_id in sport_ids]
+        bodies = self.fetch_all({f"{endpoint}:{sport_id}": (endpoint, {"sport_id": sport_id})
+                                 for endpoint, sport_id in pairs}, wait)
+        return {pair: bodies[f"{pair[0]}:{pair[1]}"] for pair in pairs}
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+_client: Optional[PinnacleClient] = None
+_client_lock = threading.Lock()
+
+def get_pinnacle_client() -> PinnacleClient:
+    """Process-wide client, so every caller shares the same connection pool"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PinnacleClient()
+        return _client
@@ -0,0 +1,118 @@
+# services/player_index.py
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from utils.name_normalization import NameNormalizer
+
+logger = logging.getLogger(__name__)
+
+def clean_key(name: str) -> str:
+    """The comparison form NameNormalizer.fuzzy_match_score works on"""
+    return NameNormalizer.remove_accents(name).lower().replace(".", "")
+
+def trigrams(text: str) -> List[str]:
+    """Distinct character trigrams of a cleaned name"""
+    return list({text[i:i + 3] for i in range(len(text) - 2)})
+
+class PlayerIndex:
+    """Fuzzy player lookup over the rating state names
+    
+    Gives the same answer as scoring every stored name with
+    NameNormalizer.fuzzy_match_score and keeping the first one at or above
+    0.8: an equal cleaned name wins, otherwise the lowest id whose cleaned
+    name contains, or is contained in, the query. Candidates come from
+    character-trigram postings, so only a handful of names are scored.
+    """
+    
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.keys = [clean_key(name) for name in self.names]
+        
+        # First id of every cleaned name
+        self.exact: Dict[str, int] = {}
+        postings = defaultdict(list)
+        last_names = defaultdict(list)
+        n_trigrams = np.zeros(len(self.keys), dtype=np.int64)
+        self.short_ids: List[int] = []
+        
+        for player_id, key in enumerate(self.keys):
+            self.exact.setdefault(key, player_id)
+            grams = trigrams(key)
+            n_trigrams[player_id] = len(grams)
+            if not grams:
+                self.short_ids.append(player_id)
+            for gram in grams:
+                postings[gram].append(player_id)
+            if key:
+                last_names[key.split()[0]].append(player_id)
+        
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self.last_names = dict(last_names)
+        self.n_trigrams = n_trigrams
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def _containing(self, grams: List[str]) -> np.ndarray:
+        """Ids whose names hold every trigram of the query"""
+        lists = sorted((self.postings.get(gram) for gram in grams), key=lambda ids: 0 if ids is None else len(ids))
+        if lists[0] is None:
+            return np.zeros(0, dtype=np.int64)
+        ids = lists[0]
+        for other in lists[1:]:
+            if len(ids) == 0:
+                break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+    
+    def _contained(self, grams: List[str]) -> np.ndarray:
+        """Ids whose trigrams all appear in the query"""
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.zeros(0, dtype=np.int64)
+        ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        return ids[counts == self.n_trigrams[ids]]
+    
+    def lookup(self, name: str) -> Optional[int]:
+        """Id of the best fuzzy match for an Excel-format name, if any"""
+        key = clean_key(name)
+        if not key:
+            return None
+        player_id = self.exact.get(key)
+        if player_id is not None:
+            return player_id
+        
+        grams = trigrams(key)
+        if grams:
+            candidates = np.union1d(self._containing(grams), self._contained(grams))
+        else:
+            # Queries under three characters carry no trigram to look up
+            candidates = range(len(self.keys))
+        
+        best = None
+        for candidate in candidates:
+            stored = self.keys[candidate]
+            if key in stored or stored in key:
+                best = int(candidate)
+                break
+        for candidate in self.short_ids:
+            if best is not None and candidate >= best:
+                break
+            if self.keys[candidate] in key:
+                best = candidate
+                break
+        return best
+    
+    def lookup_many(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """lookup() for a batch of names, each distinct name resolved once"""
+        return {name: self.lookup(name) for name in dict.fromkeys(names)}
+    
+    def same_last_name(self, name: str, limit: int = 5) -> List[str]:
+        """Stored names sharing the query's last name, for diagnostics"""
+        key = clean_key(name)
+        if not key:
+            return []
+        return [self.names[player_id] for player_id in self.last_names.get(key.split()[0], [])[:limit]]
@@ -0,0 +1,215 @@
+# services/player_registry.py
+from typing import Dict, Iterable, List, Optional, Set
+import json
+import logging
+import os
+import threading
+
+from config.settings import config
+from services.player_index import PlayerIndex
+from utils.name_normalization import NameNormalizer
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the registry layout changes
+REGISTRY_VERSION = 1
+
+# How an alias was first resolved
+WORKBOOK, NORMALIZED, FUZZY, MANUAL = "workbook", "normalized", "fuzzy", "manual"
+
+class PlayerRegistry:
+    """Stable player ids and every alias ever seen for them
+    
+    Each player has an integer id and a canonical name, the Excel-format name
+    the rating state uses. Every raw name met by the Elo replay, the API or
+    the bet history is stored as an alias with the way it was resolved, so
+    later runs resolve it with one dict lookup and fuzzy matching only runs
+    for names never seen before. Learning names and taking the snapshot
+    to save are serialised by a lock; lookup() never learns, for read paths.
+    """
+    
+    def __init__(self, players: Optional[List[str]] = None,
+                 aliases: Optional[Dict[str, List]] = None, revision: int = 0):
+        self.players: List[str] = players or []
+        self.canonical_ids: Dict[str, int] = {name: player_id for player_id, name in enumerate(self.players)}
+        self.aliases: Dict[str, int] = {}
+        self.methods: Dict[str, str] = {}
+        for alias, (player_id, method) in (aliases or {}).items():
+            self.aliases[alias] = player_id
+            self.methods[alias] = method
+        # Bumped when an existing alias is re-pointed, which changes past replays
+        self.revision = revision
+        self.dirty = False
+        self._index: Optional[PlayerIndex] = None
+        self._unknown: Set[str] = set()
+        # Held while aliases or players change; _save_lock orders the writes of concurrent saves
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.players)
+    
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "PlayerRegistry":
+        """Registry file, or an empty registry when missing or unreadable"""
+        path = path or config.player_registry_file
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == REGISTRY_VERSION:
+                    return cls(data["players"], data["aliases"], data.get("revision", 0))
+                logger.warning(f"Player registry {path} has an old layout, starting a new one")
+        except Exception as e:
+            logger.warning(f"Failed to load player registry: {e}")
+        return cls()
+    
+    def save(self, path: Optional[str] = None):
+        """Atomically write the registry as JSON when it learned something"""
+        path = path or config.player_registry_file
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                snapshot = {
+                    "version": REGISTRY_VERSION,
+                    "revision": self.revision,
+                    "players": list(self.players),
+                    "aliases": {alias: [player_id, self.methods[alias]]
+                                for alias, player_id in sorted(self.aliases.items())}
+                }
+                self.dirty = False
+            
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot, f, indent=0, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.error(f"Failed to save player registry: {e}")
+                self.dirty = True
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    @property
+    def index(self) -> PlayerIndex:
+        """Fuzzy lookup index over the canonical names, built on first miss"""
+        with self._lock:
+            if self._index is None:
+                self._index = PlayerIndex(self.players)
+            return self._index
+    
+    def _remember(self, alias: str, player_id: int, method: str):
+        self.aliases[alias] = player_id
+        self.methods[alias] = method
+        self.dirty = True
+    
+    def _add_player(self, name: str) -> int:
+        player_id = len(self.players)
+        self.players.append(name)
+        self.canonical_ids[name] = player_id
+        self._index = None
+        self._unknown.clear()
+        return player_id
+    
+    def canonical(self, player_id: int) -> str:
+        return self.players[player_id]
+    
+    def lookup(self, name: str) -> Optional[int]:
+        """Id of a player from a known alias or canonical name, without learning anything"""
+        player_id = self.aliases.get(name)
+        if player_id is not None or not name:
+            return player_id
+        return self.canonical_ids.get(NameNormalizer.normalize_excel_format(name))
+    
+    def resolve(self, name: str) -> Optional[int]:
+        """Id of a player from any alias, learning names seen for the first time"""
+        player_id = self.aliases.get(name)
+        if player_id is not None or not name or name in self._unknown:
+            return player_id
+        with self._lock:
+            return self._learn(name)
+    
+    def _learn(self, name: str) -> Optional[int]:
+        player_id = self.aliases.get(name)
+        if player_id is not None or name in self._unknown:
+            return player_id
+        
+        normalized_name = NameNormalizer.normalize_excel_format(name)
+        player_id = self.canonical_ids.get(normalized_name)
+        if player_id is not None:
+            self._remember(name, player_id, NORMALIZED)
+            return player_id
+        
+        player_id = self.index.lookup(normalized_name)
+        if player_id is None:
+            similar = self.index.same_last_name(normalized_name)
+            logger.warning(f"Player not found: {name}"
+                           + (f" (same last name: {', '.join(similar)})" if similar else ""))
+            self._unknown.add(name)
+            return None
+        
+        logger.info(f"Fuzzy matched '{name}' to '{self.players[player_id]}'")
+        self._remember(name, player_id, FUZZY)
+        return player_id
+    
+    def resolve_many(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """resolve() for a batch of names, each distinct name resolved once"""
+        return {name: self.resolve(name) for name in dict.fromkeys(names)}
+    
+    def canonical_name(self, name: str) -> str:
+        """Canonical name of an alias, or its Excel-format name when unknown"""
+        player_id = self.resolve(name)
+        if player_id is None:
+            return NameNormalizer.normalize_excel_format(name)
+        return self.players[player_id]
+    
+    def register_workbook_names(self, raw_names: List[str], normalized: List[str]) -> List[str]:
+        """Canonical names of workbook names, adding players never seen before
+        
+        Workbook names are authoritative and never fuzzy matched: a name
+        without an alias becomes its own player under its normalized name.
+        """
+        canonical = []
+        with self._lock:
+            for raw_name, normalized_name in zip(raw_names, normalized):
+                player_id = self.aliases.get(raw_name)
+                if player_id is None:
+                    player_id = self.canonical_ids.get(normalized_name)
+                    if player_id is None:
+                        player_id = self._add_player(normalized_name)
+                    self._remember(raw_name, player_id, WORKBOOK)
+                canonical.append(self.players[player_id])
+        return canonical
+    
+    def link(self, alias: str, name: str) -> int:
+        """Point an alias at the player behind `name`, overriding what was learned"""
+        with self._lock:
+            player_id = self.resolve(name)
+            if player_id is None:
+                raise ValueError(f"Unknown player: {name}")
+            if self.aliases.get(alias) not in (None, player_id):
+                self.revision += 1
+            self._unknown.discard(alias)
+            self._remember(alias, player_id, MANUAL)
+        return player_id
+    
+    def stats(self) -> Dict[str, int]:
+        """Alias counts per resolution method"""
+        with self._lock:
+            methods = list(self.methods.values())
+            counts = {"players": len(self.players), "aliases": len(self.aliases)}
+        for method in methods:
+            counts[method] = counts.get(method, 0) + 1
+        return counts
+
+_registry: Optional[PlayerRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_player_registry() -> PlayerRegistry:
+    """Process-wide registry shared by the Elo, API and betting paths"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PlayerRegistry.load()
+        return _registry
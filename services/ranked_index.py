@@ -0,0 +1,91 @@
+# services/ranked_index.py
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.elo_engine import SURFACES, RatingState
+from services.rating_history import N_SURFACES, RatingHistory
+
+# Ranked columns: the three surfaces plus the overall blend
+RANKED_SURFACES = SURFACES + ["Overall"]
+
+# Days per month when turning an activity window into days
+DAYS_PER_MONTH = 30.4375
+
+@dataclass
+class RankedIndex:
+    """Players ordered by rating on every surface, built once per snapshot
+    
+    ``order[s]`` lists player ids from best to worst on surface ``s`` and
+    ``ranks[s]`` is its inverse, so top-N is a slice and a player's rank an
+    array lookup. Activity filters count back from the latest match in the
+    ratings, not from today.
+    """
+    order: Dict[str, np.ndarray]      # surface -> player ids, best first
+    ranks: Dict[str, np.ndarray]      # surface -> 0-based rank of each player id
+    last_played: np.ndarray           # (players,) day of each player's last match, -1 if none
+    latest_day: int                   # day of the latest match in the ratings
+    
+    @classmethod
+    def build(cls, state: RatingState, history: RatingHistory) -> "RankedIndex":
+        order, ranks = {}, {}
+        for surface in RANKED_SURFACES:
+            # Stable sort: equal ratings keep player id order
+            ids = np.argsort(-state.surface_column(surface), kind='stable')
+            rank = np.empty(len(ids), dtype=np.int64)
+            rank[ids] = np.arange(len(ids))
+            order[surface], ranks[surface] = ids, rank
+        
+        # Last event of each (player, surface) series, then the latest per player
+        last_played = np.full(len(state), -1, dtype=np.int64)
+        if history.n_players and len(history.days):
+            ends = np.asarray(history.series_ptr[1:])
+            played = ends > np.asarray(history.series_ptr[:-1])
+            series_last = np.full(len(ends), -1, dtype=np.int64)
+            series_last[played] = np.asarray(history.days)[ends[played] - 1]
+            per_player = series_last.reshape(-1, N_SURFACES).max(axis=1)
+            n = min(len(per_player), len(state))
+            last_played[:n] = per_player[:n]
+        return cls(order, ranks, last_played, int(last_played.max()) if len(last_played) else -1)
+    
+    def __len__(self) -> int:
+        return len(self.last_played)
+    
+    def _column(self, surface: str) -> str:
+        return surface if surface in self.order else "Overall"
+    
+    def active(self, months: float) -> np.ndarray:
+        """Players who played within `months` of the latest match"""
+        return self.last_played >= self.latest_day - months * DAYS_PER_MONTH
+    
+    def top(self, surface: str, n: int, active_months: Optional[float] = None) -> np.ndarray:
+        """Ids of the n best players on a surface"""
+        order = self.order[self._column(surface)]
+        if active_months is None:
+            return order[:n]
+        return order[self.active(active_months)[order]][:n]
+    
+    def rank(self, player_id: int, surface: str, active_months: Optional[float] = None) -> Optional[int]:
+        """1-based rank of a player, among active players only when `active_months` is given"""
+        column = self._column(surface)
+        position = int(self.ranks[column][player_id])
+        if active_months is None:
+            return position + 1
+        active = self.active(active_months)
+        if not active[player_id]:
+            return None
+        return int(np.count_nonzero(active[self.order[column][:position]])) + 1
+    
+    def field_size(self, active_months: Optional[float] = None) -> int:
+        """Number of ranked players, active ones only when `active_months` is given"""
+        if active_months is None:
+            return len(self)
+        return int(np.count_nonzero(self.active(active_months)))
+    
+    def percentile(self, player_id: int, surface: str, active_months: Optional[float] = None) -> Optional[float]:
+        """Share of the ranked players rated below this one, in percent"""
+        rank = self.rank(player_id, surface, active_months)
+        if rank is None:
+            return None
+        return 100.0 * (self.field_size(active_months) - rank) / self.field_size(active_months)
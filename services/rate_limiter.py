@@ -0,0 +1,108 @@
+# services/rate_limiter.py
+from contextlib import contextmanager
+from typing import Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised
+    fcntl = None
+
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceeded(Exception):
+    """No API request token became available in time"""
+
+class TokenBucket:
+    """Token bucket shared by every thread and process through a small state file
+    
+    The file holds the token count and when it was last refilled. Every
+    acquisition locks it, refills the tokens for the time elapsed, takes
+    what it needs and writes the new count back, so the dashboard workers
+    and the cron job draw from one quota. Up to `capacity` requests can go
+    out at once; after that one token comes back every
+    3600 / `per_hour` seconds.
+    """
+    
+    def __init__(self, path: str, per_hour: float, capacity: float):
+        self.path = path
+        self.rate = per_hour / 3600.0
+        self.capacity = float(capacity)
+        self._lock = threading.Lock()
+    
+    def _read(self, f, now: float) -> Tuple[float, float]:
+        f.seek(0)
+        try:
+            state = json.loads(f.read() or "{}")
+            return min(float(state["tokens"]), self.capacity), float(state["updated"])
+        except (ValueError, KeyError, TypeError):
+            # No or unreadable state: start from a full bucket
+            return self.capacity, now
+    
+    def _write(self, f, tokens: float, updated: float):
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({"tokens": tokens, "updated": updated}))
+        f.flush()
+    
+    @contextmanager
+    def _locked(self):
+        """The state file, exclusively locked, and the tokens refilled up to now"""
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                now = time.time()
+                tokens, updated = self._read(f, now)
+                yield f, min(self.capacity, tokens + max(0.0, now - updated) * self.rate), now
+    
+    def _take(self, tokens: float) -> float:
+        """Take `tokens` if available and return 0, else return the seconds until they will be"""
+        with self._locked() as (f, available, now):
+            if available >= tokens:
+                self._write(f, available - tokens, now)
+                return 0.0
+            self._write(f, available, now)
+            return (tokens - available) / self.rate
+    
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens without waiting; False if the bucket is short of them"""
+        return self._take(tokens) == 0.0
+    
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Take tokens, waiting up to `timeout` seconds for them (forever if None)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    return False
+            logger.info(f"Rate limit reached. Waiting {wait:.1f} seconds")
+            time.sleep(wait)
+    
+    def available(self) -> float:
+        """Tokens currently in the bucket, without taking any"""
+        with self._locked() as (_f, available, _now):
+            return available
+
+_limiter: Optional[TokenBucket] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> TokenBucket:
+    """Process-wide limiter over the shared Pinnacle API quota"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(config.rate_limit_file, config.api.requests_per_hour,
+                                   config.api.request_burst)
+        return _limiter
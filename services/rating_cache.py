@@ -0,0 +1,197 @@
+# services/rating_cache.py
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialised
+    fcntl = None
+
+from config.settings import config
+from services.elo_checkpoint import state_arrays, state_from_arrays
+from services.elo_engine import RatingState
+from services.glicko_engine import GlickoState
+from services.rating_ensemble import RatingEnsemble
+from services.rating_history import RatingHistory
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the cache layout changes
+CACHE_VERSION = 2
+
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+
+def cache_fingerprint(file_hashes: Dict[str, str], params: str) -> str:
+    """Fingerprint of the workbooks and Elo parameters a set of ratings was computed from"""
+    digest = hashlib.sha256(f"v{CACHE_VERSION};{params};".encode())
+    for file_name in sorted(file_hashes):
+        digest.update(f"{file_name}:{file_hashes[file_name]};".encode())
+    return digest.hexdigest()
+
+def _read_manifest(manifest_path: str) -> Dict:
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+@dataclass
+class RatingCache:
+    """Service ratings, their history, ensemble, Glicko-2 state and the elo_probs.csv ratings as .npy arrays
+    
+    Every array is its own file, so a load memory-maps them instead of
+    reading them: the history pages are only touched by as-of queries, and
+    every process that maps them shares the same page-cache pages.
+    The manifest is written last and names the files of one fingerprint,
+    so a reader never mixes arrays of two different builds. Each publish
+    bumps the manifest generation.
+    """
+    state: RatingState
+    csv_state: Optional[RatingState]
+    history: RatingHistory
+    timestamp: datetime
+    fingerprint: str = ""
+    generation: int = 0
+    ensemble: Optional[RatingEnsemble] = None
+    glicko: Optional[GlickoState] = None
+    
+    def save(self, cache_dir: str, fingerprint: str):
+        """Write the arrays, then atomically publish them as the next generation"""
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, LOCK), 'w') as lock:
+            # One writer at a time, so generations are never handed out twice
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._publish(cache_dir, fingerprint)
+    
+    def _publish(self, cache_dir: str, fingerprint: str):
+        manifest_path = os.path.join(cache_dir, MANIFEST)
+        self.fingerprint = fingerprint
+        self.generation = _read_manifest(manifest_path).get("generation", 0) + 1
+        arrays = {**state_arrays(self.state), **self.history.to_arrays()}
+        if self.csv_state is not None:
+            arrays.update(state_arrays(self.csv_state, prefix="csv_"))
+        if self.ensemble is not None:
+            arrays.update(self.ensemble.to_arrays())
+        if self.glicko is not None:
+            arrays.update(self.glicko.to_arrays())
+        
+        files = {}
+        for key, array in arrays.items():
+            files[key] = f"{fingerprint[:16]}.{key}.npy"
+            # A new inode per file, so arrays mapped by another reader stay intact
+            path = os.path.join(cache_dir, files[key])
+            with open(path + ".tmp", 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(path + ".tmp", path)
+        
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "fingerprint": fingerprint,
+                "generation": self.generation,
+                "timestamp": self.timestamp.isoformat(),
+                "files": files
+            }, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+        
+        # Arrays of older builds; readers that mapped them keep their pages
+        for file_name in os.listdir(cache_dir):
+            if file_name.endswith(".npy") and file_name not in files.values():
+                os.remove(os.path.join(cache_dir, file_name))
+    
+    @classmethod
+    def load(cls, cache_dir: str, fingerprint: Optional[str] = None) -> Optional["RatingCache"]:
+        """Memory-map the published ratings
+        
+        With `fingerprint`, returns None unless they were built from exactly
+        those inputs; without it, attaches to whatever was published last.
+        """
+        manifest_path = os.path.join(cache_dir, MANIFEST)
+        try:
+            if not os.path.exists(manifest_path):
+                return None
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("version") != CACHE_VERSION:
+                logger.info("Rating cache layout changed, ignoring it")
+                return None
+            if fingerprint is not None and manifest.get("fingerprint") != fingerprint:
+                logger.info("Rating cache was built from other data or parameters, ignoring it")
+                return None
+            
+            arrays = {key: np.load(os.path.join(cache_dir, file_name), mmap_mode='r')
+                      for key, file_name in manifest["files"].items()}
+            return cls(
+                state=state_from_arrays(arrays),
+                csv_state=state_from_arrays(arrays, prefix="csv_") if "csv_names" in arrays else None,
+                history=RatingHistory.from_arrays(arrays),
+                timestamp=datetime.fromisoformat(manifest["timestamp"]),
+                fingerprint=manifest["fingerprint"],
+                generation=manifest.get("generation", 0),
+                ensemble=RatingEnsemble.from_arrays(arrays),
+                glicko=GlickoState.from_arrays(arrays)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load rating cache: {e}")
+            return None
+
+class SharedRatings:
+    """Read-only handle on the published rating cache, shared by every process
+    
+    Dashboard workers and batch scripts attach to the same memory-mapped
+    arrays instead of each loading a copy. get() costs one stat of the
+    manifest and re-attaches only when a writer published a new generation.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or config.rating_cache_dir
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._cache: Optional[RatingCache] = None
+    
+    def _manifest_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        # The manifest is replaced, never rewritten, so a new generation has a new inode
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def get(self) -> Optional[RatingCache]:
+        """Ratings of the latest published generation, or None if nothing was published"""
+        stamp = self._manifest_stamp()
+        if stamp != self._stamp:
+            cache = RatingCache.load(self.cache_dir) if stamp is not None else None
+            # A publish racing the attach: keep the old generation and retry next call
+            if cache is None and stamp is not None:
+                return self._cache
+            if cache is not None and self._cache is not None:
+                logger.info(f"Attached rating generation {cache.generation} "
+                            f"(was {self._cache.generation})")
+            self._cache = cache
+            self._stamp = stamp
+        return self._cache
+    
+    @property
+    def generation(self) -> int:
+        cache = self.get()
+        return cache.generation if cache is not None else 0
+
+_shared: Optional[SharedRatings] = None
+
+def get_shared_ratings() -> SharedRatings:
+    """Process-wide handle on the published ratings"""
+    global _shared
+    if _shared is None:
+        _shared = SharedRatings()
+    return _shared
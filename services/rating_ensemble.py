@@ -0,0 +1,87 @@
+# services/rating_ensemble.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import json
+
+import numpy as np
+
+@dataclass
+class RatingEnsemble:
+    """Ratings of every player in R bootstrap replicas of the match history
+    
+    Replica r replays the real match sequence with each match weighted by
+    how often a bootstrap resample drew it, so the spread of a rating
+    across replicas measures how much it depends on the particular matches
+    played. Ratings are laid out (replicas, players, 3). The weighted match
+    counts and the state of the draw generator let a replay resume from the
+    ensemble as if it had never stopped.
+    """
+    names: List[str]
+    ratings: np.ndarray
+    weights: Tuple[float, float, float]     # overall blend of the surface ratings
+    counts: Optional[np.ndarray] = field(default=None, repr=False)    # (replicas, players) weighted matches
+    rng_state: Optional[Dict] = field(default=None, repr=False)       # bit generator after the last draw
+    index: Dict[str, int] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        if self.index is None:
+            self.index = {name: pid for pid, name in enumerate(self.names)}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def to_arrays(self, prefix: str = "ensemble_", resumable: bool = False) -> Dict[str, np.ndarray]:
+        """Arrays of the ensemble; `resumable` adds what a replay needs to continue it"""
+        arrays = {
+            f"{prefix}names": np.asarray(self.names, dtype=str),
+            f"{prefix}ratings": self.ratings,
+            f"{prefix}weights": np.asarray(self.weights, dtype=np.float64)
+        }
+        if resumable and self.resumable:
+            arrays[f"{prefix}counts"] = self.counts
+            arrays[f"{prefix}rng_state"] = np.array(json.dumps(self.rng_state))
+        return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "ensemble_") -> Optional["RatingEnsemble"]:
+        if f"{prefix}ratings" not in arrays:
+            return None
+        resumable = f"{prefix}counts" in arrays
+        return cls(
+            names=arrays[f"{prefix}names"].tolist(),
+            ratings=arrays[f"{prefix}ratings"],
+            weights=tuple(arrays[f"{prefix}weights"].tolist()),
+            counts=arrays[f"{prefix}counts"] if resumable else None,
+            rng_state=json.loads(str(arrays[f"{prefix}rng_state"])) if resumable else None
+        )
+    
+    @property
+    def resumable(self) -> bool:
+        return self.counts is not None and self.rng_state is not None
+    
+    @property
+    def replicas(self) -> int:
+        return self.ratings.shape[0]
+    
+    def surface_ratings(self, player_ids: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """(replicas, len(player_ids)) ratings, each player on its own surface code (overall for -1)"""
+        rows = self.ratings[:, player_ids]
+        w_hard, w_clay, w_grass = self.weights
+        overall = rows[..., 0] * w_hard + rows[..., 1] * w_clay + rows[..., 2] * w_grass
+        known = codes >= 0
+        overall[:, known] = rows[:, known, codes[known]]
+        return overall
+    
+    def mean(self) -> np.ndarray:
+        """(players, 3) mean surface rating over the replicas"""
+        return self.ratings.mean(axis=0)
+    
+    def spread(self) -> np.ndarray:
+        """(players, 3) standard deviation of each surface rating over the replicas"""
+        return self.ratings.std(axis=0)
+    
+    def match_probabilities(self, ids1: np.ndarray, ids2: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """(replicas, matches) probability of the first player winning in every replica"""
+        elo1 = self.surface_ratings(ids1, codes)
+        elo2 = self.surface_ratings(ids2, codes)
+        return 1 / (1 + 10 ** ((elo2 - elo1) / 400))
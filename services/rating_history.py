@@ -0,0 +1,158 @@
+# services/rating_history.py
+from dataclasses import dataclass
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+N_SURFACES = 3
+SURFACE_NAMES = ["Hard", "Clay", "Grass"]
+
+# An exact pre-match rating is kept every SNAPSHOT_INTERVAL events of a series;
+# the events in between only store float32 deltas
+SNAPSHOT_INTERVAL = 32
+
+@dataclass
+class RatingHistory:
+    """Per-player, per-surface rating time series in a compact CSR layout
+    
+    Events of series ``player * 3 + surface`` live in
+    ``[series_ptr[s], series_ptr[s + 1])`` in chronological order.
+    """
+    series_ptr: np.ndarray       # (players * 3 + 1,) int64
+    days: np.ndarray             # (events,) int32 days since epoch
+    deltas: np.ndarray           # (events,) float32 post - pre rating
+    snapshot_ptr: np.ndarray     # (players * 3 + 1,) int64
+    snapshots: np.ndarray        # exact pre-match rating every SNAPSHOT_INTERVAL events
+    
+    @classmethod
+    def empty(cls, n_players: int = 0) -> "RatingHistory":
+        zeros = np.zeros(n_players * N_SURFACES + 1, dtype=np.int64)
+        return cls(zeros, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32),
+                   zeros.copy(), np.zeros(0, dtype=np.float64))
+    
+    @classmethod
+    def from_events(cls, players: np.ndarray, surfaces: np.ndarray, days: np.ndarray,
+                    pre: np.ndarray, deltas: np.ndarray, n_players: int) -> "RatingHistory":
+        """Build the compact layout from chronologically ordered events"""
+        series = players.astype(np.int64) * N_SURFACES + surfaces
+        order = np.argsort(series, kind='stable')
+        counts = np.bincount(series, minlength=n_players * N_SURFACES)
+        series_ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        
+        # Position of each event inside its series decides where snapshots go
+        sorted_series = series[order]
+        local = np.arange(len(order), dtype=np.int64) - series_ptr[sorted_series]
+        snapshot_counts = -(-counts // SNAPSHOT_INTERVAL)
+        
+        return cls(
+            series_ptr=series_ptr,
+            days=days[order].astype(np.int32),
+            deltas=deltas[order].astype(np.float32),
+            snapshot_ptr=np.concatenate([[0], np.cumsum(snapshot_counts)]).astype(np.int64),
+            snapshots=pre[order][local % SNAPSHOT_INTERVAL == 0].astype(np.float64)
+        )
+    
+    @property
+    def n_players(self) -> int:
+        return (len(self.series_ptr) - 1) // N_SURFACES
+    
+    def __len__(self) -> int:
+        return len(self.days)
+    
+    def _series_pre(self, series: int) -> np.ndarray:
+        """Pre-match ratings of every event of one series"""
+        start, end = self.series_ptr[series], self.series_ptr[series + 1]
+        deltas = self.deltas[start:end].astype(np.float64)
+        block = np.arange(end - start) // SNAPSHOT_INTERVAL
+        
+        # Cumulative deltas restarted at each snapshot
+        cumulative = np.cumsum(deltas) - deltas
+        block_offset = cumulative[block * SNAPSHOT_INTERVAL]
+        snapshots = self.snapshots[self.snapshot_ptr[series]:self.snapshot_ptr[series + 1]]
+        return snapshots[block] + (cumulative - block_offset)
+    
+    def _pre_at(self, series: int, local: int) -> float:
+        """Pre-match rating of one event, from its snapshot plus at most 31 deltas"""
+        start = self.series_ptr[series]
+        block = local // SNAPSHOT_INTERVAL
+        snapshot = self.snapshots[self.snapshot_ptr[series] + block]
+        first = start + block * SNAPSHOT_INTERVAL
+        return float(snapshot + self.deltas[first:start + local].astype(np.float64).sum())
+    
+    def rating_as_of(self, player_id: int, surface_code: int, day: int,
+                     base_elo: float) -> float:
+        """Rating entering `day`, i.e. after every match played strictly before it"""
+        if player_id >= self.n_players:
+            return base_elo
+        series = player_id * N_SURFACES + surface_code
+        start, end = self.series_ptr[series], self.series_ptr[series + 1]
+        played = int(np.searchsorted(self.days[start:end], day, side='left'))
+        if played == 0:
+            return base_elo
+        last = played - 1
+        return self._pre_at(series, last) + float(self.deltas[start + last])
+    
+    def trajectory(self, player_id: int) -> pd.DataFrame:
+        """Every rated match of a player with the ratings before and after it"""
+        frames = []
+        for surface_code, surface in enumerate(SURFACE_NAMES):
+            series = player_id * N_SURFACES + surface_code
+            if player_id >= self.n_players or self.series_ptr[series] == self.series_ptr[series + 1]:
+                continue
+            start, end = self.series_ptr[series], self.series_ptr[series + 1]
+            pre = self._series_pre(series)
+            frames.append(pd.DataFrame({
+                'date': self.days[start:end].astype('datetime64[D]'),
+                'surface': surface,
+                'elo_before': pre,
+                'elo_after': pre + self.deltas[start:end]
+            }))
+        if not frames:
+            return pd.DataFrame(columns=['date', 'surface', 'elo_before', 'elo_after'])
+        return pd.concat(frames, ignore_index=True).sort_values('date', kind='stable', ignore_index=True)
+    
+    def to_events(self) -> Dict[str, np.ndarray]:
+        """Expand back to one row per event (grouped by series)"""
+        series = np.repeat(np.arange(len(self.series_ptr) - 1), np.diff(self.series_ptr))
+        pre = np.concatenate([self._series_pre(s) for s in np.unique(series)]) if len(series) else np.zeros(0)
+        return {
+            'players': series // N_SURFACES,
+            'surfaces': series % N_SURFACES,
+            'days': self.days,
+            'pre': pre,
+            'deltas': self.deltas
+        }
+    
+    def extend(self, events: Dict[str, np.ndarray], n_players: int) -> "RatingHistory":
+        """Append events that all happen after the ones already recorded"""
+        if not len(events['days']):
+            return self if n_players == self.n_players else RatingHistory.from_events(
+                **self.to_events(), n_players=n_players)
+        existing = self.to_events()
+        merged = {key: np.concatenate([existing[key], events[key]]) for key in existing}
+        return RatingHistory.from_events(**merged, n_players=n_players)
+    
+    def to_arrays(self, prefix: str = "history_") -> Dict[str, np.ndarray]:
+        return {
+            f"{prefix}series_ptr": self.series_ptr,
+            f"{prefix}days": self.days,
+            f"{prefix}deltas": self.deltas,
+            f"{prefix}snapshot_ptr": self.snapshot_ptr,
+            f"{prefix}snapshots": self.snapshots,
+        }
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "history_") -> Optional["RatingHistory"]:
+        if f"{prefix}days" not in arrays:
+            return None
+        return cls(
+            series_ptr=arrays[f"{prefix}series_ptr"],
+            days=arrays[f"{prefix}days"],
+            deltas=arrays[f"{prefix}deltas"],
+            snapshot_ptr=arrays[f"{prefix}snapshot_ptr"],
+            snapshots=arrays[f"{prefix}snapshots"]
+        )
@@ -0,0 +1,54 @@
+# services/rating_snapshot.py
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Dict, Optional
+
+from config.settings import config
+from models.player import PlayerElo
+from services.elo_engine import RatingState
+from services.glicko_engine import GlickoState
+from services.ranked_index import RankedIndex
+from services.rating_ensemble import RatingEnsemble
+from services.rating_history import RatingHistory
+
+@dataclass(frozen=True)
+class RatingSnapshot:
+    """One immutable set of ratings, as served to readers
+    
+    A rebuild never edits a snapshot: it builds the next one and swaps the
+    service's reference in a single assignment. A reader that took a
+    snapshot keeps a consistent view however long it holds it.
+    """
+    state: RatingState
+    history: RatingHistory
+    csv_state: Optional[RatingState]
+    timestamp: Optional[datetime]   # when the ratings were computed
+    version: int = 0                # bumped by every swap in this process
+    generation: int = 0             # shared cache generation, 0 if not published yet
+    stale: bool = False             # computed from other workbooks or parameters
+    # Bootstrap replicas of the same matches, None until the background refresh built them
+    ensemble: Optional[RatingEnsemble] = field(default=None, repr=False, compare=False)
+    # Glicko-2 ratings and deviations of the same matches, None until built
+    glicko: Optional[GlickoState] = field(default=None, repr=False, compare=False)
+    ranked: RankedIndex = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Rating arrays are shared by every reader of the snapshot
+        for array in (self.state.ratings, self.state.matches):
+            if array.flags.writeable:
+                array.flags.writeable = False
+        object.__setattr__(self, "ranked", RankedIndex.build(self.state, self.history))
+    
+    @classmethod
+    def empty(cls) -> "RatingSnapshot":
+        return cls(RatingState.empty(config.elo.base_elo), RatingHistory.empty(), None, None)
+    
+    @property
+    def age(self) -> Optional[timedelta]:
+        return datetime.now() - self.timestamp if self.timestamp else None
+    
+    @cached_property
+    def players(self) -> Dict[str, PlayerElo]:
+        """PlayerElo view of the rating arrays, built on first access"""
+        return self.state.to_players(self.timestamp.isoformat() if self.timestamp else None)
@@ -0,0 +1,281 @@
+# services/tournament_registry.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+
+import pandas as pd
+
+from config.settings import config
+from services.elo_engine import SURFACES
+from utils.surface_detection import SurfaceDetector
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the registry layout changes
+REGISTRY_VERSION = 1
+
+# tennis-data "Series" values, old names included, mapped onto current tiers
+SERIES_TIERS = {
+    "Grand Slam": "Grand Slam",
+    "Masters 1000": "Masters 1000",
+    "Masters": "Masters 1000",
+    "ATP500": "ATP 500",
+    "International Gold": "ATP 500",
+    "ATP250": "ATP 250",
+    "International": "ATP 250",
+    "Masters Cup": "Finals"
+}
+
+# Surfaces without a rating of their own, mapped onto the closest rated one
+UNRATED_SURFACES = {"Carpet": "Hard"}
+
+# An edition not played for this many years is retired and only used when nothing newer matches
+RETIRED_YEARS = 3
+
+MAJORS = ["wimbledon", "us open", "australian open", "french open", "roland garros"]
+
+# League-name flags, found in one scan. Every alternative sits in a lookahead
+# so overlapping words ("1500" also contains "500") are all reported
+FLAG_WORDS = {
+    "atp": "atp", "challenger": "lower", "125": "lower", "itf": "lower",
+    "double": "doubles", "women": "women", "wta": "women",
+    "masters": "masters", "1000": "masters", "500": "500",
+    **{major: "major" for major in MAJORS}
+}
+FLAG_PATTERN = re.compile("(?=(" + "|".join(re.escape(w) for w in FLAG_WORDS) + "))")
+
+def rated_surface(surface: Optional[str]) -> str:
+    """Surface a match is rated on: Hard, Clay or Grass"""
+    if surface in SURFACES:
+        return surface
+    return UNRATED_SURFACES.get(surface, "Hard")
+
+def start_month(start_time) -> Optional[int]:
+    """Month of an event start time, None when unknown"""
+    starts = pd.to_datetime(start_time, errors='coerce') if start_time else pd.NaT
+    return None if pd.isna(starts) else starts.month
+
+@dataclass(frozen=True)
+class TournamentInfo:
+    """What is known about the tournament behind a tournament or league name"""
+    name: str
+    surface: str
+    tier: Optional[str]           # Grand Slam, Masters 1000, ATP 500, ATP 250, Finals
+    tour: str                     # ATP, Challenger, Doubles, WTA or Other
+    is_atp: bool                  # ATP singles main tour, majors included
+    indoor: Optional[bool] = None
+    location: Optional[str] = None
+    known: bool = False           # resolved from the historical workbooks
+
+class TournamentRegistry:
+    """Tournament metadata learned from the Données workbooks
+    
+    Every tournament name and location seen in the workbooks maps to the
+    editions played there (latest surface, court and series of each event).
+    Names are resolved with one precompiled pattern and memoised, so repeated
+    API league names such as "ATP Toronto - R16" cost a dict lookup. Surfaces
+    are always rated ones, and retired editions only match when nothing
+    current does.
+    """
+    
+    def __init__(self, editions: Dict[str, List[Dict]], fingerprint: str = ""):
+        self.editions = editions
+        self.fingerprint = fingerprint
+        self._cache: Dict[Tuple[str, Optional[int]], TournamentInfo] = {}
+        self.hits = 0
+        self.misses = 0
+        self.known = 0
+        self.fallbacks = 0
+        # Editions last played before this date are retired
+        latest = max((e["last_played"] for es in editions.values() for e in es), default=None)
+        self.retired_before = (f"{int(latest[:4]) - RETIRED_YEARS}{latest[4:]}" if latest else "")
+        
+        # Longest keys first so "us open" wins over a shorter key at the same position
+        keys = sorted(editions, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<![a-z0-9])(" + "|".join(re.escape(k) for k in keys) + r")(?![a-z0-9])"
+        ) if keys else None
+    
+    @classmethod
+    def from_matches(cls, matches: pd.DataFrame, fingerprint: str = "") -> "TournamentRegistry":
+        """Build the registry from match rows with Tournament/Location/Surface/Court/Series"""
+        columns = ['Date', 'Tournament', 'Location', 'Surface', 'Court', 'Series']
+        rows = matches[columns].dropna(subset=['Tournament', 'Surface'])
+        rows = rows.astype({c: object for c in columns[1:]}).sort_values('Date', kind='stable')
+        
+        # Latest edition of each tournament, with the month it is usually played in
+        latest = rows.groupby('Tournament', sort=False).tail(1)
+        months = rows.groupby('Tournament')['Date'].agg(lambda d: int(d.dt.month.mode().iloc[0]))
+        
+        editions: Dict[str, List[Dict]] = {}
+        for row in latest.itertuples(index=False):
+            edition = {
+                "name": row.Tournament,
+                "location": row.Location if isinstance(row.Location, str) else None,
+                "surface": row.Surface,
+                "indoor": row.Court == "Indoor" if isinstance(row.Court, str) else None,
+                "tier": SERIES_TIERS.get(row.Series),
+                "month": int(months[row.Tournament]),
+                "last_played": row.Date.strftime("%Y-%m-%d")
+            }
+            editions.setdefault(row.Tournament.lower().strip(), []).append(edition)
+            if edition["location"]:
+                editions.setdefault(edition["location"].lower().strip(), []).append(edition)
+        
+        return cls(editions, fingerprint)
+    
+    @classmethod
+    def load_or_build(cls, path: Optional[str] = None) -> "TournamentRegistry":
+        """Registry file matching the current match store, rebuilt when the store changed"""
+        from services.match_store import MatchStore
+        
+        path = path or config.tournament_registry_file
+        store = MatchStore()
+        entries = store.entries()
+        digest = hashlib.sha256(f"v{REGISTRY_VERSION};".encode())
+        for file_name in sorted(entries):
+            digest.update(f"{file_name}:{entries[file_name]['sha256']};".encode())
+        fingerprint = digest.hexdigest()
+        
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get("fingerprint") == fingerprint:
+                    return cls(data["editions"], fingerprint)
+        except Exception as e:
+            logger.warning(f"Failed to load tournament registry: {e}")
+        
+        if not entries:
+            logger.warning("Match store is empty, tournament registry falls back to keyword rules")
+            return cls({}, fingerprint)
+        
+        registry = cls.from_matches(store.load(refresh=False), fingerprint)
+        registry.save(path)
+        logger.info(f"Built tournament registry with {len(registry.editions)} names")
+        return registry
+    
+    def save(self, path: str):
+        """Atomically write the registry as JSON"""
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"fingerprint": self.fingerprint, "editions": self.editions}, f,
+                          indent=1, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to save tournament registry: {e}")
+    
+    def lookup(self, name: str, month: Optional[int] = None) -> TournamentInfo:
+        """Resolve a tournament or league name; `month` picks between events sharing a location"""
+        key = (name or "", month)
+        info = self._cache.get(key)
+        if info is not None:
+            self.hits += 1
+            return info
+        
+        self.misses += 1
+        info = self._resolve(name or "", month)
+        if info.known:
+            self.known += 1
+        else:
+            self.fallbacks += 1
+        self._cache[key] = info
+        return info
+    
+    def _resolve(self, name: str, month: Optional[int]) -> TournamentInfo:
+        lower = name.lower().strip()
+        flags = {FLAG_WORDS[m.group(1)] for m in FLAG_PATTERN.finditer(lower)}
+        
+        # Same rules as the original APIService._is_atp_tournament
+        if "atp" in flags:
+            is_atp = "lower" not in flags and "doubles" not in flags
+            tour = "Challenger" if "lower" in flags else "Doubles" if "doubles" in flags else "ATP"
+        elif "major" in flags:
+            is_atp = "women" not in flags
+            tour = "ATP" if is_atp else "WTA"
+        else:
+            is_atp = False
+            tour = "WTA" if "women" in flags else "Other"
+        
+        edition = self._match_edition(lower, month)
+        if edition is not None:
+            return TournamentInfo(
+                name=edition["name"],
+                surface=rated_surface(edition["surface"]),
+                # A Challenger played at a tour venue does not inherit the venue's tier
+                tier=None if tour == "Challenger" else edition["tier"],
+                tour=tour,
+                is_atp=is_atp,
+                indoor=edition["indoor"],
+                location=edition["location"],
+                known=True
+            )
+        
+        # Unknown event: keyword rules for surface and tier
+        if tour == "Challenger":
+            tier = None
+        elif "major" in flags:
+            tier = "Grand Slam"
+        elif "masters" in flags:
+            tier = "Masters 1000"
+        elif "500" in flags:
+            tier = "ATP 500"
+        else:
+            tier = None
+        return TournamentInfo(
+            name=name,
+            surface=rated_surface(SurfaceDetector.detect_surface(name, month)),
+            tier=tier,
+            tour=tour,
+            is_atp=is_atp
+        )
+    
+    def _match_edition(self, lower: str, month: Optional[int]) -> Optional[Dict]:
+        if self._pattern is None:
+            return None
+        found = self._pattern.search(lower)
+        if not found:
+            return None
+        
+        # Current editions, most recent first, then the closest usual month on the calendar circle
+        candidates = sorted(self.editions[found.group(1)], key=lambda e: e["last_played"], reverse=True)
+        current = [e for e in candidates if e["last_played"] >= self.retired_before]
+        candidates = current or candidates
+        if month is not None and len(candidates) > 1:
+            return min(candidates, key=lambda e: min(abs(e["month"] - month), 12 - abs(e["month"] - month)))
+        return candidates[0]
+    
+    def stats(self) -> Dict[str, float]:
+        """Cache hit/miss and registry known/fallback counters"""
+        lookups = self.hits + self.misses
+        surface_cache = SurfaceDetector.cache_info()
+        return {
+            "names": len(self.editions),
+            "lookups": lookups,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "known": self.known,
+            "fallbacks": self.fallbacks,
+            "cache_size": len(self._cache),
+            "surface_cache_hits": surface_cache.hits,
+            "surface_cache_misses": surface_cache.misses
+        }
+
+_registry: Optional[TournamentRegistry] = None
+
+def get_tournament_registry() -> TournamentRegistry:
+    """Process-wide registry shared by the API and betting services"""
+    global _registry
+    if _registry is None:
+        try:
+            _registry = TournamentRegistry.load_or_build()
+        except Exception as e:
+            logger.error(f"Failed to build tournament registry: {e}")
+            _registry = TournamentRegistry({})
+    return _registry
@@ -1,7 +1,7 @@
 # test_debug.py
 
 import pandas as pd
-from model import EloModel
+from model import get_elo_model
 from get_pinnacle_matches import fetch_tennis_matches
 import os
 
@@ -16,7 +16,7 @@ if not os.path.exists(elo_file):
     print("👉 Lancez: python prepare_elo_csv.py")
 else:
     try:
-        model = EloModel(elo_file)
+        model = get_elo_model(elo_file)
         print(f"✅ {len(model.df)} joueurs chargés")
         print(f"📊 Colonnes: {model.df.columns.tolist()}")
         print(f"🎾 Exemple: {model.df.head(3)}")
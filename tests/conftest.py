@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import config
+from services import player_registry
+from services.player_registry import PlayerRegistry
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Data, store, checkpoint and registry files under a temporary directory, with a fresh player registry"""
+    monkeypatch.setattr(config, "data_dir", str(tmp_path / "data"))
+    monkeypatch.setattr(config, "match_store_dir", str(tmp_path / "match_store"))
+    monkeypatch.setattr(config, "elo_checkpoint_file", str(tmp_path / "elo_checkpoint.npz"))
+    monkeypatch.setattr(config, "elo_file", str(tmp_path / "elo_probs.csv"))
+    monkeypatch.setattr(config, "player_registry_file", str(tmp_path / "player_registry.json"))
+    monkeypatch.setattr(config, "ingest_workers", 1)
+    monkeypatch.setattr(config, "replay_workers", 1)
+    monkeypatch.setattr(player_registry, "_registry", PlayerRegistry())
+    os.makedirs(config.data_dir)
+    return tmp_path
+
+@pytest.fixture
+def workbooks(workspace, monkeypatch):
+    """Write match rows as a yearly workbook; workbooks are stored as CSV, read back in place of Excel"""
+    monkeypatch.setattr(pd, "read_excel", pd.read_csv)
+    
+    def write(file_name: str, matches: pd.DataFrame):
+        matches.to_csv(os.path.join(config.data_dir, file_name), index=False)
+    
+    return write
+
+def random_matches(year: int, n_matches: int, n_players: int = 24, seed: int = 0) -> pd.DataFrame:
+    """Matches between synthetic players, in date order, on the three rated surfaces"""
+    rng = np.random.default_rng(seed + year)
+    players = [f"{a}{b}son {a}." for a in "ABCDEFGH" for b in "aeiou"][:n_players]
+    pairs = np.array([rng.choice(n_players, 2, replace=False) for _ in range(n_matches)])
+    days = np.sort(rng.integers(0, 360, n_matches))
+    tournaments = rng.choice(["Doha", "Rome", "Halle"], n_matches)
+    return pd.DataFrame({
+        "ATP": rng.integers(1, 60, n_matches),
+        "Location": tournaments,
+        "Tournament": [f"{t} Open" for t in tournaments],
+        "Date": pd.Timestamp(f"{year}-01-01") + pd.to_timedelta(days, unit="D"),
+        "Series": "ATP250",
+        "Court": "Outdoor",
+        "Surface": pd.Series(tournaments).map({"Doha": "Hard", "Rome": "Clay", "Halle": "Grass"}),
+        "Round": "1st Round",
+        "Winner": [players[i] for i in pairs[:, 0]],
+        "Loser": [players[i] for i in pairs[:, 1]]
+    })
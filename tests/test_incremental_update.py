@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from config.settings import config
+from services.elo_service import EloService
+from services.rating_cache import SharedRatings
+from tests.conftest import random_matches
+
+def make_service(cache_dir) -> EloService:
+    service = EloService()
+    service.shared = SharedRatings(str(cache_dir))
+    return service
+
+def by_name(names, ratings, index, other_ratings):
+    """Ratings of the same players in another state, in the order of `names`"""
+    return ratings, other_ratings[..., [index[name] for name in names], :]
+
+def assert_same_ratings(service: EloService, rebuilt: EloService):
+    a, b = service.snapshot, rebuilt.snapshot
+    for state, other in ((a.state, b.state), (a.csv_state, b.csv_state)):
+        assert sorted(state.names) == sorted(other.names)
+        np.testing.assert_allclose(*by_name(other.names, other.ratings, state.index, state.ratings), atol=1e-9)
+        np.testing.assert_array_equal(*by_name(other.names, other.matches[:, None], state.index,
+                                               state.matches[:, None]))
+    np.testing.assert_allclose(*by_name(b.ensemble.names, b.ensemble.ratings, a.ensemble.index,
+                                        a.ensemble.ratings), atol=1e-9)
+    np.testing.assert_allclose(*by_name(b.glicko.names, b.glicko.ratings, a.glicko.index,
+                                        a.glicko.ratings), atol=1e-9)
+
+@pytest.fixture
+def history(workbooks, monkeypatch):
+    """Two past workbooks and a current-year one; returns the current-year matches"""
+    monkeypatch.setattr(config, "rating_ensemble_replicas", 8)
+    workbooks("2022.xlsx", random_matches(2022, 300))
+    workbooks("2023.xlsx", random_matches(2023, 300))
+    return random_matches(2024, 200)
+
+def test_incremental_update_matches_full_rebuild(workspace, workbooks, history, monkeypatch):
+    workbooks("2024.xlsx", history.iloc[:150])
+    service = make_service(workspace / "cache")
+    assert service.process_historical_data(force_rebuild=True)
+    
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("the checkpoint should have been resumed")
+    
+    monkeypatch.setattr(service, "_rebuild", no_rebuild)
+    workbooks("2024.xlsx", history.iloc[:180])
+    assert service.update_incremental()
+    workbooks("2024.xlsx", history)
+    assert service.update_incremental()
+    # Nothing new: the checkpoint state is served again
+    assert service.update_incremental()
+    
+    rebuilt = make_service(workspace / "cache_rebuilt")
+    assert rebuilt.process_historical_data(force_rebuild=True)
+    assert_same_ratings(service, rebuilt)
+
+def test_edited_current_year_rows_trigger_rebuild(workspace, workbooks, history, monkeypatch):
+    workbooks("2024.xlsx", history.iloc[:150])
+    service = make_service(workspace / "cache")
+    assert service.process_historical_data(force_rebuild=True)
+    
+    rebuilds = []
+    rebuild = service._rebuild
+    monkeypatch.setattr(service, "_rebuild", lambda *args: rebuilds.append(args) or rebuild(*args))
+    edited = history.copy()
+    edited.loc[10, "Winner"], edited.loc[10, "Loser"] = edited.loc[10, "Loser"], edited.loc[10, "Winner"]
+    workbooks("2024.xlsx", edited)
+    assert service.update_incremental()
+    assert len(rebuilds) == 1
+    
+    rebuilt = make_service(workspace / "cache_rebuilt")
+    assert rebuilt.process_historical_data(force_rebuild=True)
+    assert_same_ratings(service, rebuilt)
+
+def test_registry_revision_invalidates_checkpoint(workspace, workbooks, history, monkeypatch):
+    workbooks("2024.xlsx", history)
+    service = make_service(workspace / "cache")
+    assert service.process_historical_data(force_rebuild=True)
+    
+    rebuilds = []
+    monkeypatch.setattr(service, "_rebuild", lambda *args: rebuilds.append(args) or True)
+    assert service.update_incremental()
+    assert rebuilds == []
+    
+    # Re-pointing a workbook alias changes which player past matches belong to
+    alias = history["Winner"].iloc[0]
+    other = next(name for name in history["Loser"] if name != alias)
+    service.registry.link(alias, other)
+    assert service.update_incremental()
+    assert len(rebuilds) == 1
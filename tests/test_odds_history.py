@@ -0,0 +1,89 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from services.odds_history import COMPACTED, INDEX, OddsHistory
+
+DAY = 86400
+
+def event(event_id, home_price, away_price, starts="2099-01-01T12:00:00Z"):
+    return {"event_id": event_id, "home": f"Home {event_id}", "away": f"Away {event_id}",
+            "league_name": "ATP Paris", "starts": starts,
+            "periods": {"num_0": {"money_line": {"home": home_price, "away": away_price}}}}
+
+@pytest.fixture
+def now():
+    # Start of today (UTC), so every append of a test lands in the same days
+    return (int(time.time()) // DAY) * DAY
+
+@pytest.fixture
+def history(tmp_path):
+    return OddsHistory(root=str(tmp_path / "odds_history"), retention_days=30)
+
+def files(history, timestamp):
+    day_dir = os.path.join(history.root, time.strftime("%Y-%m-%d", time.gmtime(timestamp)))
+    return sorted(os.listdir(day_dir))
+
+def test_only_moved_prices_are_logged(history, now):
+    assert history.append([event(1, 1.80, 2.10), event(2, 1.50, 2.60)], now + 60) == 4
+    assert history.append([event(1, 1.80, 2.10), event(2, 1.50, 2.60)], now + 120) == 0
+    assert history.append([event(1, 1.75, 2.10), event(2, 1.50, 2.60)], now + 180) == 1
+    
+    path = history.price_path(1)
+    assert path.groupby("side", observed=True)["price"].apply(list).to_dict() == \
+        {"home": [1.80, 1.75], "away": [2.10]}
+
+def test_restarted_process_does_not_log_known_prices(history, now):
+    history.append([event(1, 1.80, 2.10)], now + 60)
+    restarted = OddsHistory(root=history.root, retention_days=30)
+    assert restarted.append([event(1, 1.80, 2.10)], now + 120) == 0
+    assert restarted.append([event(1, 1.80, 2.20)], now + 180) == 1
+
+def test_compaction_merges_segments_and_drops_repeats(history, now):
+    # A second process that seeded before the first one wrote logs the same price again
+    other = OddsHistory(root=history.root, retention_days=30)
+    other.append([])
+    history.append([event(1, 1.80, 2.10)], now + 60)
+    other.append([event(1, 1.80, 2.10)], now + 120)
+    history.append([event(1, 1.70, 2.10)], now + 180)
+    assert len(files(history, now)) == 4
+    assert len(history.price_path(1)) == 5
+    
+    history.compact()
+    assert files(history, now) == [COMPACTED, INDEX]
+    path = history.price_path(1)
+    assert path["price"].tolist() == [1.80, 1.70, 2.10]
+    assert path["timestamp"].tolist() == pd.to_datetime([now + 60, now + 180, now + 60], unit="s", utc=True).tolist()
+    assert history.events().loc[1, "home"] == "Home 1"
+
+def test_finished_days_are_compacted_on_the_next_day(history, now):
+    yesterday = now - DAY
+    history.append([event(1, 1.80, 2.10)], yesterday + 60)
+    history.append([event(1, 1.90, 2.10)], yesterday + 120)
+    assert len(files(history, yesterday)) == 3
+    
+    history.append([event(1, 1.95, 2.10)], now + 60)
+    assert files(history, yesterday) == [COMPACTED, INDEX]
+    assert history.price_path(1)["price"].tolist() == [1.80, 1.90, 1.95, 2.10]
+
+def test_expired_days_are_pruned(history, now):
+    history.append([event(1, 1.80, 2.10)], now - DAY + 60)
+    history.append([event(2, 1.50, 2.60)], now + 60)
+    assert len(history._partitions()) == 2
+    assert history.prune(now + 30 * DAY) == 1
+    assert history.price_path(1).empty
+    assert len(history.price_path(2)) == 2
+    
+    # Appends drop the days already out of the retention period
+    history.append([event(3, 1.30, 3.40)], now - 40 * DAY)
+    assert len(history._partitions()) == 1
+
+def test_opening_and_closing_prices(history, now):
+    starts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + 300))
+    for offset, price in ((60, 1.80), (120, 1.70), (240, 1.65), (360, 1.50)):
+        history.append([event(1, price, 2.10, starts)], now + offset)
+    
+    home = history.opening_closing(1).loc["home"]
+    assert (home["opening"], home["closing"], home["moves"]) == (1.80, 1.65, 3)
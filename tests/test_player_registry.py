@@ -0,0 +1,82 @@
+import pytest
+
+from config.settings import config
+from services.elo_checkpoint import params_fingerprint
+from services.player_registry import FUZZY, MANUAL, NORMALIZED, WORKBOOK, PlayerRegistry
+
+@pytest.fixture
+def registry() -> PlayerRegistry:
+    registry = PlayerRegistry()
+    registry.register_workbook_names(["Nadal R.", "Alcaraz C.", "Djokovic N."],
+                                     ["Nadal R.", "Alcaraz C.", "Djokovic N."])
+    registry.dirty = False
+    return registry
+
+def test_workbook_names_become_players(registry):
+    assert registry.players == ["Nadal R.", "Alcaraz C.", "Djokovic N."]
+    assert registry.methods["Nadal R."] == WORKBOOK
+    # A known raw name keeps its player, an equal normalized name joins it
+    assert registry.register_workbook_names(["Nadal R.", "Nadal R. "], ["Nadal R.", "Nadal R."]) == ["Nadal R."] * 2
+    assert len(registry) == 3
+
+def test_resolve_learns_aliases(registry):
+    assert registry.lookup("Rafael Nadal") == 0
+    assert "Rafael Nadal" not in registry.aliases
+    
+    assert registry.resolve("Rafael Nadal") == 0
+    assert registry.aliases["Rafael Nadal"] == 0
+    assert registry.methods["Rafael Nadal"] == NORMALIZED
+    assert registry.dirty
+    
+    assert registry.resolve("Alcaraz") == 1
+    assert registry.methods["Alcaraz"] == FUZZY
+    assert registry.canonical_name("Alcaraz") == "Alcaraz C."
+
+def test_unknown_names_are_not_learned(registry):
+    assert registry.resolve("Sinner J.") is None
+    assert "Sinner J." not in registry.aliases
+    assert not registry.dirty
+    assert registry.canonical_name("Jannik Sinner") == "Sinner J."
+
+def test_save_and_load_keep_aliases(registry, tmp_path):
+    path = str(tmp_path / "player_registry.json")
+    registry.resolve("Rafael Nadal")
+    registry.link("Nole", "Djokovic N.")
+    registry.save(path)
+    assert not registry.dirty
+    
+    loaded = PlayerRegistry.load(path)
+    assert loaded.players == registry.players
+    assert loaded.aliases == registry.aliases
+    assert loaded.methods == registry.methods
+    assert loaded.revision == registry.revision
+    assert loaded.resolve("Nole") == 2
+
+def test_link_bumps_revision_only_when_repointing(registry):
+    registry.link("Nole", "Djokovic N.")
+    assert registry.revision == 0
+    assert registry.methods["Nole"] == MANUAL
+    
+    # Same player again: nothing a past replay used changes
+    registry.link("Nole", "Novak Djokovic")
+    assert registry.revision == 0
+    
+    registry.link("Nole", "Nadal R.")
+    assert registry.resolve("Nole") == 0
+    assert registry.revision == 1
+    
+    registry.link("Nadal R.", "Alcaraz C.")
+    assert registry.revision == 2
+
+def test_link_to_unknown_player_fails(registry):
+    with pytest.raises(ValueError):
+        registry.link("Nole", "Sinner J.")
+    assert "Nole" not in registry.aliases
+    assert registry.revision == 0
+
+def test_revision_changes_checkpoint_params(registry):
+    before = params_fingerprint(config.elo, registry.revision)
+    registry.link("Nole", "Djokovic N.")
+    assert params_fingerprint(config.elo, registry.revision) == before
+    registry.link("Nole", "Nadal R.")
+    assert params_fingerprint(config.elo, registry.revision) != before
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from services.tournament_registry import TournamentRegistry, rated_surface, start_month
+
+def edition_rows(tournament, location, surface, series, dates, court="Outdoor"):
+    return [{"Date": pd.Timestamp(date), "Tournament": tournament, "Location": location,
+             "Surface": surface, "Court": court, "Series": series} for date in dates]
+
+@pytest.fixture
+def registry() -> TournamentRegistry:
+    rows = (
+        edition_rows("French Open", "Paris", "Clay", "Grand Slam", ["2023-05-29", "2024-05-27"])
+        + edition_rows("BNP Paribas Masters", "Paris", "Hard", "Masters 1000",
+                       ["2023-10-30", "2024-10-28"], court="Indoor")
+        # Stuttgart moved from clay in July to grass in June
+        + edition_rows("Mercedes Cup", "Stuttgart", "Clay", "International", ["2013-07-08", "2014-07-07"])
+        + edition_rows("Stuttgart Open", "Stuttgart", "Grass", "ATP250", ["2023-06-12", "2024-06-10"])
+        # Only ever played on carpet, long ago
+        + edition_rows("Kremlin Cup", "Moscow", "Carpet", "International", ["2007-10-08"], court="Indoor")
+        + edition_rows("Internazionali BNL d'Italia", "Rome", "Clay", "Masters 1000", ["2024-05-08"])
+    )
+    return TournamentRegistry.from_matches(pd.DataFrame(rows))
+
+def test_month_picks_between_editions_of_a_location(registry):
+    assert registry.lookup("ATP Paris", 11).name == "BNP Paribas Masters"
+    assert registry.lookup("ATP Paris", 11).surface == "Hard"
+    assert registry.lookup("ATP Paris", 11).indoor
+    assert registry.lookup("ATP Paris", 6).name == "French Open"
+    # Calendar circle: January is closer to November than to May
+    assert registry.lookup("ATP Paris", 1).name == "BNP Paribas Masters"
+
+def test_current_editions_win_over_retired_ones(registry):
+    assert registry.retired_before == "2021-10-28"
+    info = registry.lookup("ATP Stuttgart", 7)
+    assert info.name == "Stuttgart Open"
+    assert info.surface == "Grass"
+    assert info.tier == "ATP 250"
+
+def test_retired_edition_used_when_nothing_current(registry):
+    info = registry.lookup("ATP Moscow")
+    assert info.known
+    assert info.name == "Kremlin Cup"
+    # Carpet is not rated: its matches count as hard court
+    assert info.surface == "Hard"
+
+def test_challenger_at_a_tour_venue(registry):
+    masters = registry.lookup("ATP Rome")
+    assert (masters.tier, masters.tour, masters.is_atp) == ("Masters 1000", "ATP", True)
+    challenger = registry.lookup("ATP Challenger Rome")
+    assert challenger.known
+    assert challenger.surface == "Clay"
+    assert (challenger.tier, challenger.tour, challenger.is_atp) == (None, "Challenger", False)
+
+def test_tour_flags(registry):
+    assert not registry.lookup("WTA Rome").is_atp
+    assert not registry.lookup("ATP Doubles Paris").is_atp
+    assert registry.lookup("French Open Men's Singles", 6).is_atp
+    assert registry.lookup("French Open Men's Singles", 6).tier == "Grand Slam"
+
+def test_unknown_tournament_falls_back_to_keywords(registry):
+    info = registry.lookup("ATP Nowhere Masters 1000", 3)
+    assert not info.known
+    assert info.tier == "Masters 1000"
+    assert info.surface in ("Hard", "Clay", "Grass")
+    assert registry.fallbacks == 1
+
+def test_lookups_are_memoised(registry):
+    first = registry.lookup("ATP Paris", 11)
+    assert registry.lookup("ATP Paris", 11) is first
+    assert (registry.hits, registry.misses) == (1, 1)
+
+def test_rated_surface_and_start_month():
+    assert [rated_surface(s) for s in ("Hard", "Clay", "Grass", "Carpet", None)] == \
+        ["Hard", "Clay", "Grass", "Hard", "Hard"]
+    assert start_month("2024-11-03T13:00:00Z") == 11
+    assert start_month(None) is None
+    assert start_month("not a date") is None
@@ -205,6 +205,34 @@ class UIComponents:
         
         return fig
     
+    @staticmethod
+    def create_rating_trajectory_chart(trajectory: pd.DataFrame, player_name: str) -> go.Figure:
+        """Create line chart of a player's Elo rating per surface over time"""
+        if trajectory.empty:
+            return go.Figure()
+        
+        colors = {'Hard': '#1f77b4', 'Clay': '#d62728', 'Grass': '#2ca02c'}
+        fig = go.Figure()
+        for surface, rows in trajectory.groupby('surface', sort=False):
+            fig.add_trace(go.Scatter(
+                x=rows['date'],
+                y=rows['elo_after'],
+                mode='lines',
+                name=surface,
+                line=dict(color=colors.get(surface)),
+                hovertemplate="%{x|%Y-%m-%d}<br>Elo: %{y:.0f}<extra></extra>"
+            ))
+        
+        fig.update_layout(
+            title=f"Elo Trajectory - {player_name}",
+            xaxis_title="Date",
+            yaxis_title="Elo Rating",
+            template="plotly_white",
+            height=400
+        )
+        
+        return fig
+    
     @staticmethod
     def display_strategy_comparison(strategies_data: Dict):
         """Display strategy comparison table"""
@@ -1,10 +1,29 @@
 # utils/name_normalization.py
 import re
-from typing import Dict
+import sys
+import unicodedata
+from typing import Dict, Tuple
 import logging
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+# Formats a player name can come in
+EMPTY, SINGLE, LAST_INITIAL, INITIAL_LAST, FIRST_LAST = (
+    "empty", "single", "last_initial", "initial_last", "first_last"
+)
+
+# Trailing initials of the Excel "Last F." form, including the variants found in
+# the workbooks: "J.F", "C-M.", "An.", "JC", "Jr.A.", "Y. Jr"
+_INITIALS = r"(?:[A-Z][A-Za-z]{0,2}\.+(?:-?[A-Z][a-z]{0,2}\.*)*|[A-Z](?:[.-][A-Z])+\.?|[A-Z]{1,3})"
+LAST_INITIAL_PATTERN = re.compile(rf"(?P<last>.+?) (?P<initials>{_INITIALS})(?: Jr\.?)?")
+INITIAL_LAST_PATTERN = re.compile(r"(?P<initials>(?:[A-Z]\.-?)+) (?P<last>.+)")
+
+# Memoised results are capped so odd inputs cannot grow the cache forever
+MEMO_SIZE = 100_000
+
 class NameNormalizer:
     """Advanced name normalization for tennis players"""
     
@@ -29,34 +48,113 @@ class NameNormalizer:
         'Í': 'I', 'Ì': 'I', 'Ï': 'I', 'Î': 'I', 'Ī': 'I',
         'Ó': 'O', 'Ò': 'O', 'Ö': 'O', 'Ô': 'O', 'Ō': 'O', 'Õ': 'O',
         'Ú': 'U', 'Ù': 'U', 'Ü': 'U', 'Û': 'U', 'Ū': 'U',
-        'Ñ': 'N', 'Ç': 'C'
+        'Ñ': 'N', 'Ç': 'C',
+        # No Unicode decomposition for these
+        'đ': 'dj', 'Đ': 'Dj', 'ø': 'o', 'Ø': 'O', 'ł': 'l', 'Ł': 'L'
     }
     
+    ACCENT_TABLE = str.maketrans(ACCENT_MAP)
+    
+    _memo: Dict[str, str] = {}
+    
     @classmethod
     def remove_accents(cls, text: str) -> str:
         """Remove accents from text"""
-        for accented, plain in cls.ACCENT_MAP.items():
-            text = text.replace(accented, plain)
-        return text
+        if text.isascii():
+            return text
+        text = text.translate(cls.ACCENT_TABLE)
+        if text.isascii():
+            return text
+        # Letters outside ACCENT_MAP: drop the combining marks of their decomposition
+        return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    
+    @classmethod
+    def _clean(cls, name: str) -> str:
+        """Accents removed, whitespace collapsed, doubled dots of "P.." merged"""
+        name = " ".join(cls.remove_accents(name).split())
+        return re.sub(r"\.{2,}", ".", name) if ".." in name else name
+    
+    @classmethod
+    def _parse(cls, full_name: str) -> Tuple[str, str]:
+        """Excel-format name and the format the input was in"""
+        name = cls._clean(full_name)
+        if not name:
+            return "", EMPTY
+        if " " not in name:
+            return name, SINGLE
+        if LAST_INITIAL_PATTERN.fullmatch(name):
+            normalized, name_format = name, LAST_INITIAL
+        else:
+            initial_last = INITIAL_LAST_PATTERN.fullmatch(name)
+            if initial_last:
+                normalized = f"{initial_last.group('last')} {initial_last.group('initials')}"
+                name_format = INITIAL_LAST
+            else:
+                first, last = name.split(" ", 1)
+                normalized, name_format = f"{last} {first[0]}.", FIRST_LAST
+        
+        # Apply corrections
+        return cls.NAME_CORRECTIONS.get(normalized, normalized), name_format
+    
+    @classmethod
+    def detect_format(cls, name: str) -> str:
+        """Which of the known formats a name is written in"""
+        return cls._parse(name or "")[1]
     
     @classmethod
     def normalize_excel_format(cls, full_name: str) -> str:
-        """Convert full name to Excel format (Last First.)"""
-        if not full_name or not full_name.strip():
+        """Convert full name to Excel format (Last First.)
+        
+        Names already written "Last F." are kept as they are. Results are
+        memoised and interned, so repeated names share one string object.
+        """
+        if not full_name:
             return ""
-            
-        name = cls.remove_accents(full_name.strip())
-        parts = name.split()
+        normalized = cls._memo.get(full_name)
+        if normalized is None:
+            normalized = sys.intern(cls._parse(full_name)[0])
+            if len(cls._memo) < MEMO_SIZE:
+                cls._memo[full_name] = normalized
+        return normalized
+    
+    @classmethod
+    def normalize_series(cls, names: pd.Series, return_format: bool = False):
+        """Vectorised normalize_excel_format over a whole column
         
-        if len(parts) < 2:
-            return name
-            
-        first = parts[0]
-        last = " ".join(parts[1:])
-        normalized = f"{last} {first[0]}."
+        Each distinct name is parsed once with pandas string operations.
+        Missing names become "". With `return_format`, returns a DataFrame
+        with the normalised `name` and the detected input `format`.
+        """
+        codes, uniques = pd.factorize(names)
+        raw = pd.Series(uniques, dtype=object)
         
-        # Apply corrections
-        return cls.NAME_CORRECTIONS.get(normalized, normalized)
+        clean = raw.str.translate(cls.ACCENT_TABLE)
+        non_ascii = ~clean.map(str.isascii).astype(bool)
+        if non_ascii.any():
+            clean[non_ascii] = clean[non_ascii].map(cls.remove_accents)
+        clean = clean.str.split().str.join(" ").str.replace(r"\.{2,}", ".", regex=True)
+        
+        parts = clean.str.split(" ", n=1)
+        has_space = clean.str.contains(" ", regex=False)
+        last_initial = clean.str.fullmatch(LAST_INITIAL_PATTERN).fillna(False).astype(bool)
+        initial_last = clean.str.extract(INITIAL_LAST_PATTERN)
+        is_initial_last = initial_last['initials'].notna() & ~last_initial
+        
+        conditions = [clean == "", ~has_space, last_initial, is_initial_last]
+        formats = np.select(conditions, [EMPTY, SINGLE, LAST_INITIAL, INITIAL_LAST], FIRST_LAST)
+        normalized = np.select(
+            conditions,
+            [clean, clean, clean, initial_last['last'] + " " + initial_last['initials']],
+            parts.str[1] + " " + parts.str[0].str[0] + "."
+        )
+        normalized = [sys.intern(cls.NAME_CORRECTIONS.get(name, name)) for name in normalized]
+        
+        # Missing names (code -1) pick the trailing ""
+        normalized = np.array(normalized + [""], dtype=object)[codes]
+        if not return_format:
+            return pd.Series(normalized, index=names.index, name=names.name)
+        formats = np.append(formats.astype(object), EMPTY)[codes]
+        return pd.DataFrame({'name': normalized, 'format': formats}, index=names.index)
     
     @classmethod
     def normalize_api_format(cls, full_name: str) -> str:
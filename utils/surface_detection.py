@@ -1,5 +1,6 @@
 # utils/surface_detection.py
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 import re
 import logging
 
@@ -26,6 +27,13 @@ class SurfaceDetector:
         ]
     }
     
+    # Generic words, checked after every tournament keyword
+    SURFACE_INDICATORS = [
+        ("Clay", ["clay", "terre", "polvo", "battue"]),
+        ("Grass", ["grass", "lawn", "rasen"]),
+        ("Hard", ["hard", "indoor", "outdoor"])
+    ]
+    
     # Default surfaces by month (Northern Hemisphere)
     SEASONAL_DEFAULTS = {
         1: "Hard",    # January - Australian Open season
@@ -42,32 +50,40 @@ class SurfaceDetector:
         12: "Hard"    # December - Off-season/exhibitions
     }
     
+    @classmethod
+    def _compile(cls):
+        """Single alternation over every keyword, ordered by precedence
+        
+        Each alternative sits in a lookahead, so finditer reports at every
+        position the highest-precedence keyword starting there: one scan finds
+        the same surface as checking the keyword lists one after another.
+        """
+        groups = list(cls.SURFACE_KEYWORDS.items()) + cls.SURFACE_INDICATORS
+        cls._rank_surfaces = [surface for surface, _ in groups]
+        cls._keyword_rank: Dict[str, int] = {}
+        for rank, (_, keywords) in enumerate(groups):
+            for keyword in keywords:
+                cls._keyword_rank.setdefault(keyword, rank)
+        ordered = sorted(cls._keyword_rank, key=cls._keyword_rank.get)
+        cls._pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+    
     @classmethod
     def detect_surface(cls, tournament: str, month: Optional[int] = None) -> str:
         """Detect surface from tournament name with fallback to seasonal default"""
         if not tournament:
             return "Hard"  # Default fallback
-        
+        return _detect_surface_cached(tournament, month)
+    
+    @classmethod
+    def _detect_uncached(cls, tournament: str, month: Optional[int]) -> str:
         tournament_lower = tournament.lower().strip()
         
-        # Check against known tournaments
-        for surface, keywords in cls.SURFACE_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in tournament_lower:
-                    logger.debug(f"Surface detected: {surface} for tournament: {tournament}")
-                    return surface
-        
-        # Clay court indicators
-        if any(word in tournament_lower for word in ["clay", "terre", "polvo", "battue"]):
-            return "Clay"
-        
-        # Grass court indicators  
-        if any(word in tournament_lower for word in ["grass", "lawn", "rasen"]):
-            return "Grass"
-        
-        # Hard court indicators
-        if any(word in tournament_lower for word in ["hard", "indoor", "outdoor"]):
-            return "Hard"
+        # Check against known tournaments and surface indicator words
+        ranks = [cls._keyword_rank[m.group(1)] for m in cls._pattern.finditer(tournament_lower)]
+        if ranks:
+            surface = cls._rank_surfaces[min(ranks)]
+            logger.debug(f"Surface detected: {surface} for tournament: {tournament}")
+            return surface
         
         # Fallback to seasonal default
         if month and month in cls.SEASONAL_DEFAULTS:
@@ -79,6 +95,11 @@ class SurfaceDetector:
         logger.warning(f"Could not detect surface for tournament: {tournament}, using Hard")
         return "Hard"
     
+    @classmethod
+    def cache_info(cls):
+        """Hit/miss counters of the detection cache"""
+        return _detect_surface_cached.cache_info()
+    
     @classmethod
     def get_surface_multiplier(cls, surface: str) -> float:
         """Get surface-specific Elo adjustment multiplier"""
@@ -87,4 +108,10 @@ class SurfaceDetector:
             "Clay": 1.1,  # Slightly higher variance on clay
             "Grass": 0.9  # Lower variance on grass (fewer matches)
         }
-        return multipliers.get(surface, 1.0)
\ No newline at end of file
+        return multipliers.get(surface, 1.0)
+
+SurfaceDetector._compile()
+
+@lru_cache(maxsize=4096)
+def _detect_surface_cached(tournament: str, month: Optional[int]) -> str:
+    return SurfaceDetector._detect_uncached(tournament, month)
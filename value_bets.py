@@ -1,13 +1,14 @@
 # value_bets.py
 
+import numpy as np
 import pandas as pd
 from get_pinnacle_matches import fetch_tennis_matches
-from model import EloModel
+from model import get_elo_model
 
 def compute_value_bets(elo_file: str, min_value_threshold: float = 0.05) -> pd.DataFrame:
     try:
-        # Chargement modèle Elo
-        model = EloModel(elo_file)
+        # Modèle Elo, rechargé seulement si le fichier a changé
+        model = get_elo_model(elo_file)
         print(f"✅ Modèle Elo chargé")
         
         # Récupération matchs API
@@ -27,18 +28,19 @@ def compute_value_bets(elo_file: str, min_value_threshold: float = 0.05) -> pd.D
     matches_analyzed = 0
     matches_with_elo = 0
     
-    for _, row in matches_df.iterrows():
+    # Récupération des Elo de tous les matchs en une fois
+    surfaces = matches_df["surface"].tolist()
+    elos1 = model.get_elos(matches_df["player1"].tolist(), surfaces).tolist()
+    elos2 = model.get_elos(matches_df["player2"].tolist(), surfaces).tolist()
+    
+    for (_, row), elo1, elo2 in zip(matches_df.iterrows(), elos1, elos2):
         p1 = row["player1"]
         p2 = row["player2"]
         surface = row["surface"]
-
-        # Récupération Elo
-        elo1 = model.get_elo(p1, surface)
-        elo2 = model.get_elo(p2, surface)
         
         matches_analyzed += 1
 
-        if elo1 is None or elo2 is None:
+        if np.isnan(elo1) or np.isnan(elo2):
             print(f"⚠️ Elo manquant : {p1} vs {p2}")
             continue
             